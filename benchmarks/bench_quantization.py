@@ -0,0 +1,80 @@
+"""
+Memory and recall impact of vector quantization.
+
+Indexes the same synthetic clustered unit vectors at float32, float16, int8
+and with product quantization, with and without exact reranking, and
+reports bytes per vector, memory saving, recall@k against float32 exact
+search and query latency, then how much slower float16 search is than
+float32.
+
+Usage:
+    python -m benchmarks.bench_quantization --vectors 100000 --dim 768
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_vector_backends import make_vectors, recall_at_k
+from src.quantization import build_codec
+from src.vector_index import ExactIndex
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pq-subspaces", type=int, default=32)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    args = parser.parse_args()
+    
+    data = make_vectors(args.vectors + args.queries, args.dim, clusters=max(16, args.vectors // 500))
+    vectors, queries = data[:args.vectors], data[args.vectors:]
+    baseline = ExactIndex()
+    baseline.add(vectors)
+    truth = [baseline.search(query, args.k)[0].tolist() for query in queries]
+    baseline_bytes = baseline.memory_usage()['bytes_per_vector']
+    
+    p50_ms = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in [None, "float16", "int8", "pq"]:
+            for rerank_factor in ([0] if name is None else [0, args.rerank_factor]):
+                full_vectors_path = None
+                if rerank_factor > 0:
+                    full_vectors_path = os.path.join(directory, f"{name}.f32")
+                index = ExactIndex(
+                    codec=build_codec(name, pq_subspaces=args.pq_subspaces,
+                                      train_size=min(20000, args.vectors)),
+                    rerank_factor=rerank_factor,
+                    full_vectors_path=full_vectors_path
+                )
+                started = time.perf_counter()
+                index.add(vectors)
+                build_seconds = time.perf_counter() - started
+                
+                found = []
+                latencies = []
+                for query in queries:
+                    started = time.perf_counter()
+                    found.append(index.search(query, args.k)[0].tolist())
+                    latencies.append(time.perf_counter() - started)
+                
+                usage = index.memory_usage()
+                latencies = np.array(latencies) * 1000
+                label = (name or "float32") + (f" +rerank x{rerank_factor}" if rerank_factor else "")
+                p50_ms[label] = np.percentile(latencies, 50)
+                print(
+                    f"{label:<20} {usage['bytes_per_vector']:>7.0f} B/vector "
+                    f"{baseline_bytes / usage['bytes_per_vector']:>6.1f}x smaller  "
+                    f"build {build_seconds:>6.2f}s  recall@k {recall_at_k(found, truth):>6.3f}  "
+                    f"p50 {p50_ms[label]:>6.2f}ms  p95 {np.percentile(latencies, 95):>6.2f}ms"
+                )
+    
+    print(
+        f"float16 search p50 {p50_ms['float16']:.2f}ms vs float32 {p50_ms['float32']:.2f}ms "
+        f"({p50_ms['float16'] / p50_ms['float32']:.1f}x)"
+    )
+
+if __name__ == "__main__":
+    main()
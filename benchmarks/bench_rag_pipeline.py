@@ -0,0 +1,377 @@
+"""
+Offline end-to-end benchmark of ingestion and question answering.
+
+Writes a synthetic PDF corpus, ingests it with DocumentProcessor,
+IngestionPipeline and VectorStore, and answers questions with QAChain,
+with deterministic hashing embeddings and a canned LLM standing in for
+Gemini, so no API key or network is needed. The corpus grows in steps;
+each step reports pages/s, chunks/s, index build time, peak RSS and query
+latency percentiles. --output saves the results as JSON, and --baseline
+compares a run against saved results, exiting non-zero on regressions.
+
+Usage:
+    python -m benchmarks.bench_rag_pipeline --documents 20 100 500 --output run.json
+    python -m benchmarks.bench_rag_pipeline --backend ivf --baseline run.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake import FakeListLLM
+from benchmarks.bench_text_splitter import make_page
+
+# AppConfig refuses to load without a key; nothing here calls the API
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+from config.app_config import AppConfig
+from src.bulk_ingestion import LocalPDF
+from src.document_processor import DocumentProcessor
+from src.embedding_cache import CachedEmbeddings
+from src.ingestion_pipeline import IngestionPipeline
+from src.qa_chain import QAChain
+from src.resources import get_metrics, get_resource
+from src.vector_store import EmbeddingScheduler, VectorStore
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+RESULTS_FORMAT_VERSION = 1
+TOKEN = re.compile(r"\w+")
+# Stages whose time counts as building the index, as opposed to parsing and embedding
+INDEX_STAGES = ("upsert", "delete", "persist")
+# Compared against --baseline: metric name and whether higher is better
+COMPARED_METRICS = (
+    ("pages_per_second", True),
+    ("chunks_per_second", True),
+    ("index_seconds", False),
+    ("query_p50_ms", False),
+    ("query_p95_ms", False),
+    ("query_p99_ms", False),
+    ("peak_rss_mb", False)
+)
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings: texts sharing words get similar vectors."""
+    
+    def __init__(self, dim=256, latency_seconds=0.0):
+        self.dim = dim
+        self.latency_seconds = latency_seconds
+    
+    def embed_documents(self, texts):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+    
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+    
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in TOKEN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += 1.0 if value & (1 << 63) else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).tolist()
+
+def make_pdf(pages, line_length=90):
+    """Build a minimal PDF with one Helvetica text page per string, one line per row."""
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    }
+    kids = []
+    for i, text in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        lines = []
+        for line in text.split("\n"):
+            lines.extend(
+                line[start:start + line_length]
+                for start in range(0, max(len(line), 1), line_length)
+            )
+        escaped = (
+            line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines
+        )
+        stream = "BT /F1 9 Tf 36 806 Td 11 TL " + " ".join(f"({line}) '" for line in escaped)
+        stream = (stream + " ET").encode("latin-1", errors="replace")
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+    xref = len(out)
+    size = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    for number in range(1, size):
+        out += b"%010d 00000 n \n" % offsets[number]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+    return bytes(out)
+
+def reference_code(document, page):
+    return f"REF{document:05d}P{page:03d}"
+
+def write_corpus(directory, first, count, pages_per_document, seed):
+    """Write documents first..first+count-1; each page carries its reference code."""
+    paths = []
+    for document in range(first, first + count):
+        rng = random.Random(seed * 1000003 + document)
+        pages = [
+            f"Reference code {reference_code(document, page)}\n" + make_page(rng, page)
+            for page in range(pages_per_document)
+        ]
+        path = os.path.join(directory, f"doc{document:05d}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_pdf(pages))
+        paths.append(path)
+    return paths
+
+def make_questions(documents, pages_per_document, count, seed):
+    rng = random.Random(seed)
+    return [
+        f"What does the section with reference code "
+        f"{reference_code(rng.randrange(documents), rng.randrange(pages_per_document))} "
+        f"say about {rng.choice(['payment', 'termination', 'liability', 'delivery'])}?"
+        for _ in range(count)
+    ]
+
+def stage_seconds(stages):
+    total = 0.0
+    for stage in stages:
+        histogram = get_metrics().get_histogram("stage_duration_seconds", stage=stage)
+        if histogram is not None:
+            total += histogram.sum
+    return total
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its finished children, in MB."""
+    if resource is None:
+        return None, None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return tuple(
+        resource.getrusage(who).ru_maxrss * scale / 1e6
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+    )
+
+def percentile_ms(latencies, q):
+    return float(np.percentile(np.array(latencies) * 1000, q)) if latencies else None
+
+def install_fakes(args, workdir):
+    """Register the offline embedding model and LLM under the keys the app looks up."""
+    get_resource('embedding_model', lambda: CachedEmbeddings(
+        EmbeddingScheduler(
+            HashingEmbeddings(args.dim, args.embed_latency_ms / 1000),
+            batch_size=args.embed_batch_size,
+            requests_per_minute=args.requests_per_minute
+        ),
+        model_name=f"hashing-{args.dim}",
+        cache_path=os.path.join(workdir, "embedding_cache.sqlite3")
+    ))
+    app_config = AppConfig()
+    get_resource(
+        ('llm', app_config.LLM_MODEL, args.temperature),
+        lambda: FakeListLLM(responses=["The payment is due within thirty days of receipt."])
+    )
+
+def run_step(args, vector_store, doc_processor, qa_chain, db, paths, documents):
+    """Ingest paths into db, then time questions over the whole corpus so far."""
+    index_before = stage_seconds(INDEX_STAGES)
+    pipeline = IngestionPipeline(
+        doc_processor, vector_store, args.chunk_size, args.chunk_overlap
+    )
+    started = time.perf_counter()
+    pipeline.run([LocalPDF(path) for path in paths], db=db, prune_other_files=False)
+    ingest_seconds = time.perf_counter() - started
+    index_seconds = stage_seconds(INDEX_STAGES) - index_before
+    stats = pipeline.stats
+    
+    chain = qa_chain.create_chain(
+        db, args.temperature, retriever=vector_store.get_retriever(db)
+    )
+    questions = make_questions(documents, args.pages_per_document, args.queries + 1, args.seed)
+    # The first question also builds the keyword index, so it is reported on its own
+    started = time.perf_counter()
+    qa_chain.get_answer(chain, questions[0])
+    first_query_seconds = time.perf_counter() - started
+    latencies = []
+    for question in questions[1:]:
+        started = time.perf_counter()
+        qa_chain.get_answer(chain, question)
+        latencies.append(time.perf_counter() - started)
+    
+    peak_rss, peak_child_rss = peak_rss_mb()
+    return {
+        'documents': documents,
+        'new_documents': len(paths),
+        'pages': stats['total_pages'],
+        'chunks': stats['chunks'],
+        'indexed_chunks': len(vector_store.get_indexed_ids(db)),
+        'ingest_seconds': ingest_seconds,
+        'pages_per_second': stats['total_pages'] / max(ingest_seconds, 1e-9),
+        'chunks_per_second': stats['chunks'] / max(ingest_seconds, 1e-9),
+        'index_seconds': index_seconds,
+        'first_query_seconds': first_query_seconds,
+        'query_p50_ms': percentile_ms(latencies, 50),
+        'query_p95_ms': percentile_ms(latencies, 95),
+        'query_p99_ms': percentile_ms(latencies, 99),
+        'queries_per_second': len(latencies) / max(sum(latencies), 1e-9),
+        'peak_rss_mb': peak_rss,
+        'peak_child_rss_mb': peak_child_rss
+    }
+
+def report(step):
+    print(
+        f"{step['documents']:>6} docs {step['indexed_chunks']:>8,} chunks  "
+        f"{step['pages_per_second']:>8,.1f} pages/s {step['chunks_per_second']:>8,.1f} chunks/s  "
+        f"index {step['index_seconds']:>7.2f}s  "
+        f"p50 {step['query_p50_ms']:>7.2f}ms p95 {step['query_p95_ms']:>7.2f}ms "
+        f"p99 {step['query_p99_ms']:>7.2f}ms  "
+        f"rss {step['peak_rss_mb'] or 0:>7.1f}MB",
+        flush=True
+    )
+
+def compare(results, baseline, tolerance):
+    """
+    Print each metric's change against a baseline run with the same corpus steps.
+    
+    Returns:
+        Number of metrics that got worse by more than tolerance
+    """
+    if baseline.get('config') != results['config']:
+        print("Warning: the baseline was run with different settings", file=sys.stderr)
+    baseline_steps = {step['documents']: step for step in baseline['steps']}
+    regressions = 0
+    for step in results['steps']:
+        before = baseline_steps.get(step['documents'])
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = before.get(metric), step.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > tolerance:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(
+                f"{step['documents']:>6} docs {metric:<18} {old:>12,.2f} -> {new:>12,.2f} "
+                f"{change:>+8.1%}{flag}"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, nargs="+", default=[10, 50, 200],
+                        help="Corpus sizes in documents, ingested incrementally")
+    parser.add_argument("--pages-per-document", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=50, help="Timed questions per step")
+    parser.add_argument("--backend", choices=["chroma", "ivf", "exact"], default=None,
+                        help="Vector backend (default: VECTOR_BACKEND)")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="PDF parsing processes (default: MAX_CONCURRENT_UPLOADS)")
+    parser.add_argument("--dim", type=int, default=256, help="Fake embedding dimensions")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0,
+                        help="Simulated latency of each embedding request")
+    parser.add_argument("--embed-batch-size", type=int, default=100)
+    parser.add_argument("--requests-per-minute", type=float, default=1e9,
+                        help="Embedding rate limit; unlimited by default")
+    parser.add_argument("--temperature", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative change counted as a regression (default: 0.1)")
+    args = parser.parse_args()
+    sizes = sorted(set(args.documents))
+    
+    with tempfile.TemporaryDirectory(prefix="bench_rag_") as workdir:
+        install_fakes(args, workdir)
+        vector_store = VectorStore(collection_name="bench")
+        vector_store.db_config.CHROMA_DB_PATH = os.path.join(workdir, "chroma_db")
+        vector_store.db_config.LOCAL_INDEX_DIR = Path(workdir) / "local_index"
+        if args.backend is not None:
+            vector_store.db_config.VECTOR_BACKEND = args.backend
+        doc_processor = DocumentProcessor()
+        if args.workers is not None:
+            doc_processor.config.MAX_CONCURRENT_UPLOADS = args.workers
+        # Every question is answered in full: no answer cache
+        qa_chain = QAChain()
+        
+        pdf_dir = os.path.join(workdir, "pdfs")
+        os.makedirs(pdf_dir)
+        db = vector_store.open_database()
+        results = {
+            'format_version': RESULTS_FORMAT_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(),
+            'config': {
+                'backend': vector_store.db_config.VECTOR_BACKEND,
+                'quantization': vector_store.db_config.VECTOR_QUANTIZATION,
+                'pages_per_document': args.pages_per_document,
+                'queries': args.queries,
+                'chunk_size': args.chunk_size,
+                'chunk_overlap': args.chunk_overlap,
+                'workers': doc_processor.config.MAX_CONCURRENT_UPLOADS,
+                'dim': args.dim,
+                'embed_latency_ms': args.embed_latency_ms,
+                'seed': args.seed
+            },
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count()
+            },
+            'steps': []
+        }
+        
+        print(f"Backend {results['config']['backend']}, "
+              f"{args.pages_per_document} pages per document, {args.queries} questions per step")
+        ingested = 0
+        for documents in sizes:
+            paths = write_corpus(
+                pdf_dir, ingested, documents - ingested, args.pages_per_document, args.seed
+            )
+            step = run_step(args, vector_store, doc_processor, qa_chain, db, paths, documents)
+            ingested = documents
+            results['steps'].append(step)
+            report(step)
+        vector_store.delete_database()
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"{regressions} regression(s) beyond {args.tolerance:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
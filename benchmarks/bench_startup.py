@@ -0,0 +1,123 @@
+"""
+Cold-start import time of the app, checked against a startup budget.
+
+Imports each target in a fresh interpreter, several times, and reports
+the median time, so one target never benefits from modules an earlier one
+already loaded. "shell" is everything main.py imports before the upload
+widget renders and is held to --budget-ms; "app" is everything main.py
+imports before it can answer questions. --top lists the modules that take
+longest to import for one target, from python -X importtime.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5 --output startup.json
+    python -m benchmarks.bench_startup --top 15 src.qa_chain
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHELL_MODULES = ("streamlit", "components.styling", "components.ui_helpers", "config.app_config")
+APP_MODULES = SHELL_MODULES + (
+    "src.document_processor", "src.vector_store", "src.qa_chain", "src.ingestion_cache",
+    "src.ingestion_pipeline", "src.ingestion_jobs", "src.resources", "src.instrumentation",
+    "src.answer_cache"
+)
+TARGETS = {
+    "shell": SHELL_MODULES,
+    "app": APP_MODULES,
+    "config": ("config.app_config", "config.db_config"),
+    "document_processor": ("src.document_processor",),
+    "vector_store": ("src.vector_store",),
+    "qa_chain": ("src.qa_chain",),
+    "chroma_backend": ("src.chroma_backend",),
+    "ingest_cli": ("ingest",)
+}
+DEFAULT_BUDGET_MS = 500
+
+def run_python(args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True,
+        env=dict(os.environ, PYTHONPATH=ROOT)
+    )
+
+def time_import(modules):
+    """Import modules in a new interpreter; return the milliseconds the imports took."""
+    code = (
+        "import time\n"
+        "started = time.perf_counter()\n"
+        f"import {', '.join(modules)}\n"
+        "print((time.perf_counter() - started) * 1000)"
+    )
+    return float(run_python(["-c", code]).stdout.strip().splitlines()[-1])
+
+def slowest_imports(modules, top):
+    """
+    Profile importing modules with -X importtime.
+    
+    Returns:
+        List of (module, self ms, cumulative ms), slowest cumulative first
+    """
+    stderr = run_python(["-X", "importtime", "-c", f"import {', '.join(modules)}"]).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return sorted(rows, key=lambda row: -row[2])[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=list(TARGETS),
+                        help="Targets or modules to time (default: all); --top profiles the first")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Startup budget for the shell target (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--top", type=int, default=0,
+                        help="List this many of the slowest imports of the first target instead")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file")
+    args = parser.parse_args()
+    
+    if args.top:
+        modules = TARGETS.get(args.targets[0], (args.targets[0],))
+        print(f"{'module':<60} {'self ms':>9} {'cumulative ms':>14}")
+        for name, self_ms, cumulative_ms in slowest_imports(modules, args.top):
+            print(f"{name:<60} {self_ms:>9.1f} {cumulative_ms:>14.1f}")
+        return 0
+    
+    results = {'python': sys.version.split()[0], 'budget_ms': args.budget_ms, 'targets': {}}
+    for target in args.targets:
+        modules = TARGETS.get(target, (target,))
+        timings = [time_import(modules) for _ in range(args.repeat)]
+        results['targets'][target] = {
+            'modules': list(modules),
+            'median_ms': statistics.median(timings),
+            'min_ms': min(timings),
+            'max_ms': max(timings)
+        }
+        print(
+            f"{target:<20} median {statistics.median(timings):>8.1f}ms  "
+            f"min {min(timings):>8.1f}ms  max {max(timings):>8.1f}ms"
+        )
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    
+    shell = results['targets'].get("shell")
+    if shell is not None:
+        within = shell['median_ms'] <= args.budget_ms
+        print(
+            f"Shell import {shell['median_ms']:.0f}ms, budget {args.budget_ms:.0f}ms: "
+            f"{'ok' if within else 'OVER BUDGET'}"
+        )
+        return 0 if within else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Recall@k versus latency for the vector backends.
+
+Builds each backend over the same synthetic clustered unit vectors and
+measures recall@k against exact search, per-query latency percentiles and
+build time. IVF is swept over nprobe and Chroma's HNSW over search_ef.
+
+Usage:
+    python -m benchmarks.bench_vector_backends --vectors 100000 --dim 768
+"""
+import argparse
+import time
+import numpy as np
+from src.vector_index import ExactIndex, IVFIndex, normalize
+
+def make_vectors(count, dim, clusters, seed=0):
+    """Unit vectors drawn around random cluster centres, like topical embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = normalize(rng.normal(size=(clusters, dim)))
+    labels = rng.integers(0, clusters, size=count)
+    return normalize(centres[labels] + 1.5 * rng.normal(size=(count, dim)) / np.sqrt(dim))
+
+def recall_at_k(found, truth):
+    return np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)])
+
+def report(name, params, build_seconds, found, latencies, truth):
+    latencies = np.array(latencies) * 1000
+    print(
+        f"{name:<8} {params:<20} build {build_seconds:>7.2f}s  "
+        f"recall@k {recall_at_k(found, truth):>6.3f}  "
+        f"p50 {np.percentile(latencies, 50):>7.2f}ms  p95 {np.percentile(latencies, 95):>7.2f}ms  "
+        f"{1000 / latencies.mean():>8.0f} qps"
+    )
+
+def run_index(index, queries, k):
+    found = []
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        rows, _ = index.search(query, k)
+        latencies.append(time.perf_counter() - started)
+        found.append(rows.tolist())
+    return found, latencies
+
+def bench_chroma(vectors, queries, k, truth, search_efs, m):
+    try:
+        import chromadb
+    except ImportError:
+        print("chroma   skipped: chromadb is not installed")
+        return
+    
+    client = chromadb.EphemeralClient()
+    started = time.perf_counter()
+    collection = client.create_collection(
+        "bench", metadata={"hnsw:M": m, "hnsw:construction_ef": 100}
+    )
+    batch_size = 5000
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size]
+        collection.add(
+            ids=[str(i) for i in range(start, start + len(batch))], embeddings=batch.tolist()
+        )
+    build_seconds = time.perf_counter() - started
+    
+    for search_ef in search_efs:
+        collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+        found = []
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+            latencies.append(time.perf_counter() - started)
+            found.append([int(i) for i in result['ids'][0]])
+        report("chroma", f"M={m} ef={search_ef}", build_seconds, found, latencies, truth)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 32, 64, 128])
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+    
+    # Queries come from the same distribution as the corpus
+    data = make_vectors(args.vectors + args.queries, args.dim, clusters=max(16, args.vectors // 500))
+    vectors, queries = data[:args.vectors], data[args.vectors:]
+    
+    started = time.perf_counter()
+    exact = ExactIndex()
+    exact.add(vectors)
+    build_seconds = time.perf_counter() - started
+    truth, latencies = run_index(exact, queries, args.k)
+    report("exact", "", build_seconds, truth, latencies, truth)
+    
+    started = time.perf_counter()
+    ivf = IVFIndex(nlist=args.nlist)
+    ivf.add(vectors)
+    build_seconds = time.perf_counter() - started
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        found, latencies = run_index(ivf, queries, args.k)
+        report("ivf", f"nlist={args.nlist} nprobe={nprobe}", build_seconds, found, latencies, truth)
+    
+    if not args.skip_chroma:
+        bench_chroma(vectors, queries, args.k, truth, args.search_ef, args.hnsw_m)
+
+if __name__ == "__main__":
+    main()
@@ -65,19 +65,19 @@ def render_upload_section():
     
     return uploaded_files
 
-def render_question_section(uploaded_files):
+def render_question_section(corpus_files):
     """
     Render question input section.
     
     Args:
-        uploaded_files: List of uploaded files
-        
+        corpus_files: Files that can be searched, uploaded or pre-built with ingest.py
+    
     Returns:
         Tuple of (query, ask_button, clear_button)
     """
     st.markdown("## 💬 Ask Your Question")
     
-    if uploaded_files:
+    if corpus_files:
         query = st.text_area(
             "Enter your question here:",
             height=100,
@@ -90,19 +90,45 @@ def render_question_section(uploaded_files):
             ask_button = st.button("🔍 Ask Question", type="primary")
         with col_btn2:
             clear_button = st.button("🧹 Clear")
-            
+        
         return query, ask_button, clear_button
     else:
         st.info("👆 Please upload PDF files first to start asking questions.")
         return None, False, False
 
-def render_stats(uploaded_files, all_docs):
+def render_search_scope(file_names):
+    """
+    Render optional controls that scope questions to specific files or pages.
+    
+    Args:
+        file_names: Names of the files that can be searched
+    
+    Returns:
+        Tuple of (selected file names or None, (first, last) page numbers or None)
+    """
+    with st.expander("🎯 Search Scope"):
+        selected_files = st.multiselect(
+            "Limit to files",
+            file_names,
+            help="Leave empty to search all files."
+        )
+        
+        page_range = None
+        if st.checkbox("Limit to a page range"):
+            first_page = st.number_input("First page", min_value=1, value=1, step=1)
+            last_page = st.number_input("Last page", min_value=first_page, value=first_page, step=1)
+            page_range = (int(first_page), int(last_page))
+    
+    return selected_files or None, page_range
+
+def render_stats(corpus_files, document_stats):
     """
     Render document statistics.
     
     Args:
-        uploaded_files: List of uploaded files
-        all_docs: List of processed documents
+        corpus_files: Files being searched
+        document_stats: Dictionary with total_pages, total_characters and
+            optionally the timed_out_files and failed_files that were skipped
     """
     st.markdown("## 📊 Document Statistics")
     
@@ -111,27 +137,101 @@ def render_stats(uploaded_files, all_docs):
     with col_stat1:
         st.markdown(f"""
         <div class="stat-box">
-            <h3>{len(uploaded_files)}</h3>
-            <p>PDFs Uploaded</p>
+            <h3>{len(corpus_files)}</h3>
+            <p>PDFs Loaded</p>
         </div>
         """, unsafe_allow_html=True)
     
     with col_stat2:
         st.markdown(f"""
         <div class="stat-box">
-            <h3>{len(all_docs)}</h3>
+            <h3>{document_stats['total_pages']}</h3>
             <p>Pages Processed</p>
         </div>
         """, unsafe_allow_html=True)
     
     with col_stat3:
-        total_chars = sum(len(doc.page_content) for doc in all_docs)
         st.markdown(f"""
         <div class="stat-box">
-            <h3>{total_chars:,}</h3>
+            <h3>{document_stats['total_characters']:,}</h3>
             <p>Characters</p>
         </div>
         """, unsafe_allow_html=True)
+    
+    render_timed_out_files(document_stats.get('timed_out_files'))
+    render_failed_files(document_stats.get('failed_files'))
+
+def render_ingestion_job(job, poll_seconds=1.0, on_retry=None):
+    """
+    Render a background ingestion job's progress, polling until it finishes.
+    
+    Only this fragment reruns while polling. The whole app reruns when the
+    job finishes or its first chunks become searchable.
+    
+    Args:
+        job: IngestionJob to show
+        poll_seconds: Seconds between status refreshes
+        on_retry: Optional callable run when the user retries a failed or cancelled job
+    """
+    finished = job.is_finished
+    queryable = job.is_queryable
+    
+    @st.fragment(run_every=None if finished else poll_seconds)
+    def job_status():
+        if not finished and (job.is_finished or job.is_queryable != queryable):
+            st.rerun()
+        
+        progress = job.progress()
+        state = progress['state']
+        st.markdown("## 🧠 Building Knowledge Base")
+        st.caption(
+            f"Job {progress['id'][:8]} · {state} · {progress['total_pages']:,} pages parsed · "
+            f"{progress['chunks']:,} chunks · {progress['upserted']:,} indexed · "
+            f"{progress['elapsed_seconds']:.0f}s"
+        )
+        
+        if state == 'queued':
+            st.info("Waiting for a free ingestion worker...")
+        elif state == 'parsing':
+            st.info("Parsing and splitting pages while embedding the first chunks...")
+        elif state == 'embedding':
+            st.progress(progress['upserted'] / max(progress['chunks'], 1), text="Embedding chunks")
+        elif state == 'failed':
+            st.error(f"❌ Processing failed: {progress['error']}")
+        else:
+            st.warning("Processing was cancelled.")
+        render_timed_out_files(progress.get('timed_out_files'))
+        render_failed_files(progress.get('failed_files'))
+        
+        if not job.is_finished:
+            if st.button("✖️ Cancel", key=f"cancel_{progress['id']}"):
+                job.cancel()
+                st.rerun()
+        elif on_retry is not None and st.button("🔁 Retry", key=f"retry_{progress['id']}"):
+            on_retry()
+            st.rerun()
+    
+    job_status()
+
+def render_timed_out_files(file_names):
+    """
+    Warn about uploads that were skipped because parsing took too long.
+    
+    Args:
+        file_names: Names of the skipped files, or None
+    """
+    for file_name in file_names or ():
+        st.warning(f"⚠️ Skipped {file_name}: processing took too long.")
+
+def render_failed_files(failures):
+    """
+    Warn about uploads that were skipped because they could not be parsed.
+    
+    Args:
+        failures: (file name, error message) tuples, or None
+    """
+    for file_name, error in failures or ():
+        st.warning(f"⚠️ Skipped {file_name}: it could not be read ({error}).")
 
 def render_answer(result):
     """
@@ -147,24 +247,99 @@ def render_answer(result):
     
     # Create a container with dark background for better text visibility
     with st.container():
-        st.markdown(f"""
-        <div class="answer-box">
-            <h4>🤖 AI Response:</h4>
-            <p><strong>{result["result"]}</strong></p>
-        </div>
-        """, unsafe_allow_html=True)
+        _render_answer_box(st, result["result"])
+    
+    _render_sources(result["source_documents"])
+    _render_context_stats(result)
+    _render_feedback()
+
+def render_streaming_answer(stream_result):
+    """
+    Render an answer token by token as it is generated, then its sources.
+    
+    Args:
+        stream_result: Result dictionary from QAChain.stream_answer
+    
+    Returns:
+        The complete answer text
+    """
+    st.markdown("## 🎯 Answer")
     
-    # Display sources in an expandable section
-    with st.expander(f"📚 View Sources ({len(result['source_documents'])} found)", expanded=False):
-        for i, doc in enumerate(result["source_documents"], 1):
+    answer_placeholder = st.empty()
+    answer = ""
+    for token in stream_result["result_stream"]:
+        answer += token
+        _render_answer_box(answer_placeholder, answer + "▌")
+    _render_answer_box(answer_placeholder, answer)
+    
+    st.success("✅ **Answer Found!**")
+    _render_sources(stream_result["source_documents"])
+    _render_context_stats(stream_result)
+    _render_feedback()
+    
+    return answer
+
+def render_query_timings(query_trace):
+    """
+    Show where the time went while answering the last question.
+    
+    Args:
+        query_trace: Trace summary from Trace.summary
+    """
+    with st.sidebar:
+        st.markdown("## ⏱️ Last Query")
+        st.metric("Total Time", f"{query_trace['seconds'] * 1000:,.0f} ms")
+        rows = []
+        for current in query_trace['spans']:
+            details = ", ".join(
+                f"{name.replace('_', ' ')} {value:,.3f}s" if isinstance(value, float)
+                else f"{name.replace('_', ' ')} {value:,}"
+                for name, value in current['attributes'].items()
+            )
+            rows.append({
+                'Stage': current['name'],
+                'ms': round(current['seconds'] * 1000, 1),
+                'Details': details
+            })
+        if rows:
+            st.dataframe(rows, hide_index=True, width="stretch")
+
+def _render_answer_box(container, answer):
+    """Render answer text inside the styled answer box."""
+    container.markdown(f"""
+    <div class="answer-box">
+        <h4>🤖 AI Response:</h4>
+        <p><strong>{answer}</strong></p>
+    </div>
+    """, unsafe_allow_html=True)
+
+def _render_sources(source_documents):
+    """Display sources in an expandable section."""
+    with st.expander(f"📚 View Sources ({len(source_documents)} found)", expanded=False):
+        for i, doc in enumerate(source_documents, 1):
             st.markdown(f"""
             <div class="source-box">
                 <h5>Source {i}:</h5>
                 <p>{doc.page_content[:400]}{'...' if len(doc.page_content) > 400 else ''}</p>     
             </div>
             """, unsafe_allow_html=True)
+
+def _render_context_stats(result):
+    """Show how much retrieved context was sent to the LLM."""
+    if result.get("cached"):
+        st.caption("⚡ Answered from cache, no LLM call needed.")
+    elif "context_stats" in result:
+        stats = result["context_stats"]
+        st.caption(f"📎 Sent {stats['chunks']} chunks (~{stats['tokens']:,} tokens) to the LLM.")
     
-    # Add feedback section
+    if result.get("stage_timings"):
+        timings = " · ".join(
+            f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in result["stage_timings"].items()
+        )
+        st.caption(f"⏱️ Retrieval stages: {timings}")
+
+def _render_feedback():
+    """Add feedback section."""
     st.markdown("## 💭 Feedback")
     col_feedback1, col_feedback2 = st.columns(2)
     
@@ -1,21 +1,34 @@
 import os
-from dotenv import load_dotenv
-import streamlit as st
-import os
-
-# Access the secret
-GOOGLE_API_KEY = st.secrets["GOOGLE_API_KEY"]
 
-# Optional: set as environment variable if your code expects it
-os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
+_environment_loaded = False
 
-# Load environment variables
-load_dotenv()
+def load_environment():
+    """
+    Load settings into the environment on first use, once per process.
+    
+    Variables already set win over a .env file. GOOGLE_API_KEY falls back
+    to Streamlit secrets, which headless tools such as ingest.py may not
+    have; Streamlit is only imported for that fallback.
+    """
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    if not os.getenv("GOOGLE_API_KEY"):
+        import streamlit as st
+        try:
+            os.environ["GOOGLE_API_KEY"] = st.secrets["GOOGLE_API_KEY"]
+        except (FileNotFoundError, KeyError):
+            pass
+    _environment_loaded = True
 
 class AppConfig:
     """Application configuration settings."""
     
     def __init__(self):
+        load_environment()
+        
         # API Keys
         self.GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
         if not self.GOOGLE_API_KEY:
@@ -25,6 +38,22 @@ class AppConfig:
         self.LLM_MODEL = "gemini-1.5-flash"
         self.DEFAULT_TEMPERATURE = 0.1
         self.MAX_TOKENS = 2048
+        self.STREAM_ANSWERS = True
+        
+        # Rerank Settings
+        self.RERANK_RESULTS = True
+        self.RERANK_OVERFETCH = 3
+        self.RERANK_DENSE_WEIGHT = 0.7
+        
+        # Context Assembly Settings
+        self.COMPRESS_CONTEXT = True
+        self.CONTEXT_DEDUP_THRESHOLD = 0.8
+        self.EXTRACT_RELEVANT_SENTENCES = False
+        
+        # Answer Cache Settings
+        self.ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95
+        self.ANSWER_CACHE_TTL_SECONDS = 3600
+        self.ANSWER_CACHE_MAX_ENTRIES = 256
         
         # Document Processing Settings
         self.DEFAULT_CHUNK_SIZE = 800
@@ -39,11 +68,29 @@ class AppConfig:
         
         # Session Settings
         self.SESSION_TIMEOUT_HOURS = 24
+        # Each session indexes uploads into its own collection, evicted after SESSION_TIMEOUT_HOURS idle
+        self.COLLECTION_SWEEP_INTERVAL_SECONDS = 600
         self.MAX_QUESTIONS_PER_SESSION = 100
         
         # Processing Settings
         self.MAX_CONCURRENT_UPLOADS = 5
         self.PROCESSING_TIMEOUT_SECONDS = 300
+        # Fewer or smaller uploads are parsed in-process, cheaper than reaching the pool
+        self.PARALLEL_PARSE_MIN_FILES = 3
+        self.PARALLEL_PARSE_MIN_MB = 2
+        
+        # Background Ingestion Settings
+        self.INGESTION_WORKERS = 2
+        self.MAX_FINISHED_INGESTION_JOBS = 64
+        self.INGESTION_POLL_SECONDS = 1.0
+        
+        # Instrumentation Settings
+        # Prometheus text file, e.g. for node_exporter's textfile collector; None disables it
+        self.METRICS_EXPORT_PATH = None
+        self.METRICS_EXPORT_INTERVAL_SECONDS = 15
+        # Port serving /metrics for Prometheus to scrape; None disables the endpoint
+        self.METRICS_PORT = None
+        self.SHOW_QUERY_TIMINGS = True
     
     def validate_config(self):
         """Validate configuration settings."""
@@ -69,7 +116,7 @@ class AppConfig:
         
         Args:
             temperature: Override default temperature
-            
+        
         Returns:
             Dictionary with LLM settings
         """
@@ -86,7 +133,7 @@ class AppConfig:
         Args:
             chunk_size: Override default chunk size
             chunk_overlap: Override default chunk overlap
-            
+        
         Returns:
             Dictionary with processing settings
         """
@@ -14,17 +14,66 @@ class DatabaseConfig:
         # Chroma database settings
         self.CHROMA_DB_PATH = str(self.VECTOR_DB_DIR / "chroma_db")
         self.EMBEDDING_MODEL = "models/gemini-embedding-001"
+        self.EMBEDDING_MAX_TOKENS = 2048
         
-        # Create directories if they don't exist
-        self._create_directories()
+        # Vector backend settings: "chroma" (HNSW), or a local NumPy index, "ivf" or "exact"
+        self.VECTOR_BACKEND = "chroma"
+        self.LOCAL_INDEX_DIR = self.VECTOR_DB_DIR / "local_index"
+        self.IVF_NLIST = 1024
+        self.IVF_NPROBE = 16
+        self.HNSW_M = 16
+        self.HNSW_CONSTRUCTION_EF = 100
+        self.HNSW_SEARCH_EF = 64
+        
+        # Vector quantization for the local backends: None (float32), "float16", "int8" or "pq"
+        self.VECTOR_QUANTIZATION = None
+        self.PQ_SUBSPACES = 64
+        self.QUANTIZATION_TRAIN_SIZE = 20000
+        self.QUANTIZATION_RERANK_FACTOR = 4
+        
+        # Local backend snapshots
+        self.SNAPSHOT_VERIFY_CHECKSUMS = False
+        self.SNAPSHOTS_TO_KEEP = 2
+        
+        # Bulk ingestion (ingest.py): manifest kept per collection, PDFs per batch,
+        # batches per checkpoint (each checkpoint publishes a local backend snapshot)
+        self.BULK_INGEST_MANIFEST = "bulk_ingest.json"
+        self.BULK_INGEST_FILES_PER_BATCH = 32
+        self.BULK_INGEST_CHECKPOINT_BATCHES = 8
+        
+        # Embedding cache settings
+        self.EMBEDDING_CACHE_PATH = str(self.VECTOR_DB_DIR / "embedding_cache.sqlite3")
+        self.EMBEDDING_CACHE_MAX_ENTRIES = 100000
+        
+        # Embedding request scheduling
+        self.EMBEDDING_BATCH_SIZE = 100
+        self.EMBEDDING_MAX_IN_FLIGHT = 4
+        self.EMBEDDING_REQUESTS_PER_MINUTE = 100
+        self.EMBEDDING_MAX_RETRIES = 5
         
         # Vector database settings
         self.COLLECTION_NAME = "document_collection"
+        self.SESSION_COLLECTION_PREFIX = "session-"
         self.SIMILARITY_THRESHOLD = 0.7
         self.MAX_RESULTS = 4
+        self.SCORE_DROP_RATIO = 0.25
+        self.MAX_CONTEXT_TOKENS = 3000
+        self.CHARS_PER_TOKEN = 4
+        
+        # Hybrid retrieval settings
+        self.HYBRID_SEARCH = True
+        self.HYBRID_FETCH_K = 20
+        self.RRF_K = 60
+        self.BM25_K1 = 1.2
+        self.BM25_B = 0.75
     
-    def _create_directories(self):
-        """Create necessary directories if they don't exist."""
+    def create_directories(self):
+        """
+        Create the data directories if they don't exist.
+        
+        Not done on construction, which happens on every rerun; the
+        embedding cache calls this once per process before opening its file.
+        """
         self.DATA_DIR.mkdir(exist_ok=True)
         self.VECTOR_DB_DIR.mkdir(exist_ok=True)
         self.UPLOADS_DIR.mkdir(exist_ok=True)
@@ -52,7 +101,7 @@ class DatabaseConfig:
         
         Args:
             filename: Name of the uploaded file
-            
+        
         Returns:
             Full path to the uploaded file
         """
@@ -67,10 +116,15 @@ class DatabaseConfig:
                 if file_path.is_file() and file_path.name != ".gitkeep":
                     file_path.unlink()
     
-    def reset_database(self):
-        """Reset the vector database by removing all data."""
-        import shutil
+    def reset_database(self, collection_name=None):
+        """
+        Reset one collection of the vector database by removing its data.
+        
+        Other collections, and sessions querying them, are not affected.
+        
+        Args:
+            collection_name: Collection to reset, COLLECTION_NAME if not given
+        """
+        from src.vector_store import VectorStore
         
-        if Path(self.CHROMA_DB_PATH).exists():
-            shutil.rmtree(self.CHROMA_DB_PATH)
-            Path(self.CHROMA_DB_PATH).mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+        VectorStore(collection_name=collection_name).delete_database()
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Bulk-ingest PDFs into the persistent vector database without the web UI.
+
+Parses, chunks and embeds a directory or glob of PDFs with the same
+pipeline the app uses, writing into the configured VECTOR_BACKEND under
+data/vector_db. Progress is checkpointed every few batches of files and
+on interruption, so rerunning the same command resumes an interrupted run
+and skips files that have not changed. The app attaches to the pre-built corpus on its next
+rerun and answers questions over it without any upload.
+
+Usage:
+    python ingest.py path/to/pdfs "archive/**/*.pdf" --workers 8
+"""
+try:
+    import pysqlite3
+    import sys
+    sys.modules["sqlite3"] = sys.modules.pop("pysqlite3")
+except ImportError:
+    import sqlite3
+
+import argparse
+import sys
+from config.app_config import AppConfig
+from config.db_config import DatabaseConfig
+from src.bulk_ingestion import BulkIngestion, find_pdfs
+from src.document_processor import DocumentProcessor
+from src.resources import get_metrics
+from src.vector_store import VectorStore
+
+def format_rates(stats):
+    elapsed = max(stats['elapsed_seconds'], 1e-9)
+    return (
+        f"{stats['pages'] / elapsed:,.1f} pages/s  "
+        f"{stats['chunks'] / elapsed:,.1f} chunks/s  "
+        f"{stats['embedded'] / elapsed:,.1f} embeddings/s"
+    )
+
+# Stages timed by the ingestion pipeline, in pipeline order
+INGESTION_STAGES = ("parse", "split", "embed", "embed_request", "upsert", "delete", "persist")
+
+def format_stage_times(metrics):
+    # Stages run concurrently, so their times overlap and can exceed the wall-clock time
+    parts = []
+    for stage in INGESTION_STAGES:
+        histogram = metrics.get_histogram("stage_duration_seconds", stage=stage)
+        if histogram is not None:
+            parts.append(f"{stage} {histogram.sum:,.1f}s/{histogram.count:,}")
+    return "  ".join(parts)
+
+def report_progress(stats):
+    print(
+        f"[{stats['skipped_files'] + stats['ingested_files']}/{stats['files']} files] "
+        f"{stats['pages']:,} pages  {stats['chunks']:,} chunks  {stats['embedded']:,} embedded  "
+        f"{format_rates(stats)}",
+        flush=True
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Chunk size in characters (default: DEFAULT_CHUNK_SIZE)")
+    parser.add_argument("--chunk-overlap", type=int, default=None,
+                        help="Chunk overlap in characters (default: DEFAULT_CHUNK_OVERLAP)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="PDF parsing processes (default: MAX_CONCURRENT_UPLOADS)")
+    parser.add_argument("--batch-files", type=int, default=None,
+                        help="PDFs per batch (default: BULK_INGEST_FILES_PER_BATCH)")
+    parser.add_argument("--checkpoint-batches", type=int, default=None,
+                        help="Batches per checkpoint (default: BULK_INGEST_CHECKPOINT_BATCHES)")
+    parser.add_argument("--collection", default=None,
+                        help="Collection to ingest into (default: COLLECTION_NAME, which the app serves)")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Write stage timings and counters to this file in the Prometheus text format")
+    args = parser.parse_args()
+    
+    app_config = AppConfig()
+    db_config = DatabaseConfig()
+    paths = find_pdfs(args.paths)
+    if not paths:
+        print("No PDF files found.", file=sys.stderr)
+        return 1
+    
+    doc_processor = DocumentProcessor()
+    if args.workers is not None:
+        doc_processor.config.MAX_CONCURRENT_UPLOADS = args.workers
+    vector_store = VectorStore(collection_name=args.collection)
+    ingestion = BulkIngestion(
+        doc_processor, vector_store,
+        chunk_size=args.chunk_size or app_config.DEFAULT_CHUNK_SIZE,
+        chunk_overlap=(
+            args.chunk_overlap if args.chunk_overlap is not None
+            else app_config.DEFAULT_CHUNK_OVERLAP
+        ),
+        files_per_batch=args.batch_files or db_config.BULK_INGEST_FILES_PER_BATCH,
+        checkpoint_batches=args.checkpoint_batches or db_config.BULK_INGEST_CHECKPOINT_BATCHES
+    )
+    
+    print(
+        f"Ingesting {len(paths):,} PDFs into collection {vector_store.collection_name} "
+        f"at {vector_store.get_database_path()}",
+        flush=True
+    )
+    try:
+        stats = ingestion.run(paths, progress_callback=report_progress)
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume.", file=sys.stderr)
+        return 130
+    
+    cache_stats = vector_store.get_embedding_cache_stats()
+    print(
+        f"Ingested {stats['ingested_files']:,} files ({stats['skipped_files']:,} unchanged) "
+        f"in {stats['elapsed_seconds']:.1f}s: {stats['pages']:,} pages, {stats['chunks']:,} chunks, "
+        f"{stats['embedded']:,} embedded, {stats['deleted']:,} stale chunks deleted"
+    )
+    for path in stats['timed_out_files']:
+        print(f"Skipped {path}: parsing timed out; the next run retries it", file=sys.stderr)
+    for path, error in stats['failed_files']:
+        print(f"Skipped {path}: could not parse it ({error}); the next run retries it", file=sys.stderr)
+    print(f"Throughput: {format_rates(stats)}")
+    print(f"Embedding cache hit rate: {cache_stats['hit_rate']:.1%}")
+    print(f"Stage time (total/calls): {format_stage_times(get_metrics())}")
+    if args.metrics_file:
+        get_metrics().write(args.metrics_file)
+        print(f"Metrics written to {args.metrics_file}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,23 +6,15 @@ except ImportError:
     import sqlite3
 
 
-from dotenv import load_dotenv
 import streamlit as st
-import os
-
-GOOGLE_API_KEY = st.secrets["GOOGLE_API_KEY"]
-os.environ['GOOGLE_API_KEY'] = GOOGLE_API_KEY
-
+import uuid
 from datetime import datetime
 
-from src.document_processor import DocumentProcessor
-from src.vector_store import VectorStore
-from src.qa_chain import QAChain
 from components.styling import apply_custom_css
 from components.ui_helpers import (
     render_header, render_sidebar, render_upload_section,
-    render_question_section, render_stats, render_answer,
-    render_footer
+    render_question_section, render_search_scope, render_stats, render_ingestion_job,
+    render_answer, render_streaming_answer, render_query_timings, render_footer
 )
 from config.app_config import AppConfig
 import asyncio
@@ -43,6 +35,30 @@ st.set_page_config(
 # Apply custom styling
 apply_custom_css()
 
+# Render header
+render_header()
+
+# Render sidebar
+chunk_size, chunk_overlap, temperature = render_sidebar()
+
+# Main content area
+col1, col2 = st.columns([1, 2])
+
+with col1:
+    uploaded_files = render_upload_section()
+
+# The page shell and upload widget are on screen before the slow imports below,
+# which only cost time on a cold worker; later reruns find them already loaded
+from src.document_processor import DocumentProcessor
+from src.vector_store import VectorStore
+from src.qa_chain import QAChain
+from src.ingestion_cache import IngestionCache
+from src.ingestion_pipeline import IngestionPipeline
+from src.ingestion_jobs import IngestionJob
+from src.resources import get_ingestion_jobs, get_metrics_exporter
+from src.instrumentation import trace
+from src.answer_cache import AnswerCache
+
 # Initialize session state
 if 'session_stats' not in st.session_state:
     st.session_state.session_stats = {
@@ -51,64 +67,189 @@ if 'session_stats' not in st.session_state:
         'session_start': datetime.now()
     }
 
-# Initialize components
-doc_processor = DocumentProcessor()
-vector_store = VectorStore()
-qa_chain = QAChain()
+if 'ingestion_cache' not in st.session_state:
+    st.session_state.ingestion_cache = IngestionCache()
+ingestion_cache = st.session_state.ingestion_cache
 
-# Render header
-render_header()
+app_config = AppConfig()
 
-# Render sidebar
-chunk_size, chunk_overlap, temperature = render_sidebar()
+if 'answer_cache' not in st.session_state:
+    st.session_state.answer_cache = AnswerCache(
+        similarity_threshold=app_config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds=app_config.ANSWER_CACHE_TTL_SECONDS,
+        max_entries=app_config.ANSWER_CACHE_MAX_ENTRIES
+    )
 
-# Main content area
-col1, col2 = st.columns([1, 2])
+# Initialize components
+doc_processor = DocumentProcessor()
+# The corpus pre-built with ingest.py is shared; uploads go into this session's own collection
+corpus_store = VectorStore()
+if 'collection_name' not in st.session_state:
+    st.session_state.collection_name = (
+        corpus_store.db_config.SESSION_COLLECTION_PREFIX + uuid.uuid4().hex
+    )
+vector_store = VectorStore(collection_name=st.session_state.collection_name)
+if not vector_store.touch():
+    # New session, or its collection was evicted while idle: cached databases are stale
+    ingestion_cache.clear()
+    st.session_state.pop('ingestion_jobs', None)
+vector_store.evict_idle_collections()
+qa_chain = QAChain(answer_cache=st.session_state.answer_cache)
+ingestion_jobs = get_ingestion_jobs()
+get_metrics_exporter()
+
+# A corpus pre-built with ingest.py can be queried without uploading anything
+bulk_corpus = corpus_store.get_bulk_corpus()
 
-with col1:
-    uploaded_files = render_upload_section()
+if uploaded_files:
+    file_hashes = [doc_processor.get_file_hash(f) for f in uploaded_files]
+    corpus_files = [
+        (uploaded_file.name, file_hash)
+        for uploaded_file, file_hash in zip(uploaded_files, file_hashes)
+    ]
+else:
+    corpus_files = [(entry['file_name'], entry['file_hash']) for entry in bulk_corpus.values()]
 
 with col2:
-    query, ask_button, clear_button = render_question_section(uploaded_files)
+    query, ask_button, clear_button = render_question_section(corpus_files)
+    if corpus_files:
+        selected_files, page_range = render_search_scope(
+            list(dict.fromkeys(file_name for file_name, _ in corpus_files))
+        )
 
 # Process documents
-all_docs = []
-
-if uploaded_files:
-    # Process uploaded files
-    all_docs = doc_processor.process_files(uploaded_files)
-    
-    # Update session stats
-    st.session_state.session_stats['documents_processed'] = len(uploaded_files)
+if corpus_files:
+    partial = False
+    if uploaded_files:
+        # Update session stats
+        st.session_state.session_stats['documents_processed'] = len(uploaded_files)
+        
+        # Build vector database in the background, reusing cached results for an unchanged corpus
+        corpus_key = ingestion_cache.corpus_key(file_hashes, chunk_size, chunk_overlap)
+        db = ingestion_cache.get_database(corpus_key)
+        document_stats = ingestion_cache.get_document_stats(corpus_key)
+        if db is None:
+            # Reruns reattach to this session's job for the corpus instead of starting over
+            job_ids = st.session_state.setdefault('ingestion_jobs', {})
+            job = ingestion_jobs.get(job_ids.get(corpus_key))
+            if job is None:
+                # Keyed by this session's collection: jobs are never shared between sessions
+                job = ingestion_jobs.submit(
+                    (vector_store.collection_name, corpus_key),
+                    IngestionPipeline(
+                        doc_processor, vector_store, chunk_size, chunk_overlap,
+                        cache=ingestion_cache
+                    ),
+                    uploaded_files, file_hashes,
+                    db=vector_store.open_database(),
+                    description=f"{len(uploaded_files)} PDFs"
+                )
+                job_ids[corpus_key] = job.id
+            
+            document_stats = job.progress()
+            if job.state == IngestionJob.READY:
+                db = job.db
+                ingestion_cache.put_database(corpus_key, db, job.pipeline.get_stats())
+            else:
+                render_ingestion_job(
+                    job, app_config.INGESTION_POLL_SECONDS,
+                    on_retry=lambda: job_ids.pop(corpus_key, None)
+                )
+                if job.is_queryable:
+                    # Search what is indexed so far while the rest is embedded
+                    db = job.db
+                    partial = True
+    else:
+        # Attach to the pre-built corpus; a newer one from ingest.py changes the key
+        corpus_key = ingestion_cache.corpus_key(
+            [file_hash for _, file_hash in corpus_files], None, None
+        )
+        db = ingestion_cache.get_database(corpus_key)
+        if db is None:
+            db = corpus_store.open_database()
+            total_pages = sum(entry['pages'] for entry in bulk_corpus.values())
+            total_characters = sum(entry['characters'] for entry in bulk_corpus.values())
+            ingestion_cache.put_database(corpus_key, db, {
+                'total_pages': total_pages,
+                'total_characters': total_characters,
+                'avg_page_length': total_characters // total_pages if total_pages > 0 else 0
+            })
+        document_stats = ingestion_cache.get_document_stats(corpus_key)
     
     # Render statistics
-    render_stats(uploaded_files, all_docs)
+    render_stats(corpus_files, document_stats)
     
-    # Build vector database
-    with st.spinner('🧠 Building knowledge base...'):
-        documents = doc_processor.split_documents(all_docs, chunk_size, chunk_overlap)
-        db = vector_store.create_database(documents)
-        qa_chain_instance = qa_chain.create_chain(db, temperature)
+    # Only search this session's files, optionally narrowed from the UI;
+    # the whole pre-built corpus is searched unless files are selected
+    if uploaded_files or selected_files is not None:
+        scope_hashes = tuple(
+            file_hash for file_name, file_hash in corpus_files
+            if selected_files is None or file_name in selected_files
+        )
+    else:
+        scope_hashes = None
+    if page_range is not None:
+        page_range = (page_range[0] - 1, page_range[1] - 1)
+    active_store = vector_store if uploaded_files else corpus_store
+    chain_key = (temperature, scope_hashes, page_range)
     
-    st.success("✅ Documents processed successfully! You can now ask questions.")
+    if db is None:
+        st.info("⏳ You can ask questions as soon as the first chunks are indexed.")
+    elif partial:
+        # The corpus is still growing, so neither the chain nor its answers are cached
+        qa_chain_instance = qa_chain.create_chain(
+            db, temperature,
+            retriever=active_store.get_retriever(
+                db, file_hashes=scope_hashes, page_range=page_range
+            )
+        )
+        st.info("⏳ Answers use the chunks indexed so far while the rest are processed.")
+    else:
+        qa_chain_instance = ingestion_cache.get_chain(corpus_key, chain_key)
+        if qa_chain_instance is None:
+            qa_chain_instance = qa_chain.create_chain(
+                db, temperature,
+                corpus_fingerprint=IngestionCache.fingerprint((corpus_key, chain_key)),
+                retriever=active_store.get_retriever(
+                    db, file_hashes=scope_hashes, page_range=page_range
+                )
+            )
+            ingestion_cache.put_chain(corpus_key, chain_key, qa_chain_instance)
+        
+        st.success("✅ Documents processed successfully! You can now ask questions.")
     
     # Handle question answering
-    if query and (ask_button or query):
+    if db is not None and query and (ask_button or query):
         st.session_state.session_stats['questions_asked'] += 1
         
-        with st.spinner('🤔 Thinking...'):
-            try:
-                result = qa_chain_instance.invoke({"query": query})
-                render_answer(result)
-                
-            except Exception as e:
-                st.error(f"❌ An error occurred: {str(e)}")
-                st.info("Please try rephrasing your question or check your documents.")
-
+        try:
+            # The trace spans retrieval through the last streamed token
+            with trace('query') as query_trace:
+                if app_config.STREAM_ANSWERS:
+                    with st.spinner('🤔 Thinking...'):
+                        stream_result = qa_chain.stream_answer(qa_chain_instance, query)
+                    render_streaming_answer(stream_result)
+                else:
+                    with st.spinner('🤔 Thinking...'):
+                        result = qa_chain.get_answer(qa_chain_instance, query)
+                    render_answer(result)
+            st.session_state.last_query_trace = query_trace.summary()
+        
+        except Exception as e:
+            st.error(f"❌ An error occurred: {str(e)}")
+            st.info("Please try rephrasing your question or check your documents.")
+    
     # Clear functionality
     if clear_button:
+        # Stop this session's ingestion and drop its collection; the shared corpus stays
+        for job_id in st.session_state.get('ingestion_jobs', {}).values():
+            ingestion_jobs.cancel(job_id)
+        vector_store.delete_database()
         st.session_state.clear()
         st.rerun()
 
+if app_config.SHOW_QUERY_TIMINGS and 'last_query_trace' in st.session_state:
+    render_query_timings(st.session_state.last_query_trace)
+
 # Render footer
 render_footer()
\ No newline at end of file
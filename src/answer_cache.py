@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+class AnswerCache:
+    """LRU answer cache with exact and near-duplicate question matching."""
+    
+    def __init__(self, similarity_threshold=0.95, ttl_seconds=3600, max_entries=256):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def lookup(self, scope, question, query_embedding):
+        """
+        Find a cached answer for a question.
+        
+        Args:
+            scope: Tuple of (corpus fingerprint, LLM model, temperature)
+            question: User question
+            query_embedding: Embedding vector of the question
+        
+        Returns:
+            Cached result dictionary, or None on a miss
+        """
+        key = (scope, self._normalize(question))
+        with self._lock:
+            self._expire()
+            
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry['result']
+            
+            candidates = [
+                (entry_key, entry) for entry_key, entry in self._entries.items()
+                if entry_key[0] == scope
+            ]
+            if candidates:
+                matrix = np.stack([entry['embedding'] for _, entry in candidates])
+                scores = matrix @ self._unit(query_embedding)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    best_key, best_entry = candidates[best]
+                    self._entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return best_entry['result']
+            
+            self.misses += 1
+            return None
+    
+    def store(self, scope, question, query_embedding, result):
+        """
+        Cache the answer to a question.
+        
+        Args:
+            scope: Tuple of (corpus fingerprint, LLM model, temperature)
+            question: User question
+            query_embedding: Embedding vector of the question
+            result: Result dictionary with 'result' and 'source_documents'
+        """
+        key = (scope, self._normalize(question))
+        with self._lock:
+            self._entries[key] = {
+                'embedding': self._unit(query_embedding),
+                'result': result,
+                'created': time.monotonic()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_stats(self):
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with exact and semantic hits, misses, hit rate and size
+        """
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                'exact_hits': self.exact_hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups > 0 else 0.0,
+                'entries': len(self._entries)
+            }
+    
+    def clear(self):
+        """Drop every cached answer."""
+        with self._lock:
+            self._entries.clear()
+    
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry['created'] < cutoff]
+        for key in expired:
+            del self._entries[key]
+    
+    def _normalize(self, question):
+        return " ".join(question.lower().split())
+    
+    def _unit(self, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
@@ -0,0 +1,197 @@
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./:][a-z0-9]+)*")
+TOKEN_SEPARATORS = re.compile(r"[-_./:]")
+
+def tokenize(text):
+    """
+    Split text into lowercase search terms.
+    
+    Identifiers such as part numbers ("XJ-4410") or clause IDs ("12.3.4")
+    are kept whole and also indexed by their parts.
+    
+    Args:
+        text: Text to tokenize
+    
+    Returns:
+        List of terms
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(match)
+        if TOKEN_SEPARATORS.search(match):
+            tokens.extend(TOKEN_SEPARATORS.split(match))
+    return tokens
+
+class BM25Index:
+    """Incrementally updated BM25 inverted index with array-backed postings."""
+    
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._ids = []
+        self._docnos = {}
+        self._lengths = array("I")
+        self._live = bytearray()
+        self._file_codes = {}
+        self._doc_files = array("I")
+        self._doc_pages = array("I")
+        self._postings = {}
+        self._live_count = 0
+        self._total_length = 0
+    
+    def __len__(self):
+        return self._live_count
+    
+    def add(self, ids, texts, metadatas=None):
+        """
+        Index chunk texts, replacing any already indexed under the same ID.
+        
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts matching ids
+            metadatas: Optional chunk metadata; file_hash and page are kept
+                so searches can be filtered by them
+        """
+        if metadatas is None:
+            metadatas = [{}] * len(ids)
+        
+        with self._lock:
+            self._remove(ids)
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                docno = len(self._ids)
+                file_hash = (metadata or {}).get('file_hash', '')
+                file_code = self._file_codes.setdefault(file_hash, len(self._file_codes))
+                terms = Counter(tokenize(text))
+                length = sum(terms.values())
+                
+                self._ids.append(chunk_id)
+                self._docnos[chunk_id] = docno
+                self._lengths.append(length)
+                self._live.append(1)
+                self._doc_files.append(file_code)
+                self._doc_pages.append((metadata or {}).get('page', 0))
+                self._live_count += 1
+                self._total_length += length
+                
+                for term, count in terms.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = (array("I"), array("I"))
+                        self._postings[term] = postings
+                    postings[0].append(docno)
+                    postings[1].append(count)
+    
+    def remove(self, ids):
+        """
+        Remove documents from the index.
+        
+        Removed entries are tombstoned and physically dropped once they
+        outnumber live documents.
+        
+        Args:
+            ids: Chunk IDs to remove
+        """
+        with self._lock:
+            self._remove(ids)
+            if len(self._ids) - self._live_count > max(self._live_count, 1024):
+                self._compact()
+    
+    def search(self, query, k=4, file_hashes=None, page_range=None):
+        """
+        Find the chunks that best match a query.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            file_hashes: Optional source file hashes to restrict the search to
+            page_range: Optional inclusive (first, last) page numbers to restrict to
+        
+        Returns:
+            List of (chunk ID, score) tuples, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or self._live_count == 0:
+                return []
+            scores = self._score(terms)
+            self._apply_filter(scores, file_hashes, page_range)
+            top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[docno], float(scores[docno])) for docno in top if scores[docno] > 0]
+    
+    def _score(self, terms):
+        """Score every document for the given terms. Call with the lock held."""
+        scores = np.zeros(len(self._ids), dtype=np.float32)
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+        live = np.frombuffer(self._live, dtype=np.uint8)
+        avg_length = self._total_length / self._live_count
+        
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            docnos = np.frombuffer(postings[0], dtype=np.uint32)
+            tfs = np.frombuffer(postings[1], dtype=np.uint32).astype(np.float32)
+            
+            doc_freq = int(np.count_nonzero(live[docnos]))
+            if doc_freq == 0:
+                continue
+            idf = math.log(1 + (self._live_count - doc_freq + 0.5) / (doc_freq + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[docnos] / avg_length)
+            np.add.at(scores, docnos, idf * tfs * (self.k1 + 1) / (tfs + norm))
+        
+        scores *= live
+        return scores
+    
+    def _apply_filter(self, scores, file_hashes, page_range):
+        """Zero the scores of documents outside the filter. Call with the lock held."""
+        if file_hashes is not None:
+            codes = [self._file_codes[h] for h in file_hashes if h in self._file_codes]
+            doc_files = np.frombuffer(self._doc_files, dtype=np.uint32)
+            scores *= np.isin(doc_files, codes)
+        
+        if page_range is not None:
+            doc_pages = np.frombuffer(self._doc_pages, dtype=np.uint32)
+            scores *= (doc_pages >= page_range[0]) & (doc_pages <= page_range[1])
+    
+    def _remove(self, ids):
+        for chunk_id in ids:
+            docno = self._docnos.pop(chunk_id, None)
+            if docno is None:
+                continue
+            self._live[docno] = 0
+            self._live_count -= 1
+            self._total_length -= self._lengths[docno]
+    
+    def _compact(self):
+        """Drop tombstoned documents and renumber the rest."""
+        live = np.frombuffer(self._live, dtype=np.uint8).astype(bool)
+        remap = np.cumsum(live, dtype=np.int64) - 1
+        
+        postings = {}
+        for term, (docnos, tfs) in self._postings.items():
+            docnos = np.frombuffer(docnos, dtype=np.uint32)
+            keep = live[docnos]
+            if keep.any():
+                postings[term] = (
+                    array("I", remap[docnos[keep]].astype(np.uint32).tobytes()),
+                    array("I", np.frombuffer(tfs, dtype=np.uint32)[keep].tobytes())
+                )
+        
+        lengths = np.frombuffer(self._lengths, dtype=np.uint32)[live]
+        doc_files = np.frombuffer(self._doc_files, dtype=np.uint32)[live]
+        doc_pages = np.frombuffer(self._doc_pages, dtype=np.uint32)[live]
+        self._ids = [chunk_id for chunk_id, alive in zip(self._ids, live) if alive]
+        self._docnos = {chunk_id: docno for docno, chunk_id in enumerate(self._ids)}
+        self._lengths = array("I", lengths.tobytes())
+        self._doc_files = array("I", doc_files.tobytes())
+        self._doc_pages = array("I", doc_pages.tobytes())
+        self._live = bytearray(b"\x01" * len(self._ids))
+        self._postings = postings
@@ -0,0 +1,256 @@
+import glob
+import io
+import json
+import os
+import time
+from collections import Counter
+from src.ingestion_cache import IngestionCache
+from src.ingestion_pipeline import IngestionPipeline
+from src.instrumentation import span
+
+MANIFEST_FORMAT_VERSION = 1
+
+class LocalPDF(io.BytesIO):
+    """A PDF read from disk, offering the calls the pipeline makes on Streamlit uploads."""
+    
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            super().__init__(f.read())
+        self.path = path
+        self.name = os.path.basename(path)
+
+class BulkIngestion:
+    """Ingests a directory of PDFs into the persistent vector database in resumable batches."""
+    
+    def __init__(self, doc_processor, vector_store, chunk_size=800, chunk_overlap=50,
+                 files_per_batch=32, manifest_path=None, checkpoint_batches=8):
+        self.doc_processor = doc_processor
+        self.vector_store = vector_store
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.files_per_batch = files_per_batch
+        self.checkpoint_batches = checkpoint_batches
+        if manifest_path is None:
+            manifest_path = vector_store.get_bulk_manifest_path()
+        self.manifest_path = manifest_path
+        self.stats = self._empty_stats()
+    
+    def run(self, paths, progress_callback=None):
+        """
+        Ingest PDFs, skipping those already ingested by an earlier run.
+        
+        Files go through IngestionPipeline files_per_batch at a time, so
+        parsing (in a process pool), splitting, embedding and upserting
+        overlap while only one batch of PDFs is held in memory. Every
+        checkpoint_batches batches, at the end and when the run is
+        interrupted, the database is persisted and then the manifest records
+        the files ingested so far. An interrupted run resumes after the last
+        checkpoint, and chunks already persisted are not embedded again.
+        Files that time out or fail while parsing are left out of the
+        manifest, so the next run retries them, and the rest of their batch
+        goes ahead. The indexed chunk IDs are read once and kept up to date,
+        so batches never rescan the whole collection.
+        
+        Args:
+            paths: PDF file paths
+            progress_callback: Optional callable receiving the stats after each batch
+        
+        Returns:
+            Dictionary of file, page, chunk and embedding counts and elapsed seconds
+        """
+        manifest = read_manifest(self.manifest_path)
+        if manifest is None:
+            manifest = {'format_version': MANIFEST_FORMAT_VERSION, 'files': {}}
+        done = manifest['files']
+        
+        pending = []
+        for path in paths:
+            stat = os.stat(path)
+            if not self._is_current(done.get(path), stat):
+                pending.append((path, stat))
+        
+        self.stats = self._empty_stats()
+        self.stats['files'] = len(paths)
+        self.stats['skipped_files'] = len(paths) - len(pending)
+        started = time.perf_counter()
+        
+        db = self.vector_store.open_database()
+        indexed_ids = self.vector_store.get_indexed_ids_by_file(db)
+        # Paths per file version, so a replaced version is deleted only once nothing uses it
+        referenced = Counter(entry['file_hash'] for entry in done.values())
+        # Pages and characters per file are read back from the pipeline's cache
+        cache = IngestionCache(max_files=self.files_per_batch)
+        pipeline = IngestionPipeline(
+            self.doc_processor, self.vector_store, self.chunk_size, self.chunk_overlap,
+            cache=cache
+        )
+        
+        unsaved_batches = 0
+        try:
+            for start in range(0, len(pending), self.files_per_batch):
+                batch = pending[start:start + self.files_per_batch]
+                pdfs = [LocalPDF(path) for path, _ in batch]
+                file_hashes = [self.doc_processor.get_file_hash(pdf) for pdf in pdfs]
+                
+                # Only stale chunks of this batch's files are pruned, never the rest of the corpus
+                unsaved_batches += 1
+                pipeline.run(
+                    pdfs, file_hashes, db=db, prune_other_files=False,
+                    indexed_ids=indexed_ids, persist=False
+                )
+                
+                # Matched on content hash, since files in different folders can share a name
+                pipeline_stats = pipeline.get_stats()
+                timed_out = set(pipeline_stats['timed_out_hashes'])
+                failed = {
+                    file_hash: error for file_hash, (_, error)
+                    in zip(pipeline_stats['failed_hashes'], pipeline_stats['failed_files'])
+                }
+                replaced = set()
+                for (path, stat), pdf, file_hash in zip(batch, pdfs, file_hashes):
+                    if file_hash in timed_out:
+                        self.stats['timed_out_files'].append(path)
+                        continue
+                    if file_hash in failed:
+                        self.stats['failed_files'].append((path, failed[file_hash]))
+                        continue
+                    if path in done:
+                        referenced[done[path]['file_hash']] -= 1
+                        replaced.add(done[path]['file_hash'])
+                    referenced[file_hash] += 1
+                    file_stats = cache.get_file_stats(file_hash) or {
+                        'total_pages': 0, 'total_characters': 0
+                    }
+                    done[path] = {
+                        'file_hash': file_hash,
+                        'file_name': pdf.name,
+                        'size': stat.st_size,
+                        'mtime_ns': stat.st_mtime_ns,
+                        'chunk_size': self.chunk_size,
+                        'chunk_overlap': self.chunk_overlap,
+                        'pages': file_stats['total_pages'],
+                        'characters': file_stats['total_characters']
+                    }
+                    self.stats['ingested_files'] += 1
+                unused = [file_hash for file_hash in replaced if referenced[file_hash] <= 0]
+                self._delete_replaced(db, indexed_ids, unused)
+                cache.clear()
+                
+                self.stats['pages'] += pipeline_stats['total_pages']
+                self.stats['chunks'] += pipeline_stats['chunks']
+                self.stats['embedded'] += pipeline_stats['embedded']
+                self.stats['upserted'] += pipeline_stats['upserted']
+                self.stats['deleted'] += pipeline_stats['deleted']
+                self.stats['elapsed_seconds'] = time.perf_counter() - started
+                
+                if unsaved_batches >= self.checkpoint_batches:
+                    self._checkpoint(db, manifest)
+                    unsaved_batches = 0
+                if progress_callback is not None:
+                    progress_callback(dict(self.stats))
+        finally:
+            if unsaved_batches:
+                self._checkpoint(db, manifest)
+        
+        self.stats['elapsed_seconds'] = time.perf_counter() - started
+        return dict(self.stats)
+    
+    def _checkpoint(self, db, manifest):
+        """Persist the database, then record in the manifest the files it now holds."""
+        with span('persist'):
+            db.persist()
+        write_manifest(self.manifest_path, manifest)
+    
+    def _is_current(self, entry, stat):
+        """Whether a manifest entry still describes the file on disk and the chunking settings."""
+        return (
+            entry is not None
+            and entry['size'] == stat.st_size
+            and entry['mtime_ns'] == stat.st_mtime_ns
+            and entry['chunk_size'] == self.chunk_size
+            and entry['chunk_overlap'] == self.chunk_overlap
+        )
+    
+    def _delete_replaced(self, db, indexed_ids, file_hashes):
+        """Delete the chunks of file versions that were overwritten on disk."""
+        stale_ids = [
+            chunk_id for file_hash in file_hashes for chunk_id in indexed_ids.pop(file_hash, ())
+        ]
+        if stale_ids:
+            self.vector_store.delete_documents(db, stale_ids, persist=False)
+            self.stats['deleted'] += len(stale_ids)
+    
+    def _empty_stats(self):
+        return {
+            'files': 0,
+            'skipped_files': 0,
+            'ingested_files': 0,
+            'pages': 0,
+            'chunks': 0,
+            'embedded': 0,
+            'upserted': 0,
+            'deleted': 0,
+            'timed_out_files': [],
+            'failed_files': [],
+            'elapsed_seconds': 0.0
+        }
+
+def find_pdfs(patterns):
+    """
+    Expand directories and glob patterns into PDF paths.
+    
+    Args:
+        patterns: Directories (searched recursively), file paths or glob patterns
+    
+    Returns:
+        Sorted list of unique absolute PDF paths
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*")
+        for path in glob.glob(pattern, recursive=True):
+            if path.lower().endswith(".pdf") and os.path.isfile(path):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+def read_manifest(path):
+    """
+    Read a bulk ingestion manifest.
+    
+    Args:
+        path: Manifest file path
+    
+    Returns:
+        Manifest dictionary, or None if there is none
+    
+    Raises:
+        ValueError: If the manifest has an unsupported format version
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get('format_version') != MANIFEST_FORMAT_VERSION:
+        raise ValueError(
+            f"Bulk ingestion manifest {path} has format version "
+            f"{manifest.get('format_version')}, expected {MANIFEST_FORMAT_VERSION}"
+        )
+    return manifest
+
+def write_manifest(path, manifest):
+    """
+    Replace a bulk ingestion manifest atomically.
+    
+    Args:
+        path: Manifest file path
+        manifest: Manifest dictionary
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,99 @@
+import uuid
+from langchain_community.vectorstores import Chroma
+from src.rwlock import ReadWriteLock
+
+class ChromaBackend(Chroma):
+    """
+    Chroma collection exposing the calls shared by every vector backend.
+    
+    Searches and reads share a reader/writer lock; writes and dropping the
+    collection take it exclusively. Embedding happens before either is
+    taken, so no one waits on the embedding API while holding the lock.
+    Pass the same lock to every instance opened on a collection so that
+    they coordinate.
+    """
+    
+    def __init__(self, *args, lock=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = lock if lock is not None else ReadWriteLock()
+    
+    def upsert(self, ids, embeddings, documents, metadatas):
+        """
+        Insert or overwrite chunks whose embeddings were computed ahead of time.
+        
+        Args:
+            ids: Chunk IDs
+            embeddings: Embedding vectors matching ids
+            documents: Chunk texts matching ids
+            metadatas: Chunk metadata matching ids
+        """
+        with self.lock.write():
+            self._collection.upsert(
+                ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+            )
+    
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        """
+        Embed and store texts, computing the embeddings before taking the write lock.
+        
+        Args:
+            texts: Texts to add
+            metadatas: Optional metadata per text
+            ids: Optional IDs per text; existing IDs are overwritten
+        
+        Returns:
+            List of IDs of the added texts
+        """
+        texts = list(texts)
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        if metadatas is None:
+            metadatas = [None] * len(texts)
+        # Chroma rejects empty metadata dicts but accepts None
+        metadatas = [metadata or None for metadata in metadatas]
+        self.upsert(ids, self._embedding_function.embed_documents(texts), texts, metadatas)
+        return list(ids)
+    
+    def delete(self, ids=None, **kwargs):
+        with self.lock.write():
+            return super().delete(ids=ids, **kwargs)
+    
+    def get(self, *args, **kwargs):
+        with self.lock.read():
+            return super().get(*args, **kwargs)
+    
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        """
+        Find the chunks most similar to a query with their distances.
+        
+        The query is embedded before taking the read lock, so writers only
+        wait for the search itself.
+        
+        Args:
+            query: Search query
+            k: Number of results
+            filter: Optional metadata filter
+        
+        Returns:
+            List of (document, distance) tuples, best first
+        """
+        return self.similarity_search_by_vector_with_relevance_scores(
+            self._embedding_function.embed_query(query), k, filter=filter, **kwargs
+        )
+    
+    def similarity_search_by_vector_with_relevance_scores(self, *args, **kwargs):
+        with self.lock.read():
+            return super().similarity_search_by_vector_with_relevance_scores(*args, **kwargs)
+    
+    def persist(self):
+        """Chroma writes through to disk, so there is nothing to flush."""
+    
+    def drop(self):
+        """Delete the collection, waiting for searches in progress to finish."""
+        from chromadb.errors import NotFoundError
+        
+        with self.lock.write():
+            try:
+                self.delete_collection()
+            except NotFoundError:
+                pass
@@ -0,0 +1,70 @@
+import threading
+import time
+
+class CollectionRegistry:
+    """Tracks when each session collection was last used, to evict idle ones."""
+    
+    def __init__(self, idle_seconds, sweep_interval_seconds=600):
+        self.idle_seconds = idle_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._last_used = {}
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+    
+    def touch(self, name):
+        """
+        Record that a collection is in use.
+        
+        Args:
+            name: Collection name
+        
+        Returns:
+            False if the collection was not tracked: it is new, or it was
+            evicted since it was last touched
+        """
+        with self._lock:
+            known = name in self._last_used
+            self._last_used[name] = time.time()
+            return known
+    
+    def is_idle(self, name):
+        """
+        Whether a collection has gone unused for idle_seconds.
+        
+        A collection first seen here, e.g. one left on disk by a session of
+        an earlier process, counts as used now, so it is evicted one idle
+        period later unless some session claims it.
+        
+        Args:
+            name: Collection name
+        
+        Returns:
+            True if the collection may be evicted
+        """
+        with self._lock:
+            last_used = self._last_used.setdefault(name, time.time())
+            return time.time() - last_used > self.idle_seconds
+    
+    def sweep_due(self):
+        """
+        Start a sweep if none ran in the last sweep_interval_seconds.
+        
+        Returns:
+            True if the caller should sweep now
+        """
+        with self._lock:
+            now = time.time()
+            if now - self._last_sweep < self.sweep_interval_seconds:
+                return False
+            self._last_sweep = now
+            return True
+    
+    def forget(self, name):
+        """
+        Stop tracking a collection after it was dropped.
+        
+        Args:
+            name: Collection name
+        """
+        with self._lock:
+            self._last_used.pop(name, None)
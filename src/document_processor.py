@@ -1,49 +1,311 @@
 import streamlit as st
-import tempfile
 import os
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import CharacterTextSplitter
+import tempfile
+import time
+from concurrent.futures import TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from config.app_config import AppConfig
+from config.db_config import DatabaseConfig
+from src.ingestion_cache import IngestionCache
+from src.instrumentation import record_span
+from src.pdf_loader import iter_pdf_pages, load_pdf_file_timed
+from src.resources import get_parse_pool
+from src.text_splitter import StructuredTextSplitter
 
 class DocumentProcessor:
     """Handles document loading and processing operations."""
     
     def __init__(self):
-        pass
+        self.config = AppConfig()
     
-    def process_files(self, uploaded_files):
+    def process_files(self, uploaded_files, cache=None):
         """
         Process uploaded PDF files and extract documents.
         
+        Files not found in the cache are parsed in the shared process pool
+        when there are enough of them to be worth it. Pages are returned in
+        upload order regardless of which worker finishes first. Files that
+        time out or cannot be parsed are skipped with a warning.
+        
         Args:
             uploaded_files: List of uploaded Streamlit file objects
-            
+            cache: Optional IngestionCache used to skip unchanged files
+        
         Returns:
             List of loaded document objects
         """
-        all_docs = []
+        if not uploaded_files:
+            return []
+        
+        file_hashes = [self.get_file_hash(f) for f in uploaded_files]
+        results = [None] * len(uploaded_files)
+        pending = []
+        
+        for idx, file_hash in enumerate(file_hashes):
+            if cache is not None:
+                results[idx] = cache.get_pages(file_hash)
+            if results[idx] is None:
+                pending.append(idx)
         
         # Show processing status
         progress_bar = st.progress(0)
+        completed = len(uploaded_files) - len(pending)
+        progress_bar.progress(completed / len(uploaded_files))
         
-        for idx, uploaded_file in enumerate(uploaded_files):
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                temp_file.write(uploaded_file.read())
-                temp_path = temp_file.name
-
-            loader = PyPDFLoader(temp_path)
-            docs = loader.load()
-            all_docs.extend(docs)
+        timed_out = []
+        failed = []
+        for idx, docs in self._load_files(uploaded_files, pending, timed_out, failed):
+            for doc in docs:
+                doc.metadata['file_hash'] = file_hashes[idx]
+                doc.metadata['file_name'] = uploaded_files[idx].name
+            if cache is not None and docs:
+                cache.put_pages(file_hashes[idx], docs)
+            results[idx] = docs
             
             # Update progress bar
-            progress_bar.progress((idx + 1) / len(uploaded_files))
-            
-            # Clean up temp file
-            os.unlink(temp_path)
+            completed += 1
+            progress_bar.progress(completed / len(uploaded_files))
         
         progress_bar.empty()
-        return all_docs
+        for idx in timed_out:
+            st.warning(
+                f"⚠️ Skipped {uploaded_files[idx].name}: processing took longer "
+                f"than {self.config.PROCESSING_TIMEOUT_SECONDS} seconds."
+            )
+        for idx, error in failed:
+            st.warning(f"⚠️ Skipped {uploaded_files[idx].name}: it could not be read ({error}).")
+        return [doc for docs in results for doc in docs]
+    
+    def iter_pages(self, uploaded_files, file_hashes, timed_out=None, failed=None):
+        """
+        Yield the tagged pages of several uploads in upload order.
+        
+        Small inputs are streamed page by page in this process; larger ones
+        are parsed in the shared process pool and yielded one file at a time.
+        
+        Args:
+            uploaded_files: List of uploaded Streamlit file objects
+            file_hashes: Content hashes matching uploaded_files
+            timed_out: Optional list that receives the positions of files
+                skipped for exceeding PROCESSING_TIMEOUT_SECONDS
+            failed: Optional list that receives (position, exception) for
+                files that could not be parsed. Without it the exception is
+                raised. A streamed file can fail after some of its pages
+                were yielded.
+        
+        Yields:
+            Page documents tagged with the file hash and name
+        """
+        indices = range(len(uploaded_files))
+        if not self._use_pool(uploaded_files, indices):
+            for idx in indices:
+                try:
+                    yield from self.iter_file_pages(uploaded_files[idx], file_hashes[idx])
+                except Exception as e:
+                    if failed is None:
+                        raise
+                    failed.append((idx, e))
+            return
+        
+        for idx, docs in self._load_files(uploaded_files, indices, timed_out, failed):
+            for doc in docs:
+                doc.metadata['file_hash'] = file_hashes[idx]
+                doc.metadata['file_name'] = uploaded_files[idx].name
+                yield doc
+    
+    def iter_file_pages(self, uploaded_file, file_hash=None):
+        """
+        Lazily yield the pages of an upload, parsed straight from its buffer.
+        
+        Args:
+            uploaded_file: Uploaded Streamlit file object
+            file_hash: Content hash of the file, computed if not given
+        
+        Yields:
+            Page documents tagged with the file hash and name
+        """
+        if file_hash is None:
+            file_hash = self.get_file_hash(uploaded_file)
+        
+        # Only time spent parsing counts, not time the consumer holds each page
+        pages = iter_pdf_pages(uploaded_file, uploaded_file.name)
+        parse_seconds = 0.0
+        page_count = 0
+        while True:
+            started = time.perf_counter()
+            doc = next(pages, None)
+            parse_seconds += time.perf_counter() - started
+            if doc is None:
+                break
+            page_count += 1
+            doc.metadata['file_hash'] = file_hash
+            doc.metadata['file_name'] = uploaded_file.name
+            yield doc
+        record_span('parse', parse_seconds, pages=page_count, files=1)
+    
+    def get_file_hash(self, uploaded_file):
+        """
+        Hash an upload's content without copying its buffer.
+        
+        Args:
+            uploaded_file: Uploaded Streamlit file object
+        
+        Returns:
+            Hex digest of the file content
+        """
+        with uploaded_file.getbuffer() as buffer:
+            return IngestionCache.hash_bytes(buffer)
+    
+    def _use_pool(self, uploaded_files, indices):
+        """Whether the selected uploads are worth the round trip to worker processes."""
+        if min(self.config.MAX_CONCURRENT_UPLOADS, len(indices)) <= 1:
+            return False
+        if len(indices) < self.config.PARALLEL_PARSE_MIN_FILES:
+            return False
+        total_bytes = 0
+        for idx in indices:
+            with uploaded_files[idx].getbuffer() as buffer:
+                total_bytes += buffer.nbytes
+        return total_bytes >= self.config.PARALLEL_PARSE_MIN_MB * 1024 * 1024
+    
+    def _load_files(self, uploaded_files, indices, timed_out=None, failed=None):
+        """
+        Load the selected uploads, in the shared process pool when there are enough.
+        
+        A file whose parse exceeds PROCESSING_TIMEOUT_SECONDS is skipped and
+        its worker killed; files still waiting behind it are resubmitted, as
+        they are whenever the pool breaks. Files parsed in this process are
+        not subject to the timeout.
+        
+        Args:
+            uploaded_files: List of uploaded Streamlit file objects
+            indices: Positions in uploaded_files that need parsing
+            timed_out: Optional list that receives the positions of skipped files
+            failed: Optional list that receives (index, exception) for files
+                that could not be parsed, which get no pages; without it the
+                exception is raised
+        
+        Yields:
+            Tuples of (index, list of page documents) in index order
+        """
+        indices = list(indices)
+        if not self._use_pool(uploaded_files, indices):
+            for idx in indices:
+                yield idx, self._parse_in_process(uploaded_files, idx, failed)
+            return
+        
+        pool = get_parse_pool(self.config.MAX_CONCURRENT_UPLOADS)
+        futures = {}
+        with tempfile.TemporaryDirectory(prefix="pdf-parse-") as spool_dir:
+            paths = {
+                idx: self._spool_file(uploaded_files[idx], os.path.join(spool_dir, f"{idx}.pdf"))
+                for idx in indices
+            }
+            self._submit_files(pool, futures, paths, uploaded_files, indices)
+            try:
+                for position, idx in enumerate(indices):
+                    docs = self._await_file(
+                        pool, futures, paths, uploaded_files, indices[position:], timed_out, failed
+                    )
+                    # Only results not yet yielded stay referenced
+                    del futures[idx]
+                    yield idx, docs
+            finally:
+                for future in futures.values():
+                    future.cancel()
+    
+    def _await_file(self, pool, futures, paths, uploaded_files, remaining, timed_out, failed):
+        """
+        Wait for the pooled parse of remaining[0], recovering from stuck and dead workers.
+        
+        A parse that exceeds PROCESSING_TIMEOUT_SECONDS has its worker
+        killed and the file is skipped. When the pool breaks, whether from
+        that or from a worker dying, every unfinished file is resubmitted to
+        a new pool. If it breaks again the file is retried alone, and only a
+        file that still kills its worker is parsed in this process, as a
+        last resort. A file the parser rejects is reported in failed.
+        
+        Returns:
+            List of page documents, empty for a skipped file
+        """
+        idx = remaining[0]
+        broken = 0
+        while True:
+            try:
+                docs, parse_seconds = futures[idx].result(
+                    timeout=self.config.PROCESSING_TIMEOUT_SECONDS
+                )
+                # Measured in the worker, so parallel parses are not counted as waiting
+                record_span('parse', parse_seconds, pages=len(docs), files=1)
+                return docs
+            except TimeoutError:
+                pool.terminate(futures[idx])
+                self._resubmit_unfinished(pool, futures, paths, uploaded_files, remaining[1:])
+                if timed_out is not None:
+                    timed_out.append(idx)
+                return []
+            except BrokenProcessPool:
+                broken += 1
+                if broken == 1:
+                    self._resubmit_unfinished(pool, futures, paths, uploaded_files, remaining)
+                elif broken == 2:
+                    # Alone in the pool, so a file that kills workers is told
+                    # apart from one whose worker another file took down
+                    self._submit_files(pool, futures, paths, uploaded_files, [idx])
+                else:
+                    return self._parse_in_process(uploaded_files, idx, failed)
+            except Exception as e:
+                if failed is None:
+                    raise
+                failed.append((idx, e))
+                return []
+    
+    def _parse_in_process(self, uploaded_files, idx, failed):
+        """Parse one upload in this process, reporting a parse failure in failed."""
+        started = time.perf_counter()
+        try:
+            docs = list(iter_pdf_pages(uploaded_files[idx], uploaded_files[idx].name))
+        except Exception as e:
+            if failed is None:
+                raise
+            failed.append((idx, e))
+            return []
+        record_span('parse', time.perf_counter() - started, pages=len(docs), files=1)
+        return docs
+    
+    def _resubmit_unfinished(self, pool, futures, paths, uploaded_files, indices):
+        """Resubmit the files whose parse has not succeeded, e.g. after their pool broke."""
+        unfinished = [idx for idx in indices if not self._succeeded(futures[idx])]
+        self._submit_files(pool, futures, paths, uploaded_files, unfinished)
+    
+    def _spool_file(self, uploaded_file, path):
+        """
+        Get a path a worker can parse an upload from, without pickling its bytes.
+        
+        Files read from disk are parsed where they are; in-memory uploads
+        are written straight from their buffer to path.
+        
+        Args:
+            uploaded_file: Uploaded Streamlit file object
+            path: Where to write an in-memory upload
+        
+        Returns:
+            Path of the PDF file
+        """
+        if getattr(uploaded_file, 'path', None):
+            return uploaded_file.path
+        with uploaded_file.getbuffer() as buffer, open(path, "wb") as f:
+            f.write(buffer)
+        return path
+    
+    def _submit_files(self, pool, futures, paths, uploaded_files, indices):
+        for idx in indices:
+            futures[idx] = pool.submit(load_pdf_file_timed, paths[idx], uploaded_files[idx].name)
+    
+    def _succeeded(self, future):
+        return future.done() and not future.cancelled() and future.exception() is None
     
-    def split_documents(self, documents, chunk_size=800, chunk_overlap=50):
+    def split_documents(self, documents, chunk_size=800, chunk_overlap=50, cache=None):
         """
         Split documents into smaller chunks for processing.
         
@@ -51,15 +313,55 @@ class DocumentProcessor:
             documents: List of document objects
             chunk_size: Size of each chunk
             chunk_overlap: Overlap between chunks
-            
+            cache: Optional IngestionCache used to reuse chunks of unchanged files
+        
         Returns:
             List of document chunks
         """
-        text_splitter = CharacterTextSplitter(
-            chunk_size=chunk_size, 
-            chunk_overlap=chunk_overlap
+        text_splitter = self.get_text_splitter(chunk_size, chunk_overlap)
+        if cache is None:
+            return text_splitter.split_documents(documents)
+        
+        # Group pages by source file so chunks can be cached per file
+        pages_by_file = {}
+        for doc in documents:
+            pages_by_file.setdefault(doc.metadata.get('file_hash'), []).append(doc)
+        
+        chunks = []
+        for file_hash, pages in pages_by_file.items():
+            if file_hash is None:
+                chunks.extend(text_splitter.split_documents(pages))
+                continue
+            
+            file_chunks = cache.get_chunks(file_hash, chunk_size, chunk_overlap)
+            if file_chunks is None:
+                file_chunks = text_splitter.split_documents(pages)
+                cache.put_chunks(file_hash, chunk_size, chunk_overlap, file_chunks)
+            chunks.extend(file_chunks)
+        
+        return chunks
+    
+    def get_text_splitter(self, chunk_size=800, chunk_overlap=50):
+        """
+        Build the text splitter used to chunk pages.
+        
+        Chunks are capped at the embedding model's input limit whatever
+        chunk size is requested.
+        
+        Args:
+            chunk_size: Size of each chunk in characters
+            chunk_overlap: Overlap between chunks in characters
+        
+        Returns:
+            StructuredTextSplitter recording each chunk's start offset
+        """
+        db_config = DatabaseConfig()
+        return StructuredTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            max_tokens=db_config.EMBEDDING_MAX_TOKENS,
+            chars_per_token=db_config.CHARS_PER_TOKEN
         )
-        return text_splitter.split_documents(documents)
     
     def get_document_stats(self, documents):
         """
@@ -67,7 +369,7 @@ class DocumentProcessor:
         
         Args:
             documents: List of document objects
-            
+        
         Returns:
             Dictionary with document statistics
         """
@@ -0,0 +1,179 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from src.instrumentation import span
+
+class CachedEmbeddings(Embeddings):
+    """Persistent, size-bounded LRU cache in front of an embedding model."""
+    
+    def __init__(self, embedding_model, model_name, cache_path, max_entries=100000,
+                 max_queries=256):
+        self.embedding_model = embedding_model
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.max_queries = max_queries
+        self._queries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+    
+    def _key(self, text):
+        """
+        Build the cache key for a text.
+        
+        Args:
+            text: Text to embed
+        
+        Returns:
+            Hash of the model name and whitespace-normalized text
+        """
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+    
+    def embed_documents(self, texts):
+        """
+        Embed documents, only calling the model for uncached texts.
+        
+        Args:
+            texts: List of texts to embed
+        
+        Returns:
+            List of embedding vectors
+        """
+        with span('embed', texts=len(texts)) as current:
+            keys = [self._key(text) for text in texts]
+            cached = self._lookup(set(keys))
+            
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in cached and key not in missing:
+                    missing[key] = text
+            
+            with self._lock:
+                self.hits += len(texts) - len(missing)
+                self.misses += len(missing)
+            current.set(cache_hits=len(texts) - len(missing), cache_misses=len(missing))
+            
+            if missing:
+                vectors = self.embedding_model.embed_documents(list(missing.values()))
+                computed = dict(zip(missing.keys(), vectors))
+                self._store(computed)
+                cached.update(computed)
+            
+            return [list(cached[key]) for key in keys]
+    
+    def embed_query(self, text):
+        """
+        Embed a query, remembering recent queries in memory only.
+        
+        The answer cache and the retriever both embed each question, so the
+        second lookup is served from here.
+        
+        Args:
+            text: Query text
+        
+        Returns:
+            Embedding vector
+        """
+        key = self._key(text)
+        with span('embed_query') as current:
+            with self._lock:
+                vector = self._queries.get(key)
+                if vector is not None:
+                    self._queries.move_to_end(key)
+                    current.set(cache_hits=1)
+                    return vector
+            
+            current.set(cache_misses=1)
+            vector = self.embedding_model.embed_query(text)
+            with self._lock:
+                self._queries[key] = vector
+                while len(self._queries) > self.max_queries:
+                    self._queries.popitem(last=False)
+            return vector
+    
+    def get_stats(self):
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counters and cache size
+        """
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups > 0 else 0.0,
+                'entries': size,
+                'max_entries': self.max_entries
+            }
+    
+    def clear(self):
+        """Remove every cached embedding and reset counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+    
+    def _lookup(self, keys):
+        if not keys:
+            return {}
+        
+        found = {}
+        now = time.time_ns()
+        key_list = list(keys)
+        with self._lock:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(key_list), 500):
+                batch = key_list[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+    
+    def _store(self, vectors):
+        now = time.time_ns()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in vectors.items()]
+            )
+            self._evict()
+            self._conn.commit()
+    
+    def _evict(self):
+        size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
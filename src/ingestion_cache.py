@@ -0,0 +1,147 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+class IngestionCache:
+    """
+    Content-addressed cache for parsed pages, chunks, databases and chains.
+    
+    Every method holds the cache's lock, so background ingestion jobs can
+    fill it while the script thread reads and clears it.
+    """
+    
+    def __init__(self, max_files=64):
+        self.max_files = max_files
+        self._pages = OrderedDict()
+        self._chunks = OrderedDict()
+        self._file_stats = OrderedDict()
+        self._corpus_key = None
+        self._database = None
+        self._document_stats = None
+        self._chains = {}
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def hash_bytes(data):
+        """
+        Compute the content hash used to address cached entries.
+        
+        Args:
+            data: Raw file bytes
+        
+        Returns:
+            Hex digest of the content
+        """
+        return hashlib.sha256(data).hexdigest()
+    
+    def corpus_key(self, file_hashes, chunk_size, chunk_overlap):
+        """
+        Build the key identifying a corpus and its chunking parameters.
+        
+        Args:
+            file_hashes: Content hashes of the files in the corpus
+            chunk_size: Size of each chunk
+            chunk_overlap: Overlap between chunks
+        
+        Returns:
+            Tuple usable as a cache key
+        """
+        return (tuple(sorted(set(file_hashes))), chunk_size, chunk_overlap)
+    
+    @staticmethod
+    def fingerprint(corpus_key):
+        """
+        Condense a corpus key into a short, stable string.
+        
+        Args:
+            corpus_key: Key returned by corpus_key
+        
+        Returns:
+            Hex digest identifying the corpus
+        """
+        return hashlib.sha256(repr(corpus_key).encode('utf-8')).hexdigest()
+    
+    def get_pages(self, file_hash):
+        """Return cached pages for a file, or None if not cached."""
+        return self._get(self._pages, file_hash)
+    
+    def put_pages(self, file_hash, pages):
+        """Cache the parsed pages of a file."""
+        self._put(self._pages, file_hash, pages)
+    
+    def get_chunks(self, file_hash, chunk_size, chunk_overlap):
+        """Return cached chunks for a file, or None if not cached."""
+        return self._get(self._chunks, (file_hash, chunk_size, chunk_overlap))
+    
+    def put_chunks(self, file_hash, chunk_size, chunk_overlap, chunks):
+        """Cache the chunks produced for a file with the given parameters."""
+        self._put(self._chunks, (file_hash, chunk_size, chunk_overlap), chunks)
+    
+    def get_file_stats(self, file_hash):
+        """Return cached page and character counts for a file, or None."""
+        return self._get(self._file_stats, file_hash)
+    
+    def put_file_stats(self, file_hash, stats):
+        """Cache the page and character counts of a file."""
+        self._put(self._file_stats, file_hash, stats)
+    
+    def get_database(self, corpus_key):
+        """Return the vector database built for a corpus, or None."""
+        with self._lock:
+            if corpus_key != self._corpus_key:
+                return None
+            return self._database
+    
+    def put_database(self, corpus_key, database, document_stats=None):
+        """Cache the vector database for a corpus, dropping stale chains."""
+        with self._lock:
+            if corpus_key != self._corpus_key:
+                self._chains = {}
+            self._corpus_key = corpus_key
+            self._database = database
+            self._document_stats = document_stats
+    
+    def get_document_stats(self, corpus_key):
+        """Return the document statistics recorded for a corpus, or None."""
+        with self._lock:
+            if corpus_key != self._corpus_key:
+                return None
+            return self._document_stats
+    
+    def get_chain(self, corpus_key, chain_key):
+        """Return the QA chain built for a corpus and chain settings, or None."""
+        with self._lock:
+            if corpus_key != self._corpus_key:
+                return None
+            return self._chains.get(chain_key)
+    
+    def put_chain(self, corpus_key, chain_key, chain):
+        """Cache the QA chain for a corpus and chain settings such as temperature."""
+        with self._lock:
+            if corpus_key == self._corpus_key:
+                self._chains[chain_key] = chain
+    
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._pages.clear()
+            self._chunks.clear()
+            self._file_stats.clear()
+            self._corpus_key = None
+            self._database = None
+            self._document_stats = None
+            self._chains = {}
+    
+    def _get(self, store, key):
+        with self._lock:
+            value = store.get(key)
+            if value is not None:
+                store.move_to_end(key)
+            return value
+    
+    def _put(self, store, key, value):
+        with self._lock:
+            store[key] = value
+            store.move_to_end(key)
+            while len(store) > self.max_files:
+                store.popitem(last=False)
@@ -0,0 +1,186 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from src.ingestion_pipeline import IngestionCancelled
+
+class IngestionJob:
+    """An ingestion run in the background, with its state, progress and result."""
+    
+    QUEUED = "queued"
+    PARSING = "parsing"
+    EMBEDDING = "embedding"
+    READY = "ready"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    FINISHED_STATES = (READY, FAILED, CANCELLED)
+    
+    def __init__(self, key, pipeline, db, description=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.pipeline = pipeline
+        self.db = db
+        self.description = description
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self._state = self.QUEUED
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self):
+        """
+        Current state.
+        
+        queued -> parsing -> embedding -> ready, or failed / cancelled from
+        any unfinished state. Parsing and embedding overlap; the job counts
+        as embedding once every page has been parsed.
+        """
+        with self._lock:
+            if self._state == self.PARSING and self.pipeline.stats['stage'] == 'embedding':
+                return self.EMBEDDING
+            return self._state
+    
+    @property
+    def is_finished(self):
+        return self.state in self.FINISHED_STATES
+    
+    @property
+    def is_queryable(self):
+        """Whether the database holds chunks from this job, even if it has not finished."""
+        return self.state == self.READY or self.pipeline.stats['upserted'] > 0
+    
+    def progress(self):
+        """
+        Get a snapshot of the job for display.
+        
+        Returns:
+            Dictionary with id, state, error message, elapsed seconds and
+            the pipeline counters (pages, chunks, embedded, upserted, ...)
+        """
+        state = self.state
+        end = self.finished if self.finished is not None else time.time()
+        return {
+            'id': self.id,
+            'state': state,
+            'description': self.description,
+            'error': str(self.error) if self.error is not None else None,
+            'elapsed_seconds': end - self.started if self.started is not None else 0.0,
+            **self.pipeline.get_stats()
+        }
+    
+    def cancel(self):
+        """
+        Ask the job to stop.
+        
+        A queued job is cancelled before it starts. A running job stops at
+        its next batch boundary, keeping the chunks upserted so far.
+        """
+        self.cancel_event.set()
+        with self._lock:
+            if self._state == self.QUEUED:
+                self._state = self.CANCELLED
+                self.finished = time.time()
+    
+    def _start(self):
+        with self._lock:
+            if self._state != self.QUEUED:
+                return False
+            self._state = self.PARSING
+            self.started = time.time()
+            return True
+    
+    def _finish(self, state, error=None):
+        with self._lock:
+            self._state = state
+            self.error = error
+            self.finished = time.time()
+
+class IngestionJobManager:
+    """Process-wide worker pool running ingestion jobs outside the Streamlit script."""
+    
+    def __init__(self, max_workers=2, max_finished_jobs=64):
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ingestion"
+        )
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(self, key, pipeline, uploaded_files, file_hashes=None, db=None,
+               description=None, **run_kwargs):
+        """
+        Queue an ingestion run, or return the unfinished one already queued for key.
+        
+        Args:
+            key: Identifies the work, e.g. the target collection and corpus
+                key; submitting a key whose job is unfinished returns that job
+            pipeline: IngestionPipeline to run
+            uploaded_files: Files passed to IngestionPipeline.run
+            file_hashes: Content hashes matching uploaded_files
+            db: Vector database to write into, searchable while the job runs
+            description: Optional text shown with the job's progress
+            **run_kwargs: Further keyword arguments for IngestionPipeline.run
+        
+        Returns:
+            IngestionJob
+        """
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job.key == key and not job.is_finished:
+                    return job
+            
+            if db is None:
+                db = pipeline.vector_store.open_database()
+            job = IngestionJob(key, pipeline, db, description)
+            self._jobs[job.id] = job
+            self._evict()
+        
+        self._executor.submit(self._run, job, uploaded_files, file_hashes, run_kwargs)
+        return job
+    
+    def get(self, job_id):
+        """Return a job by ID, or None if it is unknown or was evicted."""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def list_jobs(self):
+        """Return every tracked job, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+    
+    def cancel(self, job_id):
+        """
+        Cancel a job by ID.
+        
+        Returns:
+            True if the job exists and had not finished
+        """
+        job = self.get(job_id)
+        if job is None or job.is_finished:
+            return False
+        job.cancel()
+        return True
+    
+    def _run(self, job, uploaded_files, file_hashes, run_kwargs):
+        if not job._start():
+            return
+        try:
+            job.pipeline.run(
+                uploaded_files, file_hashes, db=job.db, stop_event=job.cancel_event, **run_kwargs
+            )
+        except IngestionCancelled:
+            job._finish(IngestionJob.CANCELLED)
+        except Exception as e:
+            job._finish(IngestionJob.FAILED, error=e)
+        else:
+            job._finish(IngestionJob.READY)
+    
+    def _evict(self):
+        """Forget the oldest finished jobs beyond max_finished_jobs. Call with the lock held."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
@@ -0,0 +1,365 @@
+import queue
+import threading
+from src.instrumentation import span
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx
+except ImportError:
+    add_script_run_ctx = None
+
+_DONE = object()
+
+class IngestionCancelled(Exception):
+    """Raised by IngestionPipeline.run when its stop event is set before it finishes."""
+
+class IngestionPipeline:
+    """Streams uploads through overlapping parse, split, embed and upsert stages."""
+    
+    def __init__(self, doc_processor, vector_store, chunk_size=800, chunk_overlap=50,
+                 batch_size=None, queue_size=256, cache=None):
+        self.doc_processor = doc_processor
+        self.vector_store = vector_store
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        # Default to enough chunks to keep every in-flight embedding request busy
+        if batch_size is None:
+            batch_size = (
+                vector_store.db_config.EMBEDDING_BATCH_SIZE
+                * vector_store.db_config.EMBEDDING_MAX_IN_FLIGHT
+            )
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.cache = cache
+        # Stage threads update stats while other threads read them through get_stats
+        self._stats_lock = threading.Lock()
+        self.stats = self._empty_stats()
+    
+    def run(self, uploaded_files, file_hashes=None, db=None, progress_callback=None,
+            prune_other_files=True, stop_event=None, indexed_ids=None, persist=True):
+        """
+        Ingest uploads into the vector database.
+        
+        Each stage runs in its own thread and hands work to the next through a
+        bounded queue, so a slow stage holds back the ones before it instead
+        of letting pages and chunks pile up in memory. Chunks already in the
+        database are skipped. Once every stage has finished, stale chunks of
+        the ingested files are deleted, as are chunks of files no longer
+        uploaded unless prune_other_files is off. Files skipped for taking
+        too long to parse are listed in stats['timed_out_files'] and those
+        that could not be parsed in stats['failed_files'], with their hashes
+        in stats['timed_out_hashes'] and stats['failed_hashes']. Both keep
+        whatever chunks they already had.
+        
+        Args:
+            uploaded_files: List of uploaded Streamlit file objects
+            file_hashes: Content hashes matching uploaded_files, computed if not given
+            db: Vector database to write into, the persistent one if not given
+            progress_callback: Optional callable receiving the stats after each batch
+            prune_other_files: Whether to delete chunks of files not in uploaded_files
+            stop_event: Optional threading.Event that cancels the run when set
+            indexed_ids: Chunk IDs already in db grouped by file hash, as from
+                VectorStore.get_indexed_ids_by_file; updated in place as chunks
+                are upserted and deleted. Loaded from db if not given.
+            persist: Whether to persist db at the end; a caller running several
+                batches can persist once for all of them instead
+        
+        Returns:
+            Vector database instance
+        
+        Raises:
+            IngestionCancelled: If stop_event was set; chunks upserted so far are kept
+        """
+        if file_hashes is None:
+            file_hashes = [self.doc_processor.get_file_hash(f) for f in uploaded_files]
+        # The same file uploaded twice is ingested, and counted, once
+        unique = dict(zip(file_hashes, uploaded_files))
+        file_hashes, uploaded_files = list(unique), list(unique.values())
+        if db is None:
+            db = self.vector_store.open_database()
+        
+        with self._stats_lock:
+            self.stats = self._empty_stats()
+        if indexed_ids is None:
+            indexed_ids = self.vector_store.get_indexed_ids_by_file(db)
+        self._indexed_ids = indexed_ids
+        self._wanted_ids = set()
+        # Files that timed out or failed to parse, whose existing chunks are kept
+        self._skipped_hashes = set()
+        self._stop = stop_event if stop_event is not None else threading.Event()
+        self._errors = []
+        
+        page_queue = queue.Queue(maxsize=self.queue_size)
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        batch_queue = queue.Queue(maxsize=4)
+        
+        stages = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._parse_stage, page_queue, uploaded_files, file_hashes)
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._split_stage, chunk_queue, page_queue)
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._embed_stage, batch_queue, chunk_queue)
+            )
+        ]
+        for stage in stages:
+            stage.daemon = True
+            if add_script_run_ctx is not None:
+                add_script_run_ctx(stage)
+            stage.start()
+        
+        # Upsert in the calling thread so progress can be reported from it
+        try:
+            while True:
+                batch = self._get(batch_queue)
+                if batch is _DONE:
+                    break
+                documents, ids, embeddings = batch
+                self.vector_store.upsert_embeddings(db, documents, embeddings, ids)
+                for chunk_id in ids:
+                    self._indexed_ids.setdefault(chunk_id.split(":", 1)[0], set()).add(chunk_id)
+                self._update_stats(upserted=len(ids))
+                if progress_callback is not None:
+                    progress_callback(self.get_stats())
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            for stage in stages:
+                stage.join()
+        
+        if self._errors:
+            raise self._errors[0]
+        if self._stop.is_set():
+            raise IngestionCancelled()
+        
+        if prune_other_files:
+            prune_hashes = list(self._indexed_ids)
+        else:
+            prune_hashes = set(file_hashes)
+        stale_ids = []
+        for file_hash in prune_hashes:
+            if file_hash in self._skipped_hashes:
+                continue
+            file_ids = self._indexed_ids.get(file_hash, ())
+            stale = [chunk_id for chunk_id in file_ids if chunk_id not in self._wanted_ids]
+            if stale:
+                file_ids.difference_update(stale)
+                stale_ids.extend(stale)
+            if not file_ids:
+                self._indexed_ids.pop(file_hash, None)
+        if stale_ids:
+            self.vector_store.delete_documents(db, stale_ids, persist=persist)
+        elif persist:
+            with span('persist'):
+                db.persist()
+        with self._stats_lock:
+            self.stats['deleted'] = len(stale_ids)
+            total_pages = self.stats['total_pages']
+            self.stats['avg_page_length'] = (
+                self.stats['total_characters'] // total_pages if total_pages > 0 else 0
+            )
+        return db
+    
+    def get_stats(self):
+        """
+        Get a consistent copy of the run's counters, safe to call from any thread.
+        
+        Returns:
+            Dictionary of stage, page, chunk and embedding counts
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+            for key in ('timed_out_files', 'timed_out_hashes', 'failed_files', 'failed_hashes'):
+                stats[key] = list(stats[key])
+        return stats
+    
+    def _run_stage(self, stage, output_queue, *args):
+        try:
+            stage(output_queue, *args)
+        except Exception as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            self._put(output_queue, _DONE)
+    
+    def _parse_stage(self, page_queue, uploaded_files, file_hashes):
+        """Feed cached chunks, or freshly parsed pages, to the split stage."""
+        to_parse = []
+        for uploaded_file, file_hash in zip(uploaded_files, file_hashes):
+            chunks = None
+            file_stats = None
+            if self.cache is not None:
+                chunks = self.cache.get_chunks(file_hash, self.chunk_size, self.chunk_overlap)
+                file_stats = self.cache.get_file_stats(file_hash)
+            
+            if chunks is None or file_stats is None:
+                to_parse.append((uploaded_file, file_hash))
+                continue
+            
+            if not self._put(page_queue, ('chunks', (chunks, file_stats))):
+                return
+        
+        if not to_parse:
+            return
+        
+        timed_out = []
+        failed = []
+        pages = self.doc_processor.iter_pages(
+            [uploaded_file for uploaded_file, _ in to_parse],
+            [file_hash for _, file_hash in to_parse],
+            timed_out,
+            failed
+        )
+        for page in pages:
+            # Recorded before the split stage sees the next file, so a file that
+            # failed part way through does not have its partial chunks cached
+            self._record_failed(to_parse, failed)
+            if not self._put(page_queue, ('page', page)):
+                return
+        self._record_failed(to_parse, failed)
+        for idx in timed_out:
+            uploaded_file, file_hash = to_parse[idx]
+            self._skipped_hashes.add(file_hash)
+            with self._stats_lock:
+                self.stats['timed_out_files'].append(uploaded_file.name)
+                self.stats['timed_out_hashes'].append(file_hash)
+    
+    def _record_failed(self, to_parse, failed):
+        """Move parse failures reported so far into the stats."""
+        while failed:
+            idx, error = failed.pop(0)
+            uploaded_file, file_hash = to_parse[idx]
+            message = str(error) or type(error).__name__
+            self._skipped_hashes.add(file_hash)
+            with self._stats_lock:
+                self.stats['failed_files'].append((uploaded_file.name, message))
+                self.stats['failed_hashes'].append(file_hash)
+    
+    def _split_stage(self, chunk_queue, page_queue):
+        """Split pages into chunks, caching each file's chunks once it is complete."""
+        text_splitter = self.doc_processor.get_text_splitter(self.chunk_size, self.chunk_overlap)
+        current_hash = None
+        file_chunks = []
+        file_stats = None
+        
+        while True:
+            item = self._get(page_queue)
+            if item is _DONE:
+                break
+            
+            kind, payload = item
+            if kind == 'chunks':
+                chunks, cached_stats = payload
+                self._update_stats(
+                    total_pages=cached_stats['total_pages'],
+                    total_characters=cached_stats['total_characters']
+                )
+            else:
+                file_hash = payload.metadata.get('file_hash')
+                if file_hash != current_hash:
+                    self._cache_file(current_hash, file_chunks, file_stats)
+                    current_hash = file_hash
+                    file_chunks = []
+                    file_stats = {'total_pages': 0, 'total_characters': 0}
+                
+                file_stats['total_pages'] += 1
+                file_stats['total_characters'] += len(payload.page_content)
+                self._update_stats(total_pages=1, total_characters=len(payload.page_content))
+                
+                with span('split', pages=1) as current:
+                    chunks = text_splitter.split_documents([payload])
+                    current.set(chunks=len(chunks))
+                if self.cache is not None:
+                    file_chunks.extend(chunks)
+            
+            for chunk in chunks:
+                if not self._put(chunk_queue, chunk):
+                    return
+        
+        if not self._stop.is_set():
+            self._cache_file(current_hash, file_chunks, file_stats)
+            # Every page is parsed; what is left is embedding and upserting
+            with self._stats_lock:
+                self.stats['stage'] = 'embedding'
+    
+    def _embed_stage(self, batch_queue, chunk_queue):
+        """Embed chunks that are not yet indexed, in batches of batch_size."""
+        documents = []
+        ids = []
+        
+        while True:
+            chunk = self._get(chunk_queue)
+            if chunk is not _DONE:
+                chunk_id = self.vector_store.get_chunk_id(chunk)
+                self._update_stats(chunks=1)
+                # Chunk IDs start with the hash of their source file
+                indexed = self._indexed_ids.get(chunk_id.split(":", 1)[0], ())
+                if chunk_id not in self._wanted_ids and chunk_id not in indexed:
+                    documents.append(chunk)
+                    ids.append(chunk_id)
+                self._wanted_ids.add(chunk_id)
+            
+            if documents and (chunk is _DONE or len(documents) >= self.batch_size):
+                embeddings = self.vector_store.embedding_model.embed_documents(
+                    [doc.page_content for doc in documents]
+                )
+                self._update_stats(embedded=len(documents))
+                if not self._put(batch_queue, (documents, ids, embeddings)):
+                    return
+                documents = []
+                ids = []
+            
+            if chunk is _DONE:
+                break
+    
+    def _update_stats(self, **deltas):
+        with self._stats_lock:
+            for key, delta in deltas.items():
+                self.stats[key] += delta
+    
+    def _cache_file(self, file_hash, chunks, file_stats):
+        if self.cache is None or file_hash is None or file_hash in self._skipped_hashes:
+            return
+        self.cache.put_chunks(file_hash, self.chunk_size, self.chunk_overlap, chunks)
+        self.cache.put_file_stats(file_hash, file_stats)
+    
+    def _put(self, target_queue, item):
+        """Put with backpressure, giving up once the pipeline is stopping."""
+        while True:
+            try:
+                target_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self._stop.is_set():
+                    return False
+    
+    def _get(self, source_queue):
+        """Get the next item, or _DONE once the pipeline is stopping."""
+        # Buffered items are dropped on stop so cancellation does not wait for them
+        while not self._stop.is_set():
+            try:
+                return source_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _DONE
+    
+    def _empty_stats(self):
+        return {
+            'stage': 'parsing',
+            'total_pages': 0,
+            'total_characters': 0,
+            'avg_page_length': 0,
+            'chunks': 0,
+            'embedded': 0,
+            'upserted': 0,
+            'deleted': 0,
+            'timed_out_files': [],
+            'timed_out_hashes': [],
+            'failed_files': [],
+            'failed_hashes': []
+        }
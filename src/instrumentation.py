@@ -0,0 +1,331 @@
+import bisect
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.resources import get_metrics
+
+# Seconds; Prometheus histogram upper bounds, +Inf is implied
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values."""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms, exported in the Prometheus text format."""
+    
+    def __init__(self, namespace="rag", buckets=DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self.version = 0
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+    
+    def increment(self, name, amount=1, **labels):
+        """
+        Add to a counter.
+        
+        Args:
+            name: Metric name without the namespace or _total suffix
+            amount: Non-negative amount to add
+            **labels: Label values
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self.version += 1
+    
+    def observe(self, name, value, **labels):
+        """
+        Record a value in a histogram.
+        
+        Args:
+            name: Metric name without the namespace
+            value: Observed value, in seconds for durations
+            **labels: Label values
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+            self.version += 1
+    
+    def get_histogram(self, name, **labels):
+        """Return a copy of a histogram, or None if nothing was observed."""
+        with self._lock:
+            histogram = self._histograms.get((name, tuple(sorted(labels.items()))))
+            if histogram is None:
+                return None
+            copy = Histogram(histogram.buckets)
+            copy.counts = list(histogram.counts)
+            copy.sum = histogram.sum
+            copy.count = histogram.count
+            return copy
+    
+    def get_counter(self, name, **labels):
+        """Return a counter's value, 0 if it was never incremented."""
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+    
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+        
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(h.counts), h.sum, h.count, h.buckets))
+                for key, h in self._histograms.items()
+            )
+        
+        lines = []
+        last_name = None
+        for (name, labels), value in counters:
+            metric = f"{self.namespace}_{name}_total"
+            if metric != last_name:
+                lines.append(f"# TYPE {metric} counter")
+                last_name = metric
+            lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+        
+        for (name, labels), (counts, total, count, buckets) in histograms:
+            metric = f"{self.namespace}_{name}"
+            if metric != last_name:
+                lines.append(f"# TYPE {metric} histogram")
+                last_name = metric
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else _format_value(bound)
+                lines.append(
+                    f"{metric}_bucket{_format_labels(labels + (('le', le),))} {cumulative}"
+                )
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+    
+    def write(self, path):
+        """
+        Atomically replace a file with the rendered metrics.
+        
+        Args:
+            path: Output file path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+class Span:
+    """A timed pipeline stage with counts attached."""
+    
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+    
+    def set(self, **attributes):
+        """Attach or overwrite attributes, e.g. counts only known once the stage ran."""
+        self.attributes.update(attributes)
+
+class Trace:
+    """The spans recorded while handling one request, in the order they finished."""
+    
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+    
+    def summary(self):
+        """
+        Get the trace as plain data for display.
+        
+        Returns:
+            Dictionary with the trace name, total seconds and a list of spans,
+            each with name, seconds and attributes
+        """
+        return {
+            'name': self.name,
+            'seconds': self.seconds,
+            'spans': [
+                {'name': span.name, 'seconds': span.seconds, 'attributes': dict(span.attributes)}
+                for span in self.spans
+            ]
+        }
+
+class MetricsExporter:
+    """Publishes a metrics registry to a file and, optionally, an HTTP /metrics endpoint."""
+    
+    def __init__(self, registry, path=None, port=None, interval_seconds=15.0):
+        self.registry = registry
+        self.path = path
+        self.port = port
+        self.interval_seconds = interval_seconds
+        self.server = None
+        self._written_version = None
+        self._stop = threading.Event()
+    
+    def start(self):
+        """Start the background writer and the HTTP server, whichever are configured."""
+        if self.path is not None:
+            threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True).start()
+        if self.port is not None:
+            registry = self.registry
+            
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?", 1)[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                
+                def log_message(self, format, *args):
+                    pass
+            
+            self.server = ThreadingHTTPServer(("", self.port), Handler)
+            self.server.daemon_threads = True
+            threading.Thread(
+                target=self.server.serve_forever, name="metrics-http", daemon=True
+            ).start()
+        return self
+    
+    def stop(self):
+        """Stop publishing, writing the file one last time."""
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        self.flush()
+    
+    def flush(self):
+        """Write the metrics file now if anything changed since the last write."""
+        if self.path is None:
+            return
+        version = self.registry.version
+        if version != self._written_version:
+            self.registry.write(self.path)
+            self._written_version = version
+    
+    def _write_loop(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a stage, recording it in the metrics and in the current trace.
+    
+    The duration goes to the stage_duration_seconds histogram and each
+    integer attribute, e.g. chunks=12, is added to a
+    stage_<attribute>_total counter, both labelled with the stage name.
+    
+    Args:
+        name: Stage name, e.g. "retrieve"
+        **attributes: Counts and other details known up front
+    
+    Yields:
+        Span, whose set() attaches details known once the stage ran
+    """
+    current = Span(name, attributes)
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - current.started
+        _finish(current)
+
+def record_span(name, seconds, **attributes):
+    """
+    Record a stage timed elsewhere, e.g. in a worker process.
+    
+    Args:
+        name: Stage name
+        seconds: Duration of the stage
+        **attributes: Counts and other details
+    """
+    current = Span(name, attributes)
+    current.seconds = seconds
+    _finish(current)
+
+@contextmanager
+def trace(name):
+    """
+    Collect the spans finished in this context, e.g. while answering one question.
+    
+    Spans from other threads are only recorded in the metrics.
+    
+    Args:
+        name: Trace name, e.g. "query"
+    
+    Yields:
+        Trace
+    """
+    current = Trace(name)
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - current.started
+        _current_trace.reset(token)
+        get_metrics().observe("request_duration_seconds", current.seconds, request=name)
+
+def _finish(current):
+    metrics = get_metrics()
+    metrics.observe("stage_duration_seconds", current.seconds, stage=current.name)
+    for attribute, value in current.attributes.items():
+        if isinstance(value, int) and value >= 0:
+            metrics.increment(f"stage_{attribute}", value, stage=current.name)
+    
+    active = _current_trace.get()
+    if active is not None:
+        active.spans.append(current)
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+def _format_value(value):
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
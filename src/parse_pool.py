@@ -0,0 +1,75 @@
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+class ParsePool:
+    """Process pool for PDF parsing that can kill a stuck worker."""
+    
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._owners = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+    
+    def submit(self, fn, *args):
+        """
+        Schedule fn(*args) in a worker process, starting the workers on first use.
+        
+        Args:
+            fn: Picklable module-level callable
+            *args: Picklable arguments
+        
+        Returns:
+            concurrent.futures.Future for the result
+        """
+        with self._lock:
+            if self._executor is not None:
+                try:
+                    future = self._executor.submit(fn, *args)
+                except BrokenProcessPool:
+                    # A worker died on its own; start over with a new pool
+                    self._executor.shutdown(wait=True, cancel_futures=True)
+                    self._executor = None
+                else:
+                    self._owners[future] = self._executor
+                    return future
+            
+            # Spawned workers avoid forking the multi-threaded Streamlit server
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            future = self._executor.submit(fn, *args)
+            self._owners[future] = self._executor
+            return future
+    
+    def terminate(self, future):
+        """
+        Kill the workers of the pool that is running future.
+        
+        A running task cannot be cancelled, so its pool is torn down and the
+        next submit starts a new one. Other tasks still pending on the old
+        pool fail with BrokenProcessPool and can be resubmitted.
+        
+        Args:
+            future: Future returned by submit
+        """
+        with self._lock:
+            executor = self._owners.get(future)
+            if executor is None:
+                return
+            if executor is self._executor:
+                self._executor = None
+        
+        terminate_workers = getattr(executor, 'terminate_workers', None)
+        if terminate_workers is not None:
+            terminate_workers()
+            return
+        # Before Python 3.14 the only handle on the workers is the private process map
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.terminate()
+        # Waiting keeps the executor alive until its management thread has
+        # cleaned up; collecting it earlier can deadlock that thread
+        executor.shutdown(wait=True, cancel_futures=True)
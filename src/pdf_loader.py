@@ -0,0 +1,65 @@
+import time
+from pypdf import PdfReader
+from langchain_core.documents import Document
+
+def iter_pdf_pages(stream, source):
+    """
+    Lazily parse a PDF from a binary stream, one page at a time.
+    
+    The stream is read in place, so an in-memory upload buffer is parsed
+    without being copied to disk.
+    
+    Args:
+        stream: Seekable binary file-like object holding the PDF
+        source: Name recorded as the source of each page
+    
+    Yields:
+        Page document objects in page order
+    """
+    stream.seek(0)
+    reader = PdfReader(stream)
+    total_pages = len(reader.pages)
+    page_labels = reader.page_labels
+    
+    for page_number, page in enumerate(reader.pages):
+        yield Document(
+            page_content=page.extract_text(),
+            metadata={
+                'source': source,
+                'page': page_number,
+                'page_label': page_labels[page_number],
+                'total_pages': total_pages
+            }
+        )
+
+def load_pdf_file(path, source):
+    """
+    Parse a PDF file into page documents.
+    
+    Kept free of Streamlit imports so it can run cheaply in worker processes,
+    which are handed a path rather than a pickled copy of the file.
+    
+    Args:
+        path: PDF file path
+        source: Name recorded as the source of each page
+    
+    Returns:
+        List of page document objects
+    """
+    with open(path, "rb") as f:
+        return list(iter_pdf_pages(f, source))
+
+def load_pdf_file_timed(path, source):
+    """
+    Parse a PDF like load_pdf_file, also measuring the parse in the worker.
+    
+    Args:
+        path: PDF file path
+        source: Name recorded as the source of each page
+    
+    Returns:
+        Tuple of (list of page document objects, seconds spent parsing)
+    """
+    started = time.perf_counter()
+    pages = load_pdf_file(path, source)
+    return pages, time.perf_counter() - started
@@ -1,41 +1,248 @@
-from langchain.chains import RetrievalQA
-from langchain_google_genai import GoogleGenerativeAI
-from langchain.globals import set_verbose
+import re
+import time
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+from langchain_core.prompts import format_document
 from config.app_config import AppConfig
+from src.bm25_index import tokenize
+from src.instrumentation import span
+from src.rerankers import LexicalDenseScorer
+from src.resources import get_llm, get_metrics
+from src.retrievers import HybridRetriever, RerankingRetriever, estimate_tokens
 
-# Set verbose mode for debugging
-set_verbose(True)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in is it of on or "
+    "that the this to was were what when where which who why with".split()
+)
+
+class ContextAssembler(BaseDocumentCompressor):
+    """Shrinks retrieved context before it is stuffed into the prompt."""
+    
+    dedup_threshold: float = 0.8
+    shingle_size: int = 5
+    extract_sentences: bool = False
+    
+    def compress_documents(self, documents, query, callbacks=None):
+        """
+        Merge overlapping chunks, drop near-duplicates and optionally trim to relevant sentences.
+        
+        Args:
+            documents: Retrieved documents, best first
+            query: User question
+            callbacks: Unused, required by the compressor interface
+        
+        Returns:
+            List of documents to send to the LLM, best first
+        """
+        with span('compress', candidates=len(documents)) as current:
+            documents = self.merge_adjacent(documents)
+            documents = self.drop_near_duplicates(documents)
+            if self.extract_sentences:
+                documents = [self.extract_relevant(doc, query) for doc in documents]
+            current.set(chunks=len(documents))
+            return documents
+    
+    def merge_adjacent(self, documents):
+        """
+        Merge chunks from the same page whose character ranges touch or overlap.
+        
+        Overlapping chunks come from chunk_overlap and would otherwise repeat
+        the shared text. A merged chunk takes the rank of its best member.
+        
+        Args:
+            documents: Retrieved documents, best first
+        
+        Returns:
+            List of merged documents, best first
+        """
+        groups = {}
+        for rank, doc in enumerate(documents):
+            metadata = doc.metadata
+            if 'start_index' not in metadata:
+                groups[('unpositioned', rank)] = [(rank, doc)]
+                continue
+            page_key = (metadata.get('file_hash', metadata.get('source')), metadata.get('page'))
+            groups.setdefault(page_key, []).append((rank, doc))
+        
+        merged = []
+        for members in groups.values():
+            members.sort(key=lambda member: member[1].metadata.get('start_index', 0))
+            best_rank, current = members[0]
+            start = current.metadata.get('start_index', 0)
+            text = current.page_content
+            
+            for rank, doc in members[1:]:
+                doc_start = doc.metadata['start_index']
+                if doc_start <= start + len(text):
+                    text += doc.page_content[start + len(text) - doc_start:]
+                    best_rank = min(best_rank, rank)
+                    continue
+                merged.append((best_rank, self._with_text(current, text, start)))
+                best_rank, current = rank, doc
+                start = doc_start
+                text = doc.page_content
+            merged.append((best_rank, self._with_text(current, text, start)))
+        
+        merged.sort(key=lambda item: item[0])
+        return [doc for _, doc in merged]
+    
+    def drop_near_duplicates(self, documents):
+        """
+        Drop documents whose word shingles mostly repeat a better-ranked document.
+        
+        Args:
+            documents: Documents, best first
+        
+        Returns:
+            Documents with near-duplicates removed, best first
+        """
+        kept = []
+        kept_shingles = []
+        for doc in documents:
+            shingles = self._shingles(doc.page_content)
+            if any(
+                len(shingles & other) / max(1, len(shingles | other)) >= self.dedup_threshold
+                for other in kept_shingles
+            ):
+                continue
+            kept.append(doc)
+            kept_shingles.append(shingles)
+        return kept
+    
+    def extract_relevant(self, document, query):
+        """
+        Keep only the sentences of a document that mention a query term.
+        
+        Args:
+            document: Document to trim
+            query: User question
+        
+        Returns:
+            Trimmed document, or the original if no sentence matches
+        """
+        query_terms = set(tokenize(query)) - STOPWORDS
+        sentences = SENTENCE_BOUNDARY.split(document.page_content)
+        relevant = [
+            sentence for sentence in sentences
+            if query_terms & set(tokenize(sentence))
+        ]
+        if not relevant or len(relevant) == len(sentences):
+            return document
+        return Document(page_content=" ".join(relevant), metadata=dict(document.metadata))
+    
+    def _shingles(self, text):
+        words = text.lower().split()
+        if len(words) <= self.shingle_size:
+            return {tuple(words)}
+        return {
+            tuple(words[i:i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+    
+    def _with_text(self, document, text, start):
+        if text == document.page_content:
+            return document
+        metadata = dict(document.metadata, start_index=start)
+        return Document(page_content=text, metadata=metadata)
 
 class QAChain:
     """Handles question-answering chain operations."""
     
-    def __init__(self):
+    def __init__(self, answer_cache=None):
         self.config = AppConfig()
+        self.answer_cache = answer_cache
     
-    def create_chain(self, vector_db, temperature=0.1):
+    def create_chain(self, vector_db, temperature=0.1, corpus_fingerprint=None, retriever=None):
         """
         Create QA chain with vector database.
         
         Args:
             vector_db: Vector database instance
             temperature: LLM temperature setting
-            
+            corpus_fingerprint: Identifies the indexed corpus; answers are
+                only cached for chains that have one
+            retriever: Optional retriever, defaults to dense search over vector_db
+        
         Returns:
             RetrievalQA chain instance
         """
-        llm = GoogleGenerativeAI(
-            model=self.config.LLM_MODEL, 
-            temperature=temperature
-        )
+        # The langchain package is slow to import and only needed once there is a corpus
+        from langchain.chains import RetrievalQA
+        from langchain.retrievers import ContextualCompressionRetriever
+        
+        llm = get_llm(self.config.LLM_MODEL, temperature)
+        
+        if retriever is None:
+            retriever = vector_db.as_retriever()
+        
+        if self.config.RERANK_RESULTS and isinstance(retriever, HybridRetriever):
+            # Over-fetch, leaving the final k and token budget to the rerank stage
+            retriever = RerankingRetriever(
+                base_retriever=retriever.model_copy(update={
+                    'k': retriever.k * self.config.RERANK_OVERFETCH,
+                    'max_context_tokens': None
+                }),
+                scorer=LexicalDenseScorer(alpha=self.config.RERANK_DENSE_WEIGHT),
+                k=retriever.k,
+                max_context_tokens=retriever.max_context_tokens,
+                chars_per_token=retriever.chars_per_token
+            )
+        
+        if self.config.COMPRESS_CONTEXT:
+            retriever = ContextualCompressionRetriever(
+                base_compressor=ContextAssembler(
+                    dedup_threshold=self.config.CONTEXT_DEDUP_THRESHOLD,
+                    extract_sentences=self.config.EXTRACT_RELEVANT_SENTENCES
+                ),
+                base_retriever=retriever
+            )
         
         qa_chain = RetrievalQA.from_chain_type(
             llm=llm,
-            retriever=vector_db.as_retriever(),
-            return_source_documents=True
+            retriever=retriever,
+            return_source_documents=True,
+            metadata={
+                'corpus_fingerprint': corpus_fingerprint,
+                'llm_model': self.config.LLM_MODEL,
+                'temperature': temperature
+            }
         )
         
         return qa_chain
     
+    def get_answer(self, qa_chain, question):
+        """
+        Answer a question, serving repeated and near-duplicate questions from cache.
+        
+        Args:
+            qa_chain: RetrievalQA instance
+            question: User question
+        
+        Returns:
+            Dictionary with the query, answer under 'result', source documents
+            and the context sent to the LLM under 'context_stats'
+        """
+        cached, cache_context = self._lookup_answer(qa_chain, question)
+        if cached is not None:
+            return cached
+        
+        source_documents = qa_chain.retriever.invoke(question)
+        prompt, context_stats = self._build_prompt(qa_chain, question, source_documents)
+        llm = qa_chain.combine_documents_chain.llm_chain.llm
+        with span('generate', prompt_tokens=context_stats['tokens']) as current:
+            answer = llm.invoke(prompt)
+            current.set(answer_tokens=estimate_tokens(answer))
+        
+        self._store_answer(cache_context, question, answer, source_documents)
+        return {
+            'query': question,
+            'result': answer,
+            'source_documents': source_documents,
+            'context_stats': context_stats,
+            'stage_timings': self._stage_timings(qa_chain)
+        }
+    
     def ask_question(self, qa_chain, question):
         """
         Ask a question using the QA chain.
@@ -43,7 +250,7 @@ class QAChain:
         Args:
             qa_chain: RetrievalQA instance
             question: User question
-            
+        
         Returns:
             Dictionary with answer and source documents
         """
@@ -63,6 +270,153 @@ class QAChain:
                 'error': str(e)
             }
     
+    def stream_answer(self, qa_chain, question):
+        """
+        Answer a question, streaming the generated tokens.
+        
+        Retrieval runs immediately; generation starts when the returned
+        token iterator is consumed. The prompt and LLM are the ones the
+        chain uses for invoke, so both modes produce the same answer.
+        
+        Args:
+            qa_chain: RetrievalQA instance
+            question: User question
+        
+        Returns:
+            Dictionary with the query, a token iterator under 'result_stream',
+            the retrieved source documents and 'context_stats'
+        """
+        cached, cache_context = self._lookup_answer(qa_chain, question)
+        if cached is not None:
+            return dict(cached, result_stream=iter([cached['result']]))
+        
+        source_documents = qa_chain.retriever.invoke(question)
+        prompt, context_stats = self._build_prompt(qa_chain, question, source_documents)
+        llm = qa_chain.combine_documents_chain.llm_chain.llm
+        return {
+            'query': question,
+            'result_stream': self._cache_stream(
+                llm, prompt, context_stats, cache_context, question, source_documents
+            ),
+            'source_documents': source_documents,
+            'context_stats': context_stats,
+            'stage_timings': self._stage_timings(qa_chain)
+        }
+    
+    def get_context_stats(self, qa_chain, source_documents):
+        """
+        Measure the retrieved context stuffed into the LLM prompt.
+        
+        Args:
+            qa_chain: RetrievalQA instance
+            source_documents: Documents sent as context
+        
+        Returns:
+            Dictionary with the number of chunks and estimated tokens
+        """
+        chars_per_token = getattr(self._base_retriever(qa_chain), 'chars_per_token', 4)
+        return {
+            'chunks': len(source_documents),
+            'tokens': sum(
+                estimate_tokens(doc.page_content, chars_per_token) for doc in source_documents
+            )
+        }
+    
+    def get_answer_cache_stats(self):
+        """
+        Get answer cache statistics.
+        
+        Returns:
+            Dictionary with hit/miss counters, or None when caching is disabled
+        """
+        if self.answer_cache is None:
+            return None
+        return self.answer_cache.get_stats()
+    
+    def _lookup_answer(self, qa_chain, question):
+        """
+        Look a question up in the answer cache.
+        
+        Returns:
+            Tuple of (cached result or None, context needed to store the answer)
+        """
+        metadata = qa_chain.metadata or {}
+        if self.answer_cache is None or metadata.get('corpus_fingerprint') is None:
+            return None, None
+        
+        with span('answer_cache') as current:
+            scope = (metadata['corpus_fingerprint'], metadata['llm_model'], metadata['temperature'])
+            vectorstore = self._base_retriever(qa_chain).vectorstore
+            query_embedding = vectorstore.embeddings.embed_query(question)
+            cached = self.answer_cache.lookup(scope, question, query_embedding)
+            current.set(cache_hits=int(cached is not None), cache_misses=int(cached is None))
+        if cached is not None:
+            cached = dict(
+                cached, query=question, cached=True,
+                context_stats={'chunks': 0, 'tokens': 0}
+            )
+        return cached, (scope, query_embedding)
+    
+    def _build_prompt(self, qa_chain, question, source_documents):
+        """
+        Stuff the retrieved documents into the chain's prompt.
+        
+        Returns:
+            Tuple of (prompt text, context stats)
+        """
+        with span('prompt', chunks=len(source_documents)) as current:
+            stuff_chain = qa_chain.combine_documents_chain
+            context = stuff_chain.document_separator.join(
+                format_document(doc, stuff_chain.document_prompt)
+                for doc in source_documents
+            )
+            prompt = stuff_chain.llm_chain.prompt.format(**{
+                stuff_chain.document_variable_name: context,
+                'question': question
+            })
+            context_stats = self.get_context_stats(qa_chain, source_documents)
+            current.set(prompt_tokens=context_stats['tokens'])
+        return prompt, context_stats
+    
+    def _base_retriever(self, qa_chain):
+        """Return the retriever underneath any compression or rerank wrappers."""
+        retriever = qa_chain.retriever
+        while hasattr(retriever, 'base_retriever'):
+            retriever = retriever.base_retriever
+        return retriever
+    
+    def _stage_timings(self, qa_chain):
+        """Return the rerank stage timings of the last retrieval, if reranking."""
+        retriever = qa_chain.retriever
+        while retriever is not None:
+            if isinstance(retriever, RerankingRetriever):
+                return retriever.get_last_timings()
+            retriever = getattr(retriever, 'base_retriever', None)
+        return None
+    
+    def _store_answer(self, cache_context, question, answer, source_documents):
+        if cache_context is None:
+            return
+        scope, query_embedding = cache_context
+        self.answer_cache.store(scope, question, query_embedding, {
+            'result': answer,
+            'source_documents': source_documents
+        })
+    
+    def _cache_stream(self, llm, prompt, context_stats, cache_context, question, source_documents):
+        """Stream the answer's tokens, caching the answer once the stream completes."""
+        parts = []
+        with span('generate', prompt_tokens=context_stats['tokens']) as current:
+            for token in llm.stream(prompt):
+                if not parts:
+                    first_token_seconds = time.perf_counter() - current.started
+                    current.set(first_token_seconds=first_token_seconds)
+                    get_metrics().observe("time_to_first_token_seconds", first_token_seconds)
+                parts.append(token)
+                yield token
+            current.set(answer_tokens=estimate_tokens("".join(parts)))
+        self._store_answer(cache_context, question, "".join(parts), source_documents)
+    
     def format_sources(self, source_documents, max_length=400):
         """
         Format source documents for display.
@@ -70,7 +424,7 @@ class QAChain:
         Args:
             source_documents: List of source documents
             max_length: Maximum length of each source preview
-            
+        
         Returns:
             List of formatted source information
         """
@@ -80,7 +434,7 @@ class QAChain:
             content_preview = doc.page_content[:max_length]
             if len(doc.page_content) > max_length:
                 content_preview += "..."
-                
+            
             formatted_sources.append({
                 'index': i,
                 'content': content_preview,
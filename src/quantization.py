@@ -0,0 +1,256 @@
+import numpy as np
+
+# Where the sign and 15 exponent/mantissa bits of a float16 land after a 13-bit shift
+FLOAT16_FIELDS = np.array(0x8FFFE000, dtype=np.uint32).view(np.int32)
+
+class VectorCodec:
+    """Interface for compressed vector encodings used by the local indexes."""
+    
+    name = None
+    dtype = np.float32
+    train_size = 0
+    
+    @property
+    def is_trained(self):
+        return True
+    
+    def get_state(self):
+        """
+        Get the fitted parameters, for saving alongside the codes.
+        
+        Returns:
+            Dictionary of parameter name to NumPy array
+        """
+        return {}
+    
+    def set_state(self, state):
+        """
+        Restore parameters returned by get_state.
+        
+        Args:
+            state: Dictionary of parameter name to NumPy array
+        """
+    
+    def train(self, vectors):
+        """
+        Fit the codec's parameters.
+        
+        Args:
+            vectors: 2-D float32 array of training vectors
+        """
+    
+    def encode(self, vectors):
+        """
+        Compress vectors.
+        
+        Args:
+            vectors: 2-D float32 array
+        
+        Returns:
+            2-D array of codes, one row per vector
+        """
+        raise NotImplementedError
+    
+    def decode(self, codes):
+        """
+        Reconstruct approximate vectors from codes.
+        
+        Args:
+            codes: 2-D array of codes
+        
+        Returns:
+            2-D float32 array
+        """
+        raise NotImplementedError
+    
+    def inner_products(self, query, codes):
+        """
+        Inner products between a query and encoded vectors, computed on the codes.
+        
+        Args:
+            query: 1-D float32 query vector
+            codes: 2-D array of codes
+        
+        Returns:
+            1-D float32 array of approximate inner products
+        """
+        raise NotImplementedError
+
+class Float16Codec(VectorCodec):
+    """Half-precision storage: 2 bytes per dimension."""
+    
+    name = "float16"
+    dtype = np.float16
+    
+    def encode(self, vectors):
+        return np.asarray(vectors, dtype=np.float16)
+    
+    def decode(self, codes):
+        return np.asarray(codes, dtype=np.float32)
+    
+    def inner_products(self, query, codes, batch_size=512):
+        # NumPy converts float16 to float32 one element at a time, which costs
+        # more than the dot product. Instead, each code's bits are moved into
+        # the float32 sign, exponent and mantissa fields, which reads as the
+        # value times 2**-112 (subnormals included), and the query is scaled
+        # by 2**112 to compensate, so the scores come out exact.
+        query = np.asarray(query, dtype=np.float32) * np.float32(2.0 ** 112)
+        bits = np.asarray(codes).view(np.int16)
+        scores = np.empty(len(bits), dtype=np.float32)
+        block = np.empty((min(batch_size, len(bits)), bits.shape[1]), dtype=np.int32)
+        for start in range(0, len(bits), batch_size):
+            rows = block[:len(bits[start:start + batch_size])]
+            np.left_shift(bits[start:start + batch_size], 13, out=rows, dtype=np.int32)
+            np.bitwise_and(rows, FLOAT16_FIELDS, out=rows)
+            np.dot(rows.view(np.float32), query, out=scores[start:start + len(rows)])
+        return scores
+
+class Int8Codec(VectorCodec):
+    """Scalar quantization to int8 with a per-dimension offset and scale: 1 byte per dimension."""
+    
+    name = "int8"
+    dtype = np.int8
+    
+    def __init__(self, train_size=10000):
+        self.train_size = train_size
+        self.offset = None
+        self.scale = None
+    
+    @property
+    def is_trained(self):
+        return self.scale is not None
+    
+    def get_state(self):
+        return {'offset': self.offset, 'scale': self.scale}
+    
+    def set_state(self, state):
+        self.offset = np.asarray(state['offset'], dtype=np.float32)
+        self.scale = np.asarray(state['scale'], dtype=np.float32)
+    
+    def train(self, vectors):
+        """Map each dimension's observed range onto [-127, 127]."""
+        low = vectors.min(axis=0)
+        high = vectors.max(axis=0)
+        self.offset = ((high + low) / 2).astype(np.float32)
+        self.scale = np.maximum((high - low) / 254, 1e-12).astype(np.float32)
+    
+    def encode(self, vectors):
+        codes = np.rint((np.asarray(vectors, dtype=np.float32) - self.offset) / self.scale)
+        return np.clip(codes, -127, 127).astype(np.int8)
+    
+    def decode(self, codes):
+        return codes.astype(np.float32) * self.scale + self.offset
+    
+    def inner_products(self, query, codes, batch_size=4096):
+        # q . (offset + scale * c) = q . offset + (q * scale) . c
+        query = np.asarray(query, dtype=np.float32)
+        scaled_query = query * self.scale
+        bias = float(query @ self.offset)
+        return np.concatenate([
+            codes[start:start + batch_size].astype(np.float32) @ scaled_query
+            for start in range(0, max(len(codes), 1), batch_size)
+        ]) + bias
+
+class ProductQuantizer(VectorCodec):
+    """Product quantization: one byte per subspace, scored with per-query lookup tables."""
+    
+    name = "pq"
+    dtype = np.uint8
+    
+    def __init__(self, subspaces=64, centroids=256, iterations=10, train_size=20000, seed=0):
+        self.subspaces = subspaces
+        self.centroids = centroids
+        self.iterations = iterations
+        self.train_size = train_size
+        self.seed = seed
+        self.codebooks = None
+    
+    @property
+    def is_trained(self):
+        return self.codebooks is not None
+    
+    def get_state(self):
+        return {'codebooks': self.codebooks}
+    
+    def set_state(self, state):
+        self.codebooks = np.asarray(state['codebooks'], dtype=np.float32)
+        self.subspaces, self.centroids = self.codebooks.shape[:2]
+    
+    def train(self, vectors):
+        """Run k-means independently in each subspace."""
+        vectors = self._split(vectors)
+        rng = np.random.default_rng(self.seed)
+        centroids = min(self.centroids, len(vectors))
+        codebooks = []
+        for sub in range(self.subspaces):
+            points = vectors[:, sub]
+            codebook = points[rng.choice(len(points), centroids, replace=False)].copy()
+            for _ in range(self.iterations):
+                assignments = self._nearest(points, codebook)
+                order = np.argsort(assignments, kind='stable')
+                # Empty clusters keep their previous centroid
+                filled, starts = np.unique(assignments[order], return_index=True)
+                counts = np.diff(np.append(starts, len(points)))
+                codebook[filled] = np.add.reduceat(points[order], starts, axis=0) / counts[:, None]
+            codebooks.append(codebook)
+        self.codebooks = np.stack(codebooks)
+    
+    def encode(self, vectors):
+        vectors = self._split(vectors)
+        return np.stack([
+            self._nearest(vectors[:, sub], self.codebooks[sub]) for sub in range(self.subspaces)
+        ], axis=1).astype(np.uint8)
+    
+    def decode(self, codes):
+        codes = np.asarray(codes)
+        return np.concatenate([
+            self.codebooks[sub][codes[:, sub]] for sub in range(self.subspaces)
+        ], axis=1)
+    
+    def inner_products(self, query, codes, batch_size=4096):
+        # Asymmetric distance: one table of centroid . query-part per subspace
+        query = np.asarray(query, dtype=np.float32).reshape(self.subspaces, -1)
+        tables = np.einsum('skd,sd->sk', self.codebooks, query).ravel()
+        offsets = np.arange(self.subspaces, dtype=np.int32) * self.codebooks.shape[1]
+        return np.concatenate([
+            np.take(tables, codes[start:start + batch_size] + offsets).sum(axis=1)
+            for start in range(0, max(len(codes), 1), batch_size)
+        ]).astype(np.float32)
+    
+    def _split(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[1] % self.subspaces:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} is not divisible by {self.subspaces} subspaces"
+            )
+        return vectors.reshape(len(vectors), self.subspaces, -1)
+    
+    def _nearest(self, points, codebook, batch_size=65536):
+        """Index of the closest codeword to each point by Euclidean distance."""
+        norms = (codebook ** 2).sum(axis=1)
+        return np.concatenate([
+            np.argmin(norms - 2 * points[start:start + batch_size] @ codebook.T, axis=1)
+            for start in range(0, max(len(points), 1), batch_size)
+        ])
+
+def build_codec(name, pq_subspaces=64, train_size=20000):
+    """
+    Build a vector codec by name.
+    
+    Args:
+        name: None for float32, or "float16", "int8" or "pq"
+        pq_subspaces: Number of product quantization subspaces
+        train_size: Vectors collected before a trained codec is fitted
+    
+    Returns:
+        VectorCodec instance, or None for uncompressed storage
+    """
+    if name is None:
+        return None
+    if name == "float16":
+        return Float16Codec()
+    if name == "int8":
+        return Int8Codec(train_size=train_size)
+    if name == "pq":
+        return ProductQuantizer(subspaces=pq_subspaces, train_size=train_size)
+    raise ValueError(f"Unknown vector quantization: {name}")
@@ -0,0 +1,62 @@
+import math
+import numpy as np
+from src.bm25_index import tokenize
+
+class CandidateScorer:
+    """Interface for scorers used by the rerank stage."""
+    
+    def score(self, query, query_embedding, documents, embeddings):
+        """
+        Score a batch of candidate documents against a query.
+        
+        Args:
+            query: User question
+            query_embedding: Embedding vector of the question
+            documents: Candidate documents
+            embeddings: Array of candidate embeddings, one row per document
+            
+        Returns:
+            NumPy array with one score per document, higher is better
+        """
+        raise NotImplementedError
+
+class LexicalDenseScorer(CandidateScorer):
+    """Blends dense cosine similarity with IDF-weighted query term coverage."""
+    
+    def __init__(self, alpha=0.7):
+        self.alpha = alpha
+    
+    def score(self, query, query_embedding, documents, embeddings):
+        """
+        Score candidates as alpha * cosine + (1 - alpha) * lexical coverage.
+        
+        Lexical coverage is the IDF-weighted share of query terms a candidate
+        contains, with IDF taken over the candidate batch so terms that
+        appear everywhere count for little.
+        
+        Args:
+            query: User question
+            query_embedding: Embedding vector of the question
+            documents: Candidate documents
+            embeddings: Array of candidate embeddings, one row per document
+            
+        Returns:
+            NumPy array with one score per document
+        """
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_vector)
+        dense = (embeddings @ query_vector) / np.where(norms > 0, norms, 1.0)
+        
+        query_terms = sorted(set(tokenize(query)))
+        if not query_terms:
+            return dense
+        
+        presence = np.array([
+            [term in doc_terms for term in query_terms]
+            for doc_terms in (set(tokenize(doc.page_content)) for doc in documents)
+        ], dtype=np.float32)
+        doc_freq = presence.sum(axis=0)
+        idf = np.log1p(len(documents) / (1.0 + doc_freq))
+        lexical = presence @ idf / max(float(idf.sum()), math.ulp(1.0))
+        
+        return self.alpha * dense + (1 - self.alpha) * lexical
@@ -0,0 +1,215 @@
+import threading
+from config.db_config import DatabaseConfig
+
+_resources = {}
+_resource_locks = {}
+_registry_lock = threading.Lock()
+
+def get_resource(key, factory):
+    """
+    Get a process-wide shared resource, building it on first use.
+    
+    Each key has its own lock, so a slow factory only blocks callers
+    waiting for that same resource.
+    
+    Args:
+        key: Hashable resource identifier
+        factory: Zero-argument callable that builds the resource
+    
+    Returns:
+        The shared resource instance
+    """
+    resource = _resources.get(key)
+    if resource is not None:
+        return resource
+    
+    with _registry_lock:
+        lock = _resource_locks.setdefault(key, threading.Lock())
+    
+    with lock:
+        resource = _resources.get(key)
+        if resource is None:
+            resource = factory()
+            _resources[key] = resource
+    return resource
+
+def release_resources(match):
+    """
+    Forget shared resources so they are rebuilt on next use.
+    
+    Args:
+        match: Callable receiving a resource key, True for keys to forget
+    
+    Returns:
+        List of the forgotten resource instances
+    """
+    with _registry_lock:
+        keys = [key for key in list(_resources) if match(key)]
+        for key in keys:
+            _resource_locks.pop(key, None)
+        return [_resources.pop(key) for key in keys]
+
+def get_embedding_model():
+    """
+    Get the shared embedding model: Gemini behind the request scheduler and disk cache.
+    
+    Returns:
+        CachedEmbeddings instance
+    """
+    def build():
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        from src.embedding_cache import CachedEmbeddings
+        from src.vector_store import EmbeddingScheduler
+        
+        db_config = DatabaseConfig()
+        db_config.create_directories()
+        scheduler = EmbeddingScheduler(
+            GoogleGenerativeAIEmbeddings(model=db_config.EMBEDDING_MODEL),
+            batch_size=db_config.EMBEDDING_BATCH_SIZE,
+            max_in_flight=db_config.EMBEDDING_MAX_IN_FLIGHT,
+            requests_per_minute=db_config.EMBEDDING_REQUESTS_PER_MINUTE,
+            max_retries=db_config.EMBEDDING_MAX_RETRIES
+        )
+        return CachedEmbeddings(
+            scheduler,
+            model_name=db_config.EMBEDDING_MODEL,
+            cache_path=db_config.EMBEDDING_CACHE_PATH,
+            max_entries=db_config.EMBEDDING_CACHE_MAX_ENTRIES
+        )
+    
+    return get_resource('embedding_model', build)
+
+def get_llm(model, temperature):
+    """
+    Get the shared LLM client for a model and temperature.
+    
+    Args:
+        model: Gemini model name
+        temperature: Sampling temperature
+    
+    Returns:
+        GoogleGenerativeAI instance
+    """
+    def build():
+        from langchain_google_genai import GoogleGenerativeAI
+        return GoogleGenerativeAI(model=model, temperature=temperature)
+    
+    return get_resource(('llm', model, temperature), build)
+
+def get_chroma_client(persist_directory):
+    """
+    Get the shared Chroma client for a persist directory.
+    
+    One client per directory keeps a single connection pool and in-memory
+    index cache instead of one per session.
+    
+    Args:
+        persist_directory: Chroma persistence directory
+    
+    Returns:
+        chromadb client instance
+    """
+    def build():
+        import chromadb
+        return chromadb.PersistentClient(path=persist_directory)
+    
+    return get_resource(('chroma_client', persist_directory), build)
+
+def get_ingestion_jobs():
+    """
+    Get the shared ingestion job manager.
+    
+    Its worker pool lives as long as the process, so jobs keep running
+    across reruns and sessions.
+    
+    Returns:
+        IngestionJobManager instance
+    """
+    def build():
+        from config.app_config import AppConfig
+        from src.ingestion_jobs import IngestionJobManager
+        
+        app_config = AppConfig()
+        return IngestionJobManager(
+            max_workers=app_config.INGESTION_WORKERS,
+            max_finished_jobs=app_config.MAX_FINISHED_INGESTION_JOBS
+        )
+    
+    return get_resource('ingestion_jobs', build)
+
+def get_parse_pool(max_workers):
+    """
+    Get the shared PDF parsing pool with max_workers processes.
+    
+    Workers are spawned once and reused, instead of paying interpreter
+    start-up for every batch of uploads.
+    
+    Args:
+        max_workers: Number of worker processes
+    
+    Returns:
+        ParsePool instance
+    """
+    def build():
+        from src.parse_pool import ParsePool
+        return ParsePool(max_workers)
+    
+    return get_resource(('parse_pool', max_workers), build)
+
+def get_collection_registry():
+    """
+    Get the shared tracker of session collection use.
+    
+    Collections idle for longer than SESSION_TIMEOUT_HOURS are evicted.
+    
+    Returns:
+        CollectionRegistry instance
+    """
+    def build():
+        from config.app_config import AppConfig
+        from src.collection_registry import CollectionRegistry
+        
+        app_config = AppConfig()
+        return CollectionRegistry(
+            idle_seconds=app_config.SESSION_TIMEOUT_HOURS * 3600,
+            sweep_interval_seconds=app_config.COLLECTION_SWEEP_INTERVAL_SECONDS
+        )
+    
+    return get_resource('collection_registry', build)
+
+def get_metrics():
+    """
+    Get the process-wide metrics registry that instrumented stages record into.
+    
+    Returns:
+        MetricsRegistry instance
+    """
+    def build():
+        from src.instrumentation import MetricsRegistry
+        return MetricsRegistry()
+    
+    return get_resource('metrics', build)
+
+def get_metrics_exporter():
+    """
+    Get the shared metrics exporter, started on first use.
+    
+    It writes METRICS_EXPORT_PATH every METRICS_EXPORT_INTERVAL_SECONDS
+    and serves /metrics on METRICS_PORT, each only when it is set.
+    
+    Returns:
+        MetricsExporter instance
+    """
+    def build():
+        from config.app_config import AppConfig
+        from src.instrumentation import MetricsExporter
+        
+        app_config = AppConfig()
+        return MetricsExporter(
+            get_metrics(),
+            path=app_config.METRICS_EXPORT_PATH,
+            port=app_config.METRICS_PORT,
+            interval_seconds=app_config.METRICS_EXPORT_INTERVAL_SECONDS
+        ).start()
+    
+    return get_resource('metrics_exporter', build)
@@ -0,0 +1,243 @@
+import time
+from typing import Any, Optional
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+from src.instrumentation import span
+
+def build_chroma_filter(file_hashes=None, page_range=None):
+    """
+    Build a Chroma where-clause restricting a search to files and pages.
+    
+    Args:
+        file_hashes: Optional source file hashes to search
+        page_range: Optional inclusive (first, last) page numbers to search
+    
+    Returns:
+        Where-clause dictionary, or None when nothing is filtered
+    """
+    clauses = []
+    if file_hashes is not None:
+        clauses.append({'file_hash': {'$in': list(file_hashes)}})
+    if page_range is not None:
+        clauses.append({'page': {'$gte': page_range[0]}})
+        clauses.append({'page': {'$lte': page_range[1]}})
+    
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {'$and': clauses}
+
+def estimate_tokens(text, chars_per_token=4):
+    """
+    Estimate the number of LLM tokens in a text without calling the API.
+    
+    Args:
+        text: Text to measure
+        chars_per_token: Average characters per token
+    
+    Returns:
+        Estimated token count
+    """
+    return max(1, len(text) // chars_per_token)
+
+def cut_ranked(scored, min_score=None, drop_ratio=None, min_keep=0):
+    """
+    Trim a best-first list of (item, score) pairs.
+    
+    The list is cut at the first score below min_score, or at the first
+    score that falls more than drop_ratio below the one before it.
+    
+    Args:
+        scored: List of (item, score) tuples sorted by descending score
+        min_score: Optional score floor
+        drop_ratio: Optional fraction of the previous score that counts as a sharp drop
+        min_keep: Number of leading items kept regardless of score
+    
+    Returns:
+        The kept prefix of scored
+    """
+    kept = []
+    for item, score in scored:
+        if len(kept) >= min_keep:
+            if min_score is not None and score < min_score:
+                break
+            if drop_ratio is not None and kept and score < kept[-1][1] * (1 - drop_ratio):
+                break
+        kept.append((item, score))
+    return kept
+
+def cap_context(documents, max_tokens, chars_per_token=4):
+    """
+    Keep documents, best first, until the context token budget would be exceeded.
+    
+    The first document is always kept so the LLM is never sent an empty context.
+    
+    Args:
+        documents: Documents sorted best first
+        max_tokens: Optional context token budget
+        chars_per_token: Average characters per token
+    
+    Returns:
+        Prefix of documents that fits the budget
+    """
+    selected = []
+    context_tokens = 0
+    for doc in documents:
+        doc_tokens = estimate_tokens(doc.page_content, chars_per_token)
+        if selected and max_tokens is not None and context_tokens + doc_tokens > max_tokens:
+            break
+        selected.append(doc)
+        context_tokens += doc_tokens
+    return selected
+
+class HybridRetriever(BaseRetriever):
+    """Adaptive-k retriever fusing vector and BM25 search with reciprocal-rank fusion."""
+    
+    vectorstore: Any
+    keyword_index: Any = None
+    chunk_id_fn: Any
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    score_threshold: Optional[float] = None
+    drop_ratio: Optional[float] = None
+    max_context_tokens: Optional[int] = None
+    chars_per_token: int = 4
+    file_hashes: Optional[list] = None
+    page_range: Optional[tuple] = None
+    
+    def _get_relevant_documents(self, query, *, run_manager):
+        """
+        Retrieve at most k chunks, fewer when scores say the rest are irrelevant.
+        
+        Vector hits below score_threshold are dropped, and each result list
+        is cut where its scores fall sharply. The surviving lists are fused
+        with 1 / (rrf_k + rank) per chunk, so chunks ranked well by both
+        searches rise to the top while an exact identifier match found only
+        by BM25 can still make the cut. Chunks are then added best first
+        until max_context_tokens would be exceeded. The best vector hit is
+        always kept so the LLM is never sent an empty context.
+        
+        Args:
+            query: Search query
+            run_manager: Callback manager supplied by LangChain
+        
+        Returns:
+            List of relevant documents
+        """
+        with span('vector_search') as current:
+            dense_results = cut_ranked(
+                self.vectorstore.similarity_search_with_relevance_scores(
+                    query, k=self.fetch_k,
+                    filter=build_chroma_filter(self.file_hashes, self.page_range)
+                ),
+                min_score=self.score_threshold,
+                drop_ratio=self.drop_ratio,
+                min_keep=1
+            )
+            current.set(chunks=len(dense_results))
+        keyword_results = []
+        if self.keyword_index is not None:
+            with span('keyword_search') as current:
+                keyword_results = cut_ranked(
+                    self.keyword_index.search(
+                        query, k=self.fetch_k,
+                        file_hashes=self.file_hashes, page_range=self.page_range
+                    ),
+                    drop_ratio=self.drop_ratio
+                )
+                current.set(chunks=len(keyword_results))
+        
+        scores = {}
+        documents = {}
+        for rank, (doc, _) in enumerate(dense_results, 1):
+            chunk_id = self.chunk_id_fn(doc)
+            documents.setdefault(chunk_id, doc)
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+        for rank, (chunk_id, _) in enumerate(keyword_results, 1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+        
+        top_ids = sorted(scores, key=scores.get, reverse=True)[:self.k]
+        
+        # Keyword-only hits are fetched from the collection by ID
+        missing_ids = [chunk_id for chunk_id in top_ids if chunk_id not in documents]
+        if missing_ids:
+            fetched = self.vectorstore.get(ids=missing_ids, include=['documents', 'metadatas'])
+            for chunk_id, text, metadata in zip(
+                fetched['ids'], fetched['documents'], fetched['metadatas']
+            ):
+                documents[chunk_id] = Document(page_content=text, metadata=metadata or {})
+        
+        return cap_context(
+            [documents[chunk_id] for chunk_id in top_ids if chunk_id in documents],
+            self.max_context_tokens,
+            self.chars_per_token
+        )
+
+class RerankingRetriever(BaseRetriever):
+    """Rescores over-fetched candidates with a CPU-only scorer and keeps the best k."""
+    
+    base_retriever: Any
+    scorer: Any
+    k: int = 4
+    max_context_tokens: Optional[int] = None
+    chars_per_token: int = 4
+    _last_timings: dict = PrivateAttr(default_factory=dict)
+    
+    def _get_relevant_documents(self, query, *, run_manager):
+        """
+        Retrieve candidates from the base retriever and keep the top k after rescoring.
+        
+        Args:
+            query: Search query
+            run_manager: Callback manager supplied by LangChain
+        
+        Returns:
+            List of relevant documents
+        """
+        started = time.perf_counter()
+        candidates = self.base_retriever.invoke(query)
+        retrieved = time.perf_counter()
+        
+        if len(candidates) <= 1:
+            self._last_timings = {'retrieve': retrieved - started, 'embed': 0.0, 'score': 0.0}
+            return cap_context(candidates, self.max_context_tokens, self.chars_per_token)
+        
+        with span('rerank', candidates=len(candidates)) as current:
+            vectorstore = self.base_retriever.vectorstore
+            query_embedding = vectorstore.embeddings.embed_query(query)
+            chunk_ids = [self.base_retriever.chunk_id_fn(doc) for doc in candidates]
+            stored = vectorstore.get(ids=chunk_ids, include=['embeddings'])
+            by_id = dict(zip(stored['ids'], stored['embeddings']))
+            embeddings = np.array([
+                by_id[chunk_id] if chunk_id in by_id else np.zeros(len(query_embedding))
+                for chunk_id in chunk_ids
+            ], dtype=np.float32)
+            embedded = time.perf_counter()
+            
+            scores = self.scorer.score(query, query_embedding, candidates, embeddings)
+            order = np.argsort(-scores, kind='stable')[:self.k]
+            scored = time.perf_counter()
+            
+            self._last_timings = {
+                'retrieve': retrieved - started,
+                'embed': embedded - retrieved,
+                'score': scored - embedded
+            }
+            results = cap_context(
+                [candidates[i] for i in order], self.max_context_tokens, self.chars_per_token
+            )
+            current.set(chunks=len(results))
+            return results
+    
+    def get_last_timings(self):
+        """
+        Get the per-stage timings of the most recent retrieval.
+        
+        Returns:
+            Dictionary of stage name to seconds
+        """
+        return dict(self._last_timings)
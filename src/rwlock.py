@@ -0,0 +1,79 @@
+import threading
+from contextlib import contextmanager
+
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer, with waiting writers served first.
+    
+    Both sides are reentrant within a thread, and a thread holding the write
+    lock may also read. Upgrading a read lock to a write lock is not
+    supported and raises RuntimeError instead of deadlocking.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+    
+    @contextmanager
+    def read(self):
+        """Hold the lock shared for the duration of a with block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively for the duration of a with block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+    
+    def acquire_read(self):
+        depth = getattr(self._local, 'read_depth', 0)
+        me = threading.get_ident()
+        with self._condition:
+            # Nested reads and reads by the writer never wait, or a queued writer would deadlock them
+            if depth == 0 and self._writer != me:
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+            self._readers += 1
+        self._local.read_depth = depth + 1
+    
+    def release_read(self):
+        self._local.read_depth -= 1
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+    
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if getattr(self._local, 'read_depth', 0):
+                raise RuntimeError("Cannot take the write lock while holding the read lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+    
+    def release_write(self):
+        with self._condition:
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._condition.notify_all()
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+
+SNAPSHOT_FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, corrupt or in an unsupported format."""
+
+class StringTable:
+    """Read-only sequence of strings stored as UTF-8 bytes plus an offsets array."""
+    
+    def __init__(self, data, offsets):
+        self._data = data
+        self._offsets = offsets
+    
+    def __len__(self):
+        return len(self._offsets) - 1
+    
+    def __getitem__(self, index):
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return bytes(self._data[start:end]).decode("utf-8")
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+class JSONTable(StringTable):
+    """StringTable whose entries are JSON documents, decoded on access."""
+    
+    def __getitem__(self, index):
+        return json.loads(super().__getitem__(index))
+
+class SnapshotWriter:
+    """Writes the files of a new snapshot and publishes it atomically."""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.generation = current_generation(directory) + 1
+        self.name = f"snapshot-{self.generation:06d}"
+        self.path = os.path.join(directory, self.name + ".tmp")
+        self._files = {}
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+    
+    def add_array(self, name, array):
+        """
+        Write a NumPy array to the snapshot.
+        
+        Args:
+            name: Array name, unique within the snapshot
+            array: Array to write
+        """
+        filename = name + ".npy"
+        with open(os.path.join(self.path, filename), "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        self._files[name] = filename
+    
+    def add_strings(self, name, strings):
+        """
+        Write a sequence of strings to the snapshot, streaming them to disk.
+        
+        Args:
+            name: Table name, unique within the snapshot
+            strings: Iterable of strings
+        """
+        offsets = [0]
+        with open(os.path.join(self.path, name + ".bin"), "wb") as f:
+            for string in strings:
+                encoded = string.encode("utf-8")
+                f.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+        self._files[name] = name + ".bin"
+        self.add_array(name + ".offsets", np.array(offsets, dtype=np.int64))
+    
+    def commit(self, info, keep=2):
+        """
+        Checksum the written files and make this snapshot the current one.
+        
+        The manifest records the format version, each file's size and
+        SHA-256. CURRENT is replaced atomically, so readers always see
+        either the previous snapshot or this complete one.
+        
+        Args:
+            info: JSON-serializable details about the snapshot contents
+            keep: Number of most recent snapshots left on disk
+        
+        Returns:
+            Path of the published snapshot
+        """
+        files = {}
+        for name, filename in self._files.items():
+            file_path = os.path.join(self.path, filename)
+            files[name] = {
+                'file': filename,
+                'size': os.path.getsize(file_path),
+                'sha256': file_checksum(file_path)
+            }
+            _fsync(file_path)
+        
+        manifest = json.dumps({
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'generation': self.generation,
+            'created': time.time(),
+            'files': files,
+            'info': info
+        }, indent=1, sort_keys=True).encode("utf-8")
+        with open(os.path.join(self.path, "manifest.json"), "wb") as f:
+            f.write(manifest)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        final_path = os.path.join(self.directory, self.name)
+        os.replace(self.path, final_path)
+        
+        current_tmp = os.path.join(self.directory, CURRENT_FILE + ".tmp")
+        with open(current_tmp, "w") as f:
+            f.write(f"{self.name} {hashlib.sha256(manifest).hexdigest()}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(current_tmp, os.path.join(self.directory, CURRENT_FILE))
+        
+        self._remove_old(keep)
+        return final_path
+    
+    def abort(self):
+        """Discard a snapshot that was not committed."""
+        shutil.rmtree(self.path, ignore_errors=True)
+    
+    def _remove_old(self, keep):
+        # Processes still mapping an old snapshot keep its pages after unlinking
+        snapshots = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith("snapshot-") and not name.endswith(".tmp")
+        )
+        for name in snapshots[:-keep] if keep > 0 else snapshots:
+            if name != self.name:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+class Snapshot:
+    """An opened snapshot whose arrays are memory-mapped read-only."""
+    
+    def __init__(self, directory, verify=False):
+        """
+        Open the current snapshot of a directory.
+        
+        The manifest checksum, format version and file sizes are always
+        checked, which costs a few stat calls. verify=True also re-hashes
+        every file, which reads the whole snapshot.
+        
+        Args:
+            directory: Directory holding CURRENT and the snapshot folders
+            verify: Whether to check every file's SHA-256
+        
+        Raises:
+            SnapshotError: If there is no snapshot or it fails a check
+        """
+        name, manifest_checksum = read_current(directory)
+        self.name = name
+        self.path = os.path.join(directory, name)
+        
+        try:
+            with open(os.path.join(self.path, "manifest.json"), "rb") as f:
+                manifest_bytes = f.read()
+        except OSError as e:
+            raise SnapshotError(f"Snapshot {name} has no manifest: {e}")
+        if hashlib.sha256(manifest_bytes).hexdigest() != manifest_checksum:
+            raise SnapshotError(f"Snapshot {name} manifest checksum mismatch")
+        
+        self.manifest = json.loads(manifest_bytes)
+        if self.manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotError(
+                f"Snapshot {name} has format version {self.manifest.get('format_version')}, "
+                f"expected {SNAPSHOT_FORMAT_VERSION}"
+            )
+        
+        for entry in self.manifest['files'].values():
+            file_path = os.path.join(self.path, entry['file'])
+            if not os.path.exists(file_path) or os.path.getsize(file_path) != entry['size']:
+                raise SnapshotError(f"Snapshot {name} file {entry['file']} is missing or truncated")
+        if verify:
+            self.verify()
+    
+    @property
+    def info(self):
+        return self.manifest['info']
+    
+    @property
+    def generation(self):
+        return self.manifest['generation']
+    
+    def has(self, name):
+        return name in self.manifest['files']
+    
+    def array(self, name):
+        """
+        Memory-map an array of the snapshot.
+        
+        Args:
+            name: Array name
+        
+        Returns:
+            Read-only NumPy memmap
+        """
+        entry = self.manifest['files'][name]
+        return np.load(os.path.join(self.path, entry['file']), mmap_mode='r')
+    
+    def strings(self, name, table_class=StringTable):
+        """
+        Memory-map a string table of the snapshot.
+        
+        Args:
+            name: Table name
+            table_class: StringTable or JSONTable
+        
+        Returns:
+            Read-only table decoding entries on access
+        """
+        entry = self.manifest['files'][name]
+        file_path = os.path.join(self.path, entry['file'])
+        if entry['size'] == 0:
+            data = np.empty(0, dtype=np.uint8)
+        else:
+            data = np.memmap(file_path, dtype=np.uint8, mode='r')
+        return table_class(data, self.array(name + ".offsets"))
+    
+    def verify(self):
+        """
+        Check every file against its recorded SHA-256.
+        
+        Raises:
+            SnapshotError: On the first mismatch
+        """
+        for entry in self.manifest['files'].values():
+            if file_checksum(os.path.join(self.path, entry['file'])) != entry['sha256']:
+                raise SnapshotError(f"Snapshot {self.name} file {entry['file']} checksum mismatch")
+
+def read_current(directory):
+    """
+    Read which snapshot is current.
+    
+    Args:
+        directory: Snapshot directory
+    
+    Returns:
+        Tuple of (snapshot name, manifest SHA-256)
+    
+    Raises:
+        SnapshotError: If no snapshot has been published
+    """
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            name, checksum = f.read().split()
+    except (OSError, ValueError):
+        raise SnapshotError(f"No snapshot in {directory}")
+    return name, checksum
+
+def current_generation(directory):
+    """
+    Get the generation number of the current snapshot.
+    
+    Args:
+        directory: Snapshot directory
+    
+    Returns:
+        Generation number, 0 if there is no snapshot
+    """
+    try:
+        name, _ = read_current(directory)
+    except SnapshotError:
+        return 0
+    return int(name.rsplit("-", 1)[1])
+
+def file_checksum(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _fsync(path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
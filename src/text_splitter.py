@@ -0,0 +1,161 @@
+import re
+from langchain_core.documents import Document
+
+BLANK_LINE = re.compile(r"\n[ \t]*\n\s*")
+LEADING_SPACE = re.compile(r"\s*")
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s+")
+WHITESPACE = re.compile(r"\s+")
+MAX_HEADING_LENGTH = 80
+HEADING_PATTERN = re.compile(
+    r"\s*(?:"
+    r"#{1,6}\s+\S.*"                                  # Markdown heading
+    r"|(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.)\s+[A-Z]\S.{0,70}"  # Numbered: "2.1 Scope", "IV. Terms"
+    r"|[A-Z][A-Z0-9 ,:&()/-]{2,70}"                  # ALL CAPS line
+    r")\s*$"
+)
+
+class StructuredTextSplitter:
+    """Splits pages on headings, paragraphs and sentences into evenly sized chunks."""
+    
+    def __init__(self, chunk_size=800, chunk_overlap=50, max_tokens=2048, chars_per_token=4):
+        self.chunk_size = min(chunk_size, max_tokens * chars_per_token)
+        self.chunk_overlap = min(chunk_overlap, self.chunk_size // 2)
+        self.min_chunk_size = self.chunk_size // 4
+    
+    def split_documents(self, documents):
+        """
+        Split documents into chunks.
+        
+        Args:
+            documents: List of page documents
+        
+        Returns:
+            List of document chunks
+        """
+        return list(self.iter_chunks(documents))
+    
+    def iter_chunks(self, documents):
+        """
+        Lazily split a stream of pages into chunks.
+        
+        Each chunk is a contiguous slice of its page, so start_index and the
+        chunk length locate it exactly; the nearest preceding heading is
+        recorded as 'section'.
+        
+        Args:
+            documents: Iterable of page documents
+        
+        Yields:
+            Document chunks in page order
+        """
+        for doc in documents:
+            text = doc.page_content
+            for start, end, section in self._chunk_spans(text):
+                metadata = dict(doc.metadata, start_index=start)
+                if section:
+                    metadata['section'] = section
+                yield Document(page_content=text[start:end], metadata=metadata)
+    
+    def _chunk_spans(self, text):
+        """Pack structural units of a page into (start, end, section) spans."""
+        units = self._units(text)
+        if not units:
+            return
+        
+        section = None
+        chunk_section = None
+        first = 0
+        chunk_start = chunk_end = units[0][0]
+        for idx, (start, end, is_heading) in enumerate(units):
+            if idx > first:
+                # Headings open a new chunk unless the current one is still tiny
+                starts_section = is_heading and chunk_end - chunk_start >= self.min_chunk_size
+                if starts_section or end - chunk_start > self.chunk_size:
+                    yield chunk_start, chunk_end, chunk_section
+                    # A new section starts clean, without text carried over from the last one
+                    first = idx if starts_section else self._overlap_start(units, first, idx)
+                    chunk_start = units[first][0]
+                    chunk_section = section
+            
+            if is_heading:
+                section = " ".join(text[start:end].split()).lstrip("# ")
+            if idx == first:
+                chunk_section = section
+            chunk_end = end
+        
+        yield chunk_start, chunk_end, chunk_section
+    
+    def _overlap_start(self, units, first, idx):
+        """
+        Pick the first unit of the next chunk so it repeats at most chunk_overlap characters.
+        
+        The overlap is dropped when it would leave no room for units[idx],
+        which would otherwise end up in a chunk made only of repeated text.
+        """
+        chunk_end = units[idx - 1][1]
+        next_end = units[idx][1]
+        for candidate in range(first + 1, idx):
+            if units[candidate][2] or chunk_end - units[candidate][0] > self.chunk_overlap:
+                continue
+            if next_end - units[candidate][0] <= self.chunk_size:
+                return candidate
+        return idx
+    
+    def _units(self, text):
+        """List the (start, end, is_heading) spans of a page, none longer than chunk_size, in order."""
+        units = []
+        start = LEADING_SPACE.match(text).end()
+        # Separators take the whitespace after them, so blocks start stripped
+        for separator in BLANK_LINE.finditer(text, start):
+            self._add_block_units(units, text, start, separator.start())
+            start = separator.end()
+        self._add_block_units(units, text, start, len(text))
+        return units
+    
+    def _add_block_units(self, units, text, start, end):
+        """Append the heading and paragraph units of one blank-line separated block."""
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            return
+        
+        # A heading usually sits on the first line of its block
+        line_end = text.find("\n", start, end)
+        if line_end == -1:
+            line_end = end
+        if line_end - start <= MAX_HEADING_LENGTH and HEADING_PATTERN.match(text, start, line_end):
+            units.append((start, line_end, True))
+            if line_end == end:
+                return
+            start = LEADING_SPACE.match(text, line_end, end).end()
+        
+        if end - start <= self.chunk_size:
+            units.append((start, end, False))
+            return
+        
+        # Oversized paragraph: split at sentence ends, hard-wrapping long sentences
+        for boundary in SENTENCE_END.finditer(text, start, end):
+            sentence_end = boundary.start() + 1
+            if sentence_end - start <= self.chunk_size:
+                units.append((start, sentence_end, False))
+            else:
+                self._add_wrapped(units, text, start, sentence_end)
+            start = boundary.end()
+        if start < end:
+            self._add_wrapped(units, text, start, end)
+    
+    def _add_wrapped(self, units, text, start, end):
+        """Append a sentence span, cut at whitespace if it exceeds chunk_size."""
+        while end - start > self.chunk_size:
+            limit = start + self.chunk_size
+            cut = None
+            for space in WHITESPACE.finditer(text, start + self.chunk_size // 2, limit):
+                cut = space
+            if cut is None:
+                units.append((start, limit, False))
+                start = limit
+            else:
+                units.append((start, cut.start(), False))
+                start = cut.end()
+        if end > start:
+            units.append((start, end, False))
@@ -0,0 +1,482 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore as BaseVectorStore
+from src.rwlock import ReadWriteLock
+from src.snapshot import JSONTable, Snapshot, SnapshotWriter, current_generation
+from src.vector_index import ExactIndex
+
+class LocalVectorStore(BaseVectorStore):
+    """
+    In-process vector store over a NumPy index, with the same calls as ChromaBackend.
+    
+    Searches and reads run concurrently under a reader/writer lock; changes
+    take it exclusively, one batch at a time, so queries interleave with a
+    long ingestion.
+    """
+    
+    # Metadata columns saved in snapshots so filters never decode the chunk store
+    SNAPSHOT_COLUMNS = (('file_hash', False), ('page', True))
+    
+    def __init__(self, embedding_function, index=None, persist_directory=None,
+                 relevance_score_fn=None, verify_checksums=False, snapshots_to_keep=2):
+        self._embedding_function = embedding_function
+        self.index = index if index is not None else ExactIndex()
+        self.persist_directory = persist_directory
+        self.override_relevance_score_fn = relevance_score_fn
+        self.verify_checksums = verify_checksums
+        self.snapshots_to_keep = snapshots_to_keep
+        self.reloads = 0
+        self.lock = ReadWriteLock()
+        self._persist_lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+        self._ids = []
+        self._rows = {}
+        self._texts = []
+        self._metadatas = []
+        self._live = bytearray()
+        self._live_count = 0
+        self._id_lookup = None
+        self._columns = {}
+        self._dirty = False
+        
+        if persist_directory is None:
+            return
+        if current_generation(persist_directory) > 0:
+            self._open(Snapshot(persist_directory, verify=verify_checksums))
+        elif os.path.exists(os.path.join(persist_directory, "chunks.json")):
+            self._load_json()
+    
+    @property
+    def embeddings(self):
+        return self._embedding_function
+    
+    def __len__(self):
+        return self._live_count
+    
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        """Build an in-memory store from texts."""
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+    
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        """
+        Embed and store texts.
+        
+        Args:
+            texts: Texts to add
+            metadatas: Optional metadata per text
+            ids: Optional IDs per text; existing IDs are overwritten
+        
+        Returns:
+            List of IDs of the added texts
+        """
+        texts = list(texts)
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        if metadatas is None:
+            metadatas = [{} for _ in texts]
+        self.upsert(ids, self._embedding_function.embed_documents(texts), texts, metadatas)
+        return list(ids)
+    
+    def upsert(self, ids, embeddings, documents, metadatas):
+        """
+        Insert or overwrite chunks whose embeddings were computed ahead of time.
+        
+        Args:
+            ids: Chunk IDs
+            embeddings: Embedding vectors matching ids
+            documents: Chunk texts matching ids
+            metadatas: Chunk metadata matching ids
+        """
+        with self.lock.write():
+            self._materialize()
+            self._remove(ids)
+            rows = self.index.add(embeddings)
+            for row, chunk_id, text, metadata in zip(rows, ids, documents, metadatas):
+                self._rows[chunk_id] = int(row)
+                self._ids.append(chunk_id)
+                self._texts.append(text)
+                self._metadatas.append(dict(metadata or {}))
+                self._live.append(1)
+            self._live_count += len(rows)
+            self._changed()
+    
+    def delete(self, ids=None, **kwargs):
+        """
+        Delete chunks by ID.
+        
+        Deleted rows are tombstoned and physically dropped once they
+        outnumber live rows.
+        
+        Args:
+            ids: Chunk IDs to delete
+        """
+        if not ids:
+            return
+        with self.lock.write():
+            self._materialize()
+            self._remove(ids)
+            if len(self._ids) - self._live_count > max(self._live_count, 1024):
+                self._compact()
+            self._changed()
+    
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        """
+        Read stored chunks, like Chroma's collection.get.
+        
+        Args:
+            ids: Optional chunk IDs to read, in the order returned
+            where: Optional Chroma-style metadata filter
+            limit: Optional maximum number of chunks
+            offset: Optional number of matching chunks to skip
+            include: Fields to return from 'documents', 'metadatas' and 'embeddings'
+        
+        Returns:
+            Dictionary with 'ids' and the included fields, each a list aligned with 'ids'
+        """
+        if include is None:
+            include = ['documents', 'metadatas']
+        
+        with self.lock.read():
+            if ids is not None:
+                rows = [row for row in (self._row_of(chunk_id) for chunk_id in ids) if row is not None]
+                if where is not None:
+                    mask = self._where_mask(where)
+                    rows = [row for row in rows if mask[row]]
+            else:
+                mask = np.frombuffer(self._live, dtype=np.uint8).astype(bool)
+                if where is not None:
+                    mask &= self._where_mask(where)
+                rows = np.flatnonzero(mask).tolist()
+            
+            start = offset or 0
+            rows = rows[start:start + limit] if limit is not None else rows[start:]
+            return {
+                'ids': [self._ids[row] for row in rows],
+                'documents': [self._texts[row] for row in rows] if 'documents' in include else None,
+                'metadatas': [self._metadatas[row] for row in rows] if 'metadatas' in include else None,
+                'embeddings': self.index.get(rows) if 'embeddings' in include else None
+            }
+    
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        """
+        Find the chunks most similar to a query.
+        
+        Args:
+            query: Search query
+            k: Number of results
+            filter: Optional Chroma-style metadata filter
+        
+        Returns:
+            List of documents, best first
+        """
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter=filter)]
+    
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        """
+        Find the chunks most similar to a query with their distances.
+        
+        Distances are squared Euclidean between unit vectors, matching what
+        Chroma reports, so relevance_score_fn works for both backends.
+        
+        Args:
+            query: Search query
+            k: Number of results
+            filter: Optional Chroma-style metadata filter
+        
+        Returns:
+            List of (document, distance) tuples, best first
+        """
+        return self.similarity_search_by_vector_with_score(
+            self._embedding_function.embed_query(query), k, filter=filter
+        )
+    
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None):
+        """
+        Find the chunks closest to an embedding.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results
+            filter: Optional Chroma-style metadata filter
+        
+        Returns:
+            List of (document, distance) tuples, best first
+        """
+        with self.lock.read():
+            mask = np.frombuffer(self._live, dtype=np.uint8).astype(bool)
+            if filter is not None:
+                mask &= self._where_mask(filter)
+            rows, scores = self.index.search(embedding, k, mask=mask)
+            return [
+                (
+                    Document(page_content=self._texts[row], metadata=dict(self._metadatas[row])),
+                    float(2.0 - 2.0 * score)
+                )
+                for row, score in zip(rows, scores)
+            ]
+    
+    def persist(self):
+        """
+        Publish the store as a new snapshot if it changed, then serve from it.
+        
+        The snapshot is written next to the previous ones and made current
+        atomically. It is written under the read lock, so searches continue
+        meanwhile. Afterwards the in-heap copy is dropped and the store reads
+        the new snapshot through memory maps, unless it changed again while
+        the snapshot was written.
+        """
+        if self.persist_directory is None:
+            return
+        with self._persist_lock:
+            with self.lock.write():
+                if not self._dirty:
+                    return
+                if len(self._ids) > self._live_count:
+                    self._compact()
+            
+            with self.lock.read():
+                version = self._version
+                os.makedirs(self.persist_directory, exist_ok=True)
+                writer = SnapshotWriter(self.persist_directory)
+                try:
+                    writer.add_strings("store.ids", self._ids)
+                    writer.add_strings("store.texts", self._texts)
+                    writer.add_strings(
+                        "store.metadatas",
+                        (json.dumps(metadata, separators=(",", ":")) for metadata in self._metadatas)
+                    )
+                    hashes = np.fromiter((id_hash(chunk_id) for chunk_id in self._ids),
+                                         dtype=np.uint64, count=len(self._ids))
+                    order = np.argsort(hashes, kind='stable')
+                    writer.add_array("store.id_hashes", hashes[order])
+                    writer.add_array("store.id_rows", order.astype(np.int64))
+                    for field, numeric in self.SNAPSHOT_COLUMNS:
+                        column = self._column(field, numeric)
+                        if numeric:
+                            writer.add_array(f"store.column.{field}", column)
+                        else:
+                            codes, values = column
+                            writer.add_array(f"store.column.{field}", codes)
+                            writer.add_strings(
+                                f"store.column.{field}.values",
+                                (json.dumps(value) for value in values)
+                            )
+                    info = {'count': len(self._ids), 'index': self.index.write_snapshot(writer)}
+                    writer.commit(info, keep=self.snapshots_to_keep)
+                except BaseException:
+                    writer.abort()
+                    raise
+            
+            with self.lock.write():
+                # Writes that landed meanwhile stay in the heap until the next persist
+                if self._version == version and self.persist_directory is not None:
+                    self._open(Snapshot(self.persist_directory))
+    
+    def refresh(self):
+        """
+        Switch to a newer snapshot published by another process.
+        
+        Does nothing while this store has unsaved changes.
+        
+        Returns:
+            True if a newer snapshot was opened
+        """
+        if self.persist_directory is None or self._dirty:
+            return False
+        generation = current_generation(self.persist_directory)
+        if generation == 0 or (self._snapshot is not None and generation == self._snapshot.generation):
+            return False
+        with self.lock.write():
+            self._open(Snapshot(self.persist_directory, verify=self.verify_checksums))
+            self.reloads += 1
+        return True
+    
+    def drop(self):
+        """
+        Empty the store and delete its snapshots.
+        
+        Waits for searches in progress. Afterwards the store only lives in
+        memory, so a writer still holding it cannot recreate the directory.
+        """
+        with self._persist_lock, self.lock.write():
+            persist_directory = self.persist_directory
+            self.persist_directory = None
+            self.index.clear()
+            self._snapshot = None
+            self._ids = []
+            self._rows = {}
+            self._texts = []
+            self._metadatas = []
+            self._live = bytearray()
+            self._live_count = 0
+            self._id_lookup = None
+            self._changed()
+            if persist_directory is not None and os.path.exists(persist_directory):
+                shutil.rmtree(persist_directory)
+    
+    def _select_relevance_score_fn(self):
+        if self.override_relevance_score_fn is None:
+            return self._euclidean_relevance_score_fn
+        return self.override_relevance_score_fn
+    
+    def _open(self, snapshot):
+        """Serve reads from a snapshot's memory maps. Call with the write lock held or during init."""
+        count = snapshot.info['count']
+        self._snapshot = snapshot
+        self._ids = snapshot.strings("store.ids")
+        self._texts = snapshot.strings("store.texts")
+        self._metadatas = snapshot.strings("store.metadatas", JSONTable)
+        self._id_lookup = (snapshot.array("store.id_hashes"), snapshot.array("store.id_rows"))
+        self._rows = None
+        self._live = bytearray(b"\x01" * count)
+        self._live_count = count
+        self._columns = {}
+        for field, numeric in self.SNAPSHOT_COLUMNS:
+            column = snapshot.array(f"store.column.{field}")
+            if not numeric:
+                column = (column, list(snapshot.strings(f"store.column.{field}.values", JSONTable)))
+            self._columns[(field, numeric)] = column
+        self.index.load_snapshot(snapshot, snapshot.info['index'])
+        self._dirty = False
+    
+    def _load_json(self):
+        """Import a store saved as vectors.npy and chunks.json; persist() converts it."""
+        with open(os.path.join(self.persist_directory, "chunks.json"), encoding="utf-8") as f:
+            chunks = json.load(f)
+        vectors = np.load(os.path.join(self.persist_directory, "vectors.npy"))
+        self.upsert(chunks['ids'], vectors, chunks['documents'], chunks['metadatas'])
+    
+    def _materialize(self):
+        """Copy snapshot-backed chunks into the heap before the first change."""
+        if self._rows is not None:
+            return
+        live = self._live
+        self._ids = list(self._ids)
+        self._texts = list(self._texts)
+        self._metadatas = list(self._metadatas)
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids) if live[row]}
+        self._id_lookup = None
+    
+    def _row_of(self, chunk_id):
+        """Row of a live chunk, or None."""
+        if self._rows is not None:
+            return self._rows.get(chunk_id)
+        
+        hashes, rows = self._id_lookup
+        target = np.uint64(id_hash(chunk_id))
+        start = int(np.searchsorted(hashes, target, side='left'))
+        end = int(np.searchsorted(hashes, target, side='right'))
+        for row in rows[start:end]:
+            if self._live[row] and self._ids[row] == chunk_id:
+                return int(row)
+        return None
+    
+    def _remove(self, ids):
+        for chunk_id in ids:
+            row = self._rows.pop(chunk_id, None)
+            if row is not None:
+                self._live[row] = 0
+                self._live_count -= 1
+    
+    def _compact(self):
+        """Drop tombstoned rows and renumber the rest. Call with the write lock held."""
+        keep = np.frombuffer(self._live, dtype=np.uint8).astype(bool)
+        self.index.compact(keep)
+        self._ids = [chunk_id for chunk_id, alive in zip(self._ids, keep) if alive]
+        self._texts = [text for text, alive in zip(self._texts, keep) if alive]
+        self._metadatas = [metadata for metadata, alive in zip(self._metadatas, keep) if alive]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._live = bytearray(b"\x01" * len(self._ids))
+        self._columns = {}
+    
+    def _changed(self):
+        self._columns = {}
+        self._version += 1
+        self._dirty = True
+    
+    def _column(self, field, numeric):
+        """
+        Metadata field as arrays over rows, cached until the next change.
+        
+        Numeric columns are float64 arrays with NaN for missing values; other
+        columns are dictionary encoded as (codes, values) with code -1 for a
+        missing value.
+        """
+        key = (field, numeric)
+        column = self._columns.get(key)
+        if column is not None:
+            return column
+        
+        values = (metadata.get(field) for metadata in self._metadatas)
+        if numeric:
+            column = np.fromiter((
+                value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+                for value in values
+            ), dtype=np.float64, count=len(self._ids))
+        else:
+            distinct = {}
+            codes = np.fromiter((
+                -1 if value is None else distinct.setdefault(value, len(distinct))
+                for value in values
+            ), dtype=np.int32, count=len(self._ids))
+            column = (codes, list(distinct))
+        self._columns[key] = column
+        return column
+    
+    def _where_mask(self, where):
+        """Evaluate a Chroma-style where clause to a boolean mask over rows."""
+        if '$and' in where:
+            mask = np.ones(len(self._ids), dtype=bool)
+            for clause in where['$and']:
+                mask &= self._where_mask(clause)
+            return mask
+        if '$or' in where:
+            mask = np.zeros(len(self._ids), dtype=bool)
+            for clause in where['$or']:
+                mask |= self._where_mask(clause)
+            return mask
+        
+        mask = np.ones(len(self._ids), dtype=bool)
+        for field, condition in where.items():
+            if not isinstance(condition, dict):
+                condition = {'$eq': condition}
+            for operator, value in condition.items():
+                if operator in ('$in', '$nin', '$eq', '$ne'):
+                    codes, values = self._column(field, False)
+                    wanted = set(value) if operator in ('$in', '$nin') else {value}
+                    matches = np.isin(codes, [code for code, v in enumerate(values) if v in wanted])
+                    mask &= matches if operator in ('$in', '$eq') else ~matches
+                elif operator in ('$gt', '$gte', '$lt', '$lte'):
+                    column = self._column(field, True)
+                    with np.errstate(invalid='ignore'):
+                        mask &= {
+                            '$gt': column > value,
+                            '$gte': column >= value,
+                            '$lt': column < value,
+                            '$lte': column <= value
+                        }[operator]
+                else:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+        return mask
+
+def id_hash(chunk_id):
+    """
+    64-bit hash of a chunk ID, stable across processes.
+    
+    Args:
+        chunk_id: Chunk ID string
+    
+    Returns:
+        Unsigned 64-bit integer
+    """
+    return int.from_bytes(hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=8).digest(), "little")
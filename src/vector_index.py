@@ -0,0 +1,543 @@
+import os
+from array import array
+import numpy as np
+from src.quantization import build_codec
+
+def top_k(scores, k):
+    """
+    Positions of the k highest finite scores, best first.
+    
+    Args:
+        scores: 1-D NumPy array of scores, -inf for excluded entries
+        k: Number of positions to return
+    
+    Returns:
+        NumPy array of positions
+    """
+    if len(scores) == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64)
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return top[np.isfinite(scores[top])]
+
+class GrowableMatrix:
+    """Append-only 2-D array with amortized O(1) appends, in memory or memory-mapped."""
+    
+    def __init__(self, dtype=np.float32, path=None):
+        self.dtype = np.dtype(dtype)
+        self.path = path
+        self._data = None
+        self._size = 0
+        self._owned = True
+    
+    def __len__(self):
+        return self._size
+    
+    @property
+    def nbytes(self):
+        return self._size * (self._data.shape[1] if self._data is not None else 0) * self.dtype.itemsize
+    
+    def view(self):
+        """Array view of the filled rows."""
+        if self._data is None:
+            return np.empty((0, 0), dtype=self.dtype)
+        return self._data[:self._size]
+    
+    def append(self, values):
+        """
+        Append rows.
+        
+        Args:
+            values: 2-D array of rows
+        
+        Returns:
+            NumPy array of the row numbers assigned to the values
+        """
+        values = np.asarray(values, dtype=self.dtype)
+        if self._data is not None and values.shape[1] != self._data.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {values.shape[1]} does not match index dimension {self._data.shape[1]}"
+            )
+        needed = self._size + len(values)
+        if self._data is None or needed > len(self._data):
+            capacity = len(self._data) if self._data is not None else 0
+            self._resize(max(needed, 2 * capacity, 1024), values.shape[1])
+        rows = np.arange(self._size, needed)
+        self._data[self._size:needed] = values
+        self._size = needed
+        return rows
+    
+    def wrap(self, array):
+        """
+        Use an existing array, such as a read-only snapshot memmap, as the contents.
+        
+        The array is copied into storage of our own on the first change.
+        
+        Args:
+            array: 2-D array to wrap
+        """
+        self.close()
+        self._data = array
+        self._size = len(array)
+        self._owned = False
+    
+    def compact(self, keep, batch_size=65536):
+        """Keep only rows where keep is True, preserving their order."""
+        if self._data is None:
+            return
+        if not self._owned:
+            self._resize(self._size, self._data.shape[1])
+        keep = keep[:self._size]
+        # Rows only ever move towards the start, so copying forward in batches is safe
+        written = 0
+        for start in range(0, self._size, batch_size):
+            end = min(start + batch_size, self._size)
+            kept = self._data[start:end][keep[start:end]]
+            self._data[written:written + len(kept)] = kept
+            written += len(kept)
+        self._size = written
+    
+    def close(self):
+        """Release the contents and delete the backing file we created, if any."""
+        owned_file = self._owned and self._data is not None and self.path is not None
+        self._data = None
+        self._size = 0
+        if owned_file and os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def _resize(self, capacity, width, batch_size=65536):
+        old = self._data
+        if self.path is not None and old is not None and self._owned:
+            # Grow our own file in place
+            old.flush()
+            self._data = None
+            with open(self.path, "ab") as f:
+                f.truncate(capacity * width * self.dtype.itemsize)
+            self._data = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(capacity, width))
+            return
+        
+        if self.path is None:
+            grown = np.empty((capacity, width), dtype=self.dtype)
+        else:
+            with open(self.path, "wb") as f:
+                f.truncate(capacity * width * self.dtype.itemsize)
+            grown = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(capacity, width))
+        if old is not None:
+            for start in range(0, self._size, batch_size):
+                end = min(start + batch_size, self._size)
+                grown[start:end] = old[start:end]
+        self._data = grown
+        self._owned = True
+
+class ExactIndex:
+    """Brute-force inner-product index, optionally over compressed vectors."""
+    
+    def __init__(self, codec=None, rerank_factor=0, full_vectors_path=None):
+        self.codec = codec
+        self.rerank_factor = rerank_factor
+        self.full_vectors_path = full_vectors_path
+        # Full-precision vectors, kept while there is no trained codec or for reranking
+        self._vectors = GrowableMatrix(np.float32, full_vectors_path)
+        self._codes = None
+        self._size = 0
+    
+    def __len__(self):
+        return self._size
+    
+    def add(self, vectors):
+        """
+        Append unit-normalized vectors to the index.
+        
+        A codec that needs training is fitted once train_size vectors have
+        been collected; until then vectors are kept at full precision.
+        
+        Args:
+            vectors: 2-D array-like of embeddings
+        
+        Returns:
+            NumPy array of the row numbers assigned to the vectors
+        """
+        if len(vectors) == 0:
+            return np.empty(0, dtype=np.int64)
+        vectors = normalize(vectors)
+        
+        rows = np.arange(self._size, self._size + len(vectors))
+        if self._vectors is not None:
+            self._vectors.append(vectors)
+        if self._codes is not None:
+            self._codes.append(self.codec.encode(vectors))
+        self._size += len(vectors)
+        
+        if self.codec is not None and self._codes is None and self._size >= self.codec.train_size:
+            self._encode_all()
+        self._on_add(rows, vectors)
+        return rows
+    
+    def get(self, rows):
+        """
+        Get stored vectors by row number.
+        
+        Args:
+            rows: Row numbers
+        
+        Returns:
+            2-D float32 array, exact when full-precision vectors are kept and
+            reconstructed from the codes otherwise
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if self._vectors is not None:
+            return np.asarray(self._vectors.view()[rows])
+        return self.codec.decode(self._codes.view()[rows])
+    
+    def search(self, query, k, mask=None):
+        """
+        Find the rows most similar to a query.
+        
+        With a codec, candidates are scored on the codes; if rerank_factor is
+        set, the best k * rerank_factor are then rescored at full precision.
+        
+        Args:
+            query: Query embedding
+            k: Number of rows to return
+            mask: Optional boolean array over rows; False rows are never returned
+        
+        Returns:
+            Tuple of (row numbers, cosine similarities), best first
+        """
+        if self._size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        
+        query = normalize([query])[0]
+        candidates = self._candidates(query)
+        if candidates is not None and mask is not None:
+            candidates = candidates[mask[candidates]]
+        
+        rerank = self._codes is not None and self._vectors is not None and self.rerank_factor > 0
+        fetch_k = k * self.rerank_factor if rerank else k
+        
+        scores = self._scores(query, candidates)
+        if candidates is None and mask is not None:
+            scores[~mask[:self._size]] = -np.inf
+        best = top_k(scores, fetch_k)
+        rows = best if candidates is None else candidates[best]
+        
+        if not rerank:
+            return rows, scores[best]
+        exact_scores = np.asarray(self._vectors.view()[rows]) @ query
+        best = top_k(exact_scores, k)
+        return rows[best], exact_scores[best]
+    
+    def compact(self, keep):
+        """
+        Drop rows and renumber the rest in order.
+        
+        Args:
+            keep: Boolean array over rows, True for rows to keep
+        """
+        keep = keep[:self._size]
+        if self._vectors is not None:
+            self._vectors.compact(keep)
+        if self._codes is not None:
+            self._codes.compact(keep)
+        self._size = int(np.count_nonzero(keep))
+        self._on_compact(keep)
+    
+    def clear(self):
+        """Remove every vector, releasing memory and the full-precision vector file."""
+        self._reset()
+    
+    def memory_usage(self):
+        """
+        Report the bytes held by the index.
+        
+        Returns:
+            Dictionary with code bytes, full-precision bytes (on disk when
+            memory-mapped) and bytes per vector searched
+        """
+        code_bytes = self._codes.nbytes if self._codes is not None else 0
+        full_bytes = self._vectors.nbytes if self._vectors is not None else 0
+        searched_bytes = code_bytes if self._codes is not None else full_bytes
+        return {
+            'vectors': self._size,
+            'code_bytes': code_bytes,
+            'full_precision_bytes': full_bytes,
+            'bytes_per_vector': searched_bytes / self._size if self._size else 0.0
+        }
+    
+    def write_snapshot(self, writer, prefix="index."):
+        """
+        Write the index's arrays to a snapshot.
+        
+        Args:
+            writer: SnapshotWriter
+            prefix: Name prefix for the index's arrays
+        
+        Returns:
+            Dictionary describing the index, stored in the manifest
+        """
+        info = {'size': self._size, 'codec': None}
+        if self._vectors is not None:
+            writer.add_array(prefix + "vectors", self._vectors.view())
+        if self._codes is not None:
+            info['codec'] = self.codec.name
+            writer.add_array(prefix + "codes", self._codes.view())
+            for name, value in self.codec.get_state().items():
+                writer.add_array(prefix + "codec." + name, value)
+        return info
+    
+    def load_snapshot(self, snapshot, info, prefix="index."):
+        """
+        Replace the index contents with memory-mapped snapshot arrays.
+        
+        Nothing is copied into the heap unless the snapshot was written with
+        a different codec than this index uses, in which case the vectors
+        are re-encoded.
+        
+        Args:
+            snapshot: Opened Snapshot
+            info: Dictionary returned by write_snapshot
+            prefix: Name prefix of the index's arrays
+        
+        Returns:
+            True if the snapshot arrays are used as they are, False if the index was rebuilt
+        """
+        self._reset()
+        codec_state = {
+            name[len(prefix + "codec."):]: np.asarray(snapshot.array(name))
+            for name in snapshot.manifest['files'] if name.startswith(prefix + "codec.")
+        }
+        codec_name = self.codec.name if self.codec is not None else None
+        
+        if info['codec'] is not None and info['codec'] != codec_name:
+            # Written with another codec: rebuild from what the snapshot holds
+            if snapshot.has(prefix + "vectors"):
+                source = snapshot.array(prefix + "vectors")
+                decode = np.asarray
+            else:
+                source = snapshot.array(prefix + "codes")
+                other_codec = build_codec(info['codec'])
+                other_codec.set_state(codec_state)
+                decode = other_codec.decode
+            for start in range(0, info['size'], 65536):
+                self.add(decode(np.asarray(source[start:start + 65536])))
+            return False
+        
+        if snapshot.has(prefix + "vectors"):
+            self._vectors.wrap(snapshot.array(prefix + "vectors"))
+        else:
+            self._vectors.close()
+            self._vectors = None
+        if info['codec'] is not None:
+            self.codec.set_state(codec_state)
+            self._codes = GrowableMatrix(self.codec.dtype)
+            self._codes.wrap(snapshot.array(prefix + "codes"))
+        self._size = info['size']
+        if self.codec is not None and self._codes is None and self._size >= self.codec.train_size:
+            self._encode_all()
+        return True
+    
+    def _reset(self):
+        if self._vectors is not None:
+            self._vectors.close()
+        self._vectors = GrowableMatrix(np.float32, self.full_vectors_path)
+        self._codes = None
+        self._size = 0
+    
+    def _scores(self, query, rows=None):
+        """Similarity of query to the given rows, or every row, on the searched representation."""
+        if self._codes is not None:
+            codes = self._codes.view()
+            return self.codec.inner_products(query, codes if rows is None else codes[rows])
+        vectors = self._vectors.view()
+        return (vectors if rows is None else vectors[rows]) @ query
+    
+    def _encode_all(self, batch_size=65536):
+        """Fit the codec on the first train_size vectors and encode everything."""
+        vectors = self._vectors.view()
+        if not self.codec.is_trained:
+            self.codec.train(np.asarray(vectors[:max(self.codec.train_size, 1)]))
+        
+        self._codes = GrowableMatrix(self.codec.dtype)
+        for start in range(0, self._size, batch_size):
+            self._codes.append(self.codec.encode(np.asarray(vectors[start:start + batch_size])))
+        if self.rerank_factor <= 0:
+            self._vectors.close()
+            self._vectors = None
+    
+    def _candidates(self, query):
+        """Rows worth scoring for a query, or None to score every row."""
+        return None
+    
+    def _on_add(self, rows, vectors):
+        pass
+    
+    def _on_compact(self, keep):
+        pass
+
+class IVFIndex(ExactIndex):
+    """Inverted-file index: k-means partitions, searching only the nprobe closest."""
+    
+    def __init__(self, nlist=1024, nprobe=16, min_points_per_list=39, max_points_per_list=256,
+                 iterations=10, seed=0, codec=None, rerank_factor=0, full_vectors_path=None):
+        super().__init__(codec, rerank_factor, full_vectors_path)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_points_per_list = min_points_per_list
+        self.max_points_per_list = max_points_per_list
+        self.iterations = iterations
+        self.seed = seed
+        self._centroids = None
+        self._lists = []
+        self._trained_size = 0
+    
+    @property
+    def is_trained(self):
+        return self._centroids is not None
+    
+    def clear(self):
+        super().clear()
+        self._centroids = None
+        self._lists = []
+        self._trained_size = 0
+    
+    def train(self):
+        """
+        Fit the coarse quantizer and reassign every row to its partition.
+        
+        Runs spherical k-means on a sample of at most max_points_per_list
+        rows per partition.
+        """
+        rng = np.random.default_rng(self.seed)
+        nlist = max(1, min(self.nlist, self._size // self.min_points_per_list))
+        sample_size = min(self._size, nlist * self.max_points_per_list)
+        sample = self.get(np.sort(rng.choice(self._size, sample_size, replace=False)))
+        
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignments = self._assign(sample, centroids)
+            order = np.argsort(assignments, kind='stable')
+            # Empty partitions keep their previous centroid
+            filled, starts = np.unique(assignments[order], return_index=True)
+            centroids[filled] = normalize(np.add.reduceat(sample[order], starts, axis=0))
+        
+        self._centroids = centroids
+        self._trained_size = self._size
+        self._lists = [array("I") for _ in range(nlist)]
+        for start in range(0, self._size, 65536):
+            rows = np.arange(start, min(start + 65536, self._size))
+            self._append_to_lists(rows, self._assign(self.get(rows), centroids))
+    
+    def write_snapshot(self, writer, prefix="index."):
+        """
+        Write the index's arrays, including the partitions, to a snapshot.
+        
+        Args:
+            writer: SnapshotWriter
+            prefix: Name prefix for the index's arrays
+        
+        Returns:
+            Dictionary describing the index, stored in the manifest
+        """
+        info = super().write_snapshot(writer, prefix)
+        if self.is_trained:
+            lengths = [len(rows) for rows in self._lists]
+            writer.add_array(prefix + "ivf.centroids", self._centroids)
+            writer.add_array(prefix + "ivf.offsets", np.concatenate([[0], np.cumsum(lengths)]))
+            writer.add_array(prefix + "ivf.rows", np.concatenate([
+                np.frombuffer(rows, dtype=np.uint32) for rows in self._lists
+            ]) if lengths else np.empty(0, dtype=np.uint32))
+            info['ivf_trained_size'] = self._trained_size
+        return info
+    
+    def load_snapshot(self, snapshot, info, prefix="index."):
+        """
+        Replace the index contents with memory-mapped snapshot arrays.
+        
+        Partitions are read straight from the snapshot; they are copied
+        into the heap only when the index next changes.
+        
+        Args:
+            snapshot: Opened Snapshot
+            info: Dictionary returned by write_snapshot
+            prefix: Name prefix of the index's arrays
+        
+        Returns:
+            True if the snapshot arrays are used as they are, False if the index was rebuilt
+        """
+        self._centroids = None
+        self._lists = []
+        self._trained_size = 0
+        if not super().load_snapshot(snapshot, info, prefix):
+            return False
+        
+        if 'ivf_trained_size' in info:
+            self._centroids = np.asarray(snapshot.array(prefix + "ivf.centroids"))
+            offsets = snapshot.array(prefix + "ivf.offsets")
+            rows = snapshot.array(prefix + "ivf.rows")
+            self._lists = [rows[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+            self._trained_size = info['ivf_trained_size']
+        elif self._size >= self.nlist * self.min_points_per_list:
+            self.train()
+        return True
+    
+    def _candidates(self, query):
+        if not self.is_trained:
+            return None
+        centroid_scores = self._centroids @ query
+        probes = top_k(centroid_scores, self.nprobe)
+        return np.concatenate([
+            np.frombuffer(self._lists[probe], dtype=np.uint32) for probe in probes
+        ]).astype(np.int64)
+    
+    def _on_add(self, rows, vectors):
+        if self.is_trained and self._size < 2 * self._trained_size:
+            self._append_to_lists(rows, self._assign(vectors, self._centroids))
+        elif self._size >= self.nlist * self.min_points_per_list or self.is_trained:
+            # First training, or the data has doubled since the last one
+            self.train()
+    
+    def _on_compact(self, keep):
+        if not self.is_trained:
+            return
+        remap = np.cumsum(keep, dtype=np.int64) - 1
+        for probe, rows in enumerate(self._lists):
+            rows = np.frombuffer(rows, dtype=np.uint32)
+            self._lists[probe] = array("I", remap[rows[keep[rows]]].astype(np.uint32).tobytes())
+    
+    def _append_to_lists(self, rows, assignments):
+        # Partitions loaded from a snapshot are read-only views until now
+        self._lists = [
+            partition if isinstance(partition, array) else array("I", np.asarray(partition).tobytes())
+            for partition in self._lists
+        ]
+        order = np.argsort(assignments, kind='stable')
+        rows = rows[order].astype(np.uint32)
+        assignments = assignments[order]
+        probes, starts = np.unique(assignments, return_index=True)
+        ends = np.append(starts[1:], len(rows))
+        for probe, start, end in zip(probes, starts, ends):
+            self._lists[probe].frombytes(rows[start:end].tobytes())
+    
+    def _assign(self, vectors, centroids, batch_size=8192):
+        """Nearest centroid of each vector, computed in batches to bound memory."""
+        return np.concatenate([
+            np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+            for start in range(0, max(len(vectors), 1), batch_size)
+        ])
+
+def normalize(vectors):
+    """
+    Scale vectors to unit length so inner product equals cosine similarity.
+    
+    Args:
+        vectors: 2-D array-like of vectors
+    
+    Returns:
+        2-D float32 array of unit vectors; zero vectors are left as is
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim != 2:
+        vectors = vectors.reshape(len(vectors), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
@@ -1,75 +1,719 @@
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import Chroma
+import asyncio
+import hashlib
+import os
+import random
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
 from config.db_config import DatabaseConfig
+from src.bm25_index import BM25Index
+from src.bulk_ingestion import read_manifest
+from src.instrumentation import record_span, span
+from src.quantization import build_codec
+from src.resources import (
+    get_chroma_client, get_collection_registry, get_embedding_model, get_resource,
+    release_resources
+)
+from src.retrievers import HybridRetriever
+from src.rwlock import ReadWriteLock
+from src.vector_backends import LocalVectorStore
+from src.vector_index import ExactIndex, IVFIndex
+
+def cosine_relevance(distance):
+    """
+    Convert a Chroma squared-L2 distance into cosine similarity.
+    
+    Gemini embeddings are unit length, so cos = 1 - d / 2. This keeps
+    SIMILARITY_THRESHOLD on the familiar cosine scale.
+    
+    Args:
+        distance: Squared Euclidean distance reported by Chroma
+    
+    Returns:
+        Cosine similarity
+    """
+    return 1.0 - distance / 2.0
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every event loop that uses it."""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, tokens=1):
+        """
+        Take tokens from the bucket, going into debt if it is empty.
+        
+        Args:
+            tokens: Number of tokens to take
+        
+        Returns:
+            Seconds to wait before the reservation may be used
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+    
+    async def acquire(self, tokens=1):
+        """Wait until the requested tokens are available."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class EmbeddingScheduler(Embeddings):
+    """Batches embedding requests and sends them concurrently under a rate limit."""
+    
+    def __init__(self, backend, batch_size=100, max_in_flight=4, requests_per_minute=100,
+                 max_retries=5, base_delay=1.0, max_delay=30.0):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limiter = TokenBucket(requests_per_minute / 60.0, max_in_flight)
+        self.batch_latencies = deque(maxlen=1000)
+        self.retries = 0
+        self._lock = threading.Lock()
+    
+    def embed_documents(self, texts):
+        """
+        Embed documents in concurrent, rate-limited batches.
+        
+        Args:
+            texts: List of texts to embed
+        
+        Returns:
+            List of embedding vectors in input order
+        """
+        coroutine = self.aembed_documents(texts)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        
+        # Called from inside a running loop: run ours on a helper thread,
+        # whose result() re-raises anything the embedding requests raised
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+    
+    async def aembed_documents(self, texts):
+        """
+        Embed documents asynchronously with at most max_in_flight requests.
+        
+        Args:
+            texts: List of texts to embed
+        
+        Returns:
+            List of embedding vectors in input order
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        batches = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        results = await asyncio.gather(
+            *(self._embed_batch(batch, semaphore) for batch in batches)
+        )
+        return [vector for vectors in results for vector in vectors]
+    
+    def embed_query(self, text):
+        """Embed a query directly through the backend."""
+        return self.backend.embed_query(text)
+    
+    def get_stats(self):
+        """
+        Get per-batch latency statistics.
+        
+        Returns:
+            Dictionary with batch count, retries and latency percentiles in seconds
+        """
+        with self._lock:
+            latencies = sorted(entry['latency'] for entry in self.batch_latencies)
+            retries = self.retries
+        
+        if not latencies:
+            return {'batches': 0, 'retries': retries, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+        
+        return {
+            'batches': len(latencies),
+            'retries': retries,
+            'p50': latencies[len(latencies) // 2],
+            'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'max': latencies[-1]
+        }
+    
+    async def _embed_batch(self, texts, semaphore):
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.rate_limiter.acquire()
+                started = time.perf_counter()
+                try:
+                    vectors = await self._call_backend(texts)
+                except Exception:
+                    if attempt == self.max_retries:
+                        raise
+                    with self._lock:
+                        self.retries += 1
+                    # Exponential backoff with full jitter
+                    cap = min(self.max_delay, self.base_delay * 2 ** attempt)
+                    await asyncio.sleep(random.uniform(0, cap))
+                    continue
+                
+                latency = time.perf_counter() - started
+                with self._lock:
+                    self.batch_latencies.append({
+                        'size': len(texts),
+                        'latency': latency,
+                        'attempts': attempt + 1
+                    })
+                record_span('embed_request', latency, texts=len(texts), retries=attempt)
+                return vectors
+    
+    async def _call_backend(self, texts):
+        if hasattr(self.backend, 'aembed_documents'):
+            return await self.backend.aembed_documents(texts)
+        return await asyncio.to_thread(self.backend.embed_documents, texts)
 
 class VectorStore:
-    """Handles vector database operations."""
+    """
+    Handles vector database operations on one collection.
+    
+    The shared COLLECTION_NAME collection holds the corpus built by
+    ingest.py; each app session indexes its uploads into a collection of
+    its own, so sessions never see or delete each other's chunks.
+    """
     
-    def __init__(self):
+    def __init__(self, collection_name=None):
         self.db_config = DatabaseConfig()
-        self.embedding_model = GoogleGenerativeAIEmbeddings(
-            model=self.db_config.EMBEDDING_MODEL
-        )
+        self.collection_name = collection_name or self.db_config.COLLECTION_NAME
+        self.embedding_model = get_embedding_model()
+        self.embedding_scheduler = self.embedding_model.embedding_model
     
     def create_database(self, documents):
         """
-        Create vector database from documents.
+        Create or incrementally update the vector database from documents.
         
         Args:
             documents: List of document chunks
-            
+        
         Returns:
-            Chroma vector database instance
+            Vector database instance
         """
-        db = Chroma.from_documents(
-            documents, 
-            self.embedding_model, 
-            persist_directory=self.db_config.CHROMA_DB_PATH
-        )
+        db = self.open_database()
+        self.sync_documents(db, documents)
         return db
     
     def load_database(self):
         """
-        Load existing vector database.
+        Load the existing persistent vector database.
+        
+        Local backends memory-map their latest snapshot, so even a large
+        corpus opens without being read into memory.
         
         Returns:
-            Chroma vector database instance
+            Vector database instance
         """
-        db = Chroma(
-            persist_directory=None,
-            embedding_function=self.embedding_model
-        )
-        return db
+        return self.open_database()
     
-    def add_documents(self, db, documents):
+    def get_chunk_id(self, document):
+        """
+        Build a stable ID for a chunk from its source file, page and offset.
+        
+        Args:
+            document: Document chunk
+        
+        Returns:
+            Chunk ID string
+        """
+        metadata = document.metadata
+        file_hash = metadata.get('file_hash')
+        if file_hash is None:
+            file_hash = hashlib.sha256(document.page_content.encode('utf-8')).hexdigest()
+        
+        start = metadata.get('start_index', 0)
+        end = start + len(document.page_content)
+        return f"{file_hash}:{metadata.get('page', 0)}:{start}:{end}"
+    
+    def get_indexed_ids(self, db):
+        """
+        Get the IDs of every chunk currently stored in the database.
+        
+        Args:
+            db: Vector database
+        
+        Returns:
+            Set of chunk IDs
+        """
+        return set(db.get(include=[])['ids'])
+    
+    def get_indexed_ids_by_file(self, db):
+        """
+        Get the IDs of every chunk currently stored in the database, by source file.
+        
+        Args:
+            db: Vector database
+        
+        Returns:
+            Dictionary mapping file hash to its set of chunk IDs
+        """
+        indexed = {}
+        for chunk_id in self.get_indexed_ids(db):
+            # Chunk IDs start with the hash of their source file
+            indexed.setdefault(chunk_id.split(":", 1)[0], set()).add(chunk_id)
+        return indexed
+    
+    def sync_documents(self, db, documents):
+        """
+        Bring the database in line with documents, touching only what changed.
+        
+        New chunks are upserted, chunks no longer present (removed files or
+        changed chunking parameters) are deleted, and an unchanged document
+        set is a no-op.
+        
+        Args:
+            db: Vector database
+            documents: Complete list of document chunks that should be indexed
+        
+        Returns:
+            Dictionary with counts of added, deleted and unchanged chunks
+        """
+        wanted = {}
+        for doc in documents:
+            wanted.setdefault(self.get_chunk_id(doc), doc)
+        
+        indexed = self.get_indexed_ids(db)
+        stale_ids = [chunk_id for chunk_id in indexed if chunk_id not in wanted]
+        new_ids = [chunk_id for chunk_id in wanted if chunk_id not in indexed]
+        
+        if stale_ids:
+            self.delete_documents(db, stale_ids)
+        if new_ids:
+            self.add_documents(db, [wanted[chunk_id] for chunk_id in new_ids], ids=new_ids)
+        
+        return {
+            'added': len(new_ids),
+            'deleted': len(stale_ids),
+            'unchanged': len(wanted) - len(new_ids)
+        }
+    
+    def add_documents(self, db, documents, ids=None, batch_size=1000):
         """
         Add new documents to existing database.
         
         Args:
-            db: Existing Chroma database
+            db: Existing vector database
             documents: New documents to add
+            ids: Optional chunk IDs; existing IDs are overwritten
+            batch_size: Number of documents sent per upsert
         """
-        db.add_documents(documents)
-        db.persist()
+        if ids is None:
+            ids = [self.get_chunk_id(doc) for doc in documents]
+        
+        with span('upsert', chunks=len(ids)):
+            for start in range(0, len(documents), batch_size):
+                db.add_documents(
+                    documents[start:start + batch_size],
+                    ids=ids[start:start + batch_size]
+                )
+            db.persist()
+            self.get_keyword_index(db).add(
+                ids, [doc.page_content for doc in documents], [doc.metadata for doc in documents]
+            )
     
-    def search_documents(self, db, query, k=4):
+    def upsert_embeddings(self, db, documents, embeddings, ids):
+        """
+        Upsert documents whose embeddings were computed ahead of time.
+        
+        Args:
+            db: Existing vector database
+            documents: Document chunks
+            embeddings: Embedding vectors matching documents
+            ids: Chunk IDs matching documents
+        """
+        with span('upsert', chunks=len(ids)):
+            db.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                documents=[doc.page_content for doc in documents],
+                metadatas=[doc.metadata for doc in documents]
+            )
+            self.get_keyword_index(db).add(
+                ids, [doc.page_content for doc in documents], [doc.metadata for doc in documents]
+            )
+    
+    def delete_documents(self, db, ids, batch_size=1000, persist=True):
+        """
+        Delete documents from the database by chunk ID.
+        
+        Args:
+            db: Existing vector database
+            ids: Chunk IDs to delete
+            batch_size: Number of IDs sent per delete call
+            persist: Whether to persist the database afterwards
+        """
+        with span('delete', chunks=len(ids)):
+            for start in range(0, len(ids), batch_size):
+                db.delete(ids=ids[start:start + batch_size])
+            if persist:
+                db.persist()
+            self.get_keyword_index(db).remove(ids)
+    
+    def get_keyword_index(self, db):
+        """
+        Get the BM25 index kept alongside the collection.
+        
+        The index is shared by every session in the process and built from
+        the collection's stored chunks on first use; afterwards it is
+        updated together with the collection.
+        
+        Args:
+            db: Vector database
+        
+        Returns:
+            BM25Index instance
+        """
+        def build():
+            index = BM25Index(k1=self.db_config.BM25_K1, b=self.db_config.BM25_B)
+            offset = 0
+            while True:
+                contents = db.get(include=['documents', 'metadatas'], limit=5000, offset=offset)
+                if not contents['ids']:
+                    break
+                index.add(contents['ids'], contents['documents'], contents['metadatas'])
+                offset += len(contents['ids'])
+            return index
+        
+        # A store reloaded from another process's snapshot needs a fresh index
+        reloads = getattr(db, 'reloads', 0)
+        return get_resource(
+            ('keyword_index', self.get_database_path(), self.collection_name, reloads), build
+        )
+    
+    def get_retriever(self, db, k=None, file_hashes=None, page_range=None):
+        """
+        Get an adaptive-k retriever over the database.
+        
+        Results honor SIMILARITY_THRESHOLD, stop early when scores drop by
+        more than SCORE_DROP_RATIO, and are capped at MAX_CONTEXT_TOKENS.
+        Filters are pushed down into both the vector and keyword searches,
+        so a session only searches its own documents.
+        
+        Args:
+            db: Vector database
+            k: Maximum number of results, MAX_RESULTS if not given
+            file_hashes: Optional source file hashes to restrict retrieval to
+            page_range: Optional inclusive (first, last) zero-based page numbers
+        
+        Returns:
+            Retriever fusing BM25 and vector search, or vector-only if HYBRID_SEARCH is off
+        """
+        if k is None:
+            k = self.db_config.MAX_RESULTS
+        
+        keyword_index = None
+        if self.db_config.HYBRID_SEARCH:
+            keyword_index = self.get_keyword_index(db)
+        
+        return HybridRetriever(
+            vectorstore=db,
+            keyword_index=keyword_index,
+            chunk_id_fn=self.get_chunk_id,
+            k=k,
+            fetch_k=max(k, self.db_config.HYBRID_FETCH_K),
+            rrf_k=self.db_config.RRF_K,
+            score_threshold=self.db_config.SIMILARITY_THRESHOLD,
+            drop_ratio=self.db_config.SCORE_DROP_RATIO,
+            max_context_tokens=self.db_config.MAX_CONTEXT_TOKENS,
+            chars_per_token=self.db_config.CHARS_PER_TOKEN,
+            file_hashes=list(file_hashes) if file_hashes is not None else None,
+            page_range=tuple(page_range) if page_range is not None else None
+        )
+    
+    def search_documents(self, db, query, k=4, file_hashes=None, page_range=None):
         """
         Search for relevant documents.
         
         Args:
-            db: Chroma database
+            db: Vector database
             query: Search query
             k: Number of results to return
-            
+            file_hashes: Optional source file hashes to restrict the search to
+            page_range: Optional inclusive (first, last) zero-based page numbers
+        
         Returns:
             List of relevant documents
         """
-        return db.similarity_search(query, k=k)
+        return self.get_retriever(db, k, file_hashes, page_range).invoke(query)
     
-    def delete_database(self):
-        """Delete the vector database."""
-        import shutil
-        import os
+    def get_embedding_cache_stats(self):
+        """
+        Get embedding cache statistics.
+        
+        Returns:
+            Dictionary with cache hits, misses and size
+        """
+        return self.embedding_model.get_stats()
+    
+    def open_database(self):
+        """
+        Open the persistent vector database without modifying it.
+        
+        VECTOR_BACKEND picks the implementation. Every backend offers the
+        same calls (add_documents, upsert, get, delete, persist and
+        similarity_search_with_relevance_scores), so the rest of the app
+        does not depend on which one is in use. Reads and writes go through
+        a reader/writer lock per collection, shared by every session.
+        
+        Returns:
+            ChromaBackend or LocalVectorStore instance
+        """
+        backend = self.db_config.VECTOR_BACKEND
+        if backend == "chroma":
+            # Imported here so the local backends never load the Chroma client
+            from src.chroma_backend import ChromaBackend
+            
+            return ChromaBackend(
+                collection_name=self.collection_name,
+                lock=self.get_collection_lock(),
+                client=get_chroma_client(self.db_config.CHROMA_DB_PATH),
+                persist_directory=self.db_config.CHROMA_DB_PATH,
+                embedding_function=self.embedding_model,
+                relevance_score_fn=cosine_relevance,
+                # Only applied when the collection is first created
+                collection_metadata={
+                    "hnsw:M": self.db_config.HNSW_M,
+                    "hnsw:construction_ef": self.db_config.HNSW_CONSTRUCTION_EF,
+                    "hnsw:search_ef": self.db_config.HNSW_SEARCH_EF
+                }
+            )
+        
+        # Local stores live in memory, so every session shares one per collection
+        def build():
+            return LocalVectorStore(
+                self.embedding_model,
+                index=self.build_index(backend),
+                persist_directory=self.get_database_path(),
+                relevance_score_fn=cosine_relevance,
+                verify_checksums=self.db_config.SNAPSHOT_VERIFY_CHECKSUMS,
+                snapshots_to_keep=self.db_config.SNAPSHOTS_TO_KEEP
+            )
+        
+        db = get_resource(('local_vector_store', self.get_database_path()), build)
+        # Pick up snapshots published by other processes, e.g. the ingestion CLI
+        db.refresh()
+        return db
+    
+    def build_index(self, backend):
+        """
+        Build an empty in-process vector index.
+        
+        With VECTOR_QUANTIZATION set, searches run on compressed codes. When
+        QUANTIZATION_RERANK_FACTOR is positive the full-precision vectors are
+        kept in a memory-mapped file so the best candidates can be rescored
+        exactly without holding them in RAM.
+        
+        Args:
+            backend: "ivf" for the approximate IVF index, "exact" for brute force
+        
+        Returns:
+            IVFIndex or ExactIndex instance
+        """
+        codec = build_codec(
+            self.db_config.VECTOR_QUANTIZATION,
+            pq_subspaces=self.db_config.PQ_SUBSPACES,
+            train_size=self.db_config.QUANTIZATION_TRAIN_SIZE
+        )
+        rerank_factor = self.db_config.QUANTIZATION_RERANK_FACTOR if codec is not None else 0
+        full_vectors_path = None
+        if rerank_factor > 0:
+            os.makedirs(self.get_database_path(), exist_ok=True)
+            full_vectors_path = os.path.join(self.get_database_path(), "full_vectors.f32")
+        
+        if backend == "ivf":
+            return IVFIndex(
+                nlist=self.db_config.IVF_NLIST,
+                nprobe=self.db_config.IVF_NPROBE,
+                codec=codec,
+                rerank_factor=rerank_factor,
+                full_vectors_path=full_vectors_path
+            )
+        if backend == "exact":
+            return ExactIndex(
+                codec=codec, rerank_factor=rerank_factor, full_vectors_path=full_vectors_path
+            )
+        raise ValueError(f"Unknown vector backend: {backend}")
+    
+    def get_database_path(self, collection_name=None):
+        """
+        Get the directory the configured backend persists a collection to.
+        
+        Chroma keeps every collection under CHROMA_DB_PATH; the local
+        backends use one directory per collection.
+        
+        Args:
+            collection_name: Collection, this store's if not given
+        
+        Returns:
+            Directory path string
+        """
+        if self.db_config.VECTOR_BACKEND == "chroma":
+            return self.db_config.CHROMA_DB_PATH
+        return str(
+            self.db_config.LOCAL_INDEX_DIR / self.db_config.VECTOR_BACKEND
+            / (collection_name or self.collection_name)
+        )
+    
+    def get_bulk_manifest_path(self, collection_name=None):
+        """
+        Get the path of the manifest written by bulk ingestion.
+        
+        It is kept per collection, so deleting the collection also forgets
+        which files were bulk ingested into it.
         
-        if os.path.exists(self.db_config.CHROMA_DB_PATH):
-            shutil.rmtree(self.db_config.CHROMA_DB_PATH)
\ No newline at end of file
+        Args:
+            collection_name: Collection, this store's if not given
+        
+        Returns:
+            Manifest file path string
+        """
+        collection_name = collection_name or self.collection_name
+        return os.path.join(
+            self.get_database_path(collection_name),
+            f"{collection_name}.{self.db_config.BULK_INGEST_MANIFEST}"
+        )
+    
+    def get_bulk_corpus(self):
+        """
+        Get the files ingested into the collection by ingest.py.
+        
+        Returns:
+            Dictionary of file path to manifest entry (file_hash, file_name,
+            pages, characters, ...), empty if nothing was bulk ingested
+        """
+        manifest = read_manifest(self.get_bulk_manifest_path())
+        return manifest['files'] if manifest is not None else {}
+    
+    def get_collection_lock(self, collection_name=None):
+        """
+        Get the reader/writer lock shared by every Chroma handle on a collection.
+        
+        Args:
+            collection_name: Collection, this store's if not given
+        
+        Returns:
+            ReadWriteLock instance
+        """
+        # Keyed like the keyword index, so drop_collection releases both
+        collection_name = collection_name or self.collection_name
+        return get_resource(
+            ('collection_lock', self.get_database_path(collection_name), collection_name),
+            ReadWriteLock
+        )
+    
+    def list_collections(self):
+        """
+        List the collections stored for the configured backend.
+        
+        Returns:
+            List of collection names
+        """
+        if self.db_config.VECTOR_BACKEND == "chroma":
+            client = get_chroma_client(self.db_config.CHROMA_DB_PATH)
+            return [collection.name for collection in client.list_collections()]
+        
+        backend_dir = self.db_config.LOCAL_INDEX_DIR / self.db_config.VECTOR_BACKEND
+        if not backend_dir.exists():
+            return []
+        return sorted(path.name for path in backend_dir.iterdir() if path.is_dir())
+    
+    def touch(self):
+        """
+        Record that this collection is in use, so it is not evicted.
+        
+        Returns:
+            False if the collection was not in use before: it is new, or it
+            was evicted while idle, so databases opened on it are stale
+        """
+        return get_collection_registry().touch(self.collection_name)
+    
+    def evict_idle_collections(self):
+        """
+        Drop session collections nobody has used for SESSION_TIMEOUT_HOURS.
+        
+        At most one sweep runs per COLLECTION_SWEEP_INTERVAL_SECONDS across
+        the process, so this is cheap to call on every rerun. Collections
+        without SESSION_COLLECTION_PREFIX, like COLLECTION_NAME, are never
+        evicted.
+        
+        Returns:
+            List of evicted collection names
+        """
+        registry = get_collection_registry()
+        if not registry.sweep_due():
+            return []
+        
+        evicted = []
+        for collection_name in self.list_collections():
+            if (collection_name.startswith(self.db_config.SESSION_COLLECTION_PREFIX)
+                    and registry.is_idle(collection_name)):
+                self.drop_collection(collection_name)
+                evicted.append(collection_name)
+        return evicted
+    
+    def drop_collection(self, collection_name):
+        """
+        Delete one collection and everything kept for it.
+        
+        Waits for searches of the collection in progress; other collections
+        and the sessions using them are not affected.
+        
+        Args:
+            collection_name: Collection to delete
+        """
+        database_path = self.get_database_path(collection_name)
+        if self.db_config.VECTOR_BACKEND == "chroma":
+            from chromadb.errors import NotFoundError
+            
+            with self.get_collection_lock(collection_name).write():
+                try:
+                    get_chroma_client(database_path).delete_collection(collection_name)
+                except NotFoundError:
+                    pass
+        else:
+            for db in release_resources(lambda key: key == ('local_vector_store', database_path)):
+                db.drop()
+            if os.path.exists(database_path):
+                shutil.rmtree(database_path)
+        
+        manifest_path = self.get_bulk_manifest_path(collection_name)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        release_resources(lambda key: (
+            isinstance(key, tuple) and key[0] in ('keyword_index', 'collection_lock')
+            and key[1:3] == (database_path, collection_name)
+        ))
+        get_collection_registry().forget(collection_name)
+    
+    def get_embedding_scheduler_stats(self):
+        """
+        Get embedding request statistics.
+        
+        Returns:
+            Dictionary with batch count, retries and latency percentiles
+        """
+        return self.embedding_scheduler.get_stats()
+    
+    def delete_database(self):
+        """Delete this store's collection, leaving other collections untouched."""
+        self.drop_collection(self.collection_name)
\ No newline at end of file